@@ -0,0 +1,62 @@
+"""Boshlang'ich sxema: testlar, savollar, talabgorlar va javoblar
+
+create_tables() bilan yaratilgan mavjud bazalar uchun:
+alembic stamp 0001_baseline && alembic upgrade head
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tests",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("subject", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("teacher_id", sa.Integer()),
+    )
+    op.create_index("ix_tests_id", "tests", ["id"])
+
+    op.create_table(
+        "questions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("test_id", sa.Integer(), sa.ForeignKey("tests.id")),
+        sa.Column("question_text", sa.Text(), nullable=False),
+        sa.Column("correct_answer", sa.Integer()),
+        sa.Column("difficulty_b", sa.Float()),
+    )
+    op.create_index("ix_questions_id", "questions", ["id"])
+
+    op.create_table(
+        "students",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("test_id", sa.Integer(), sa.ForeignKey("tests.id")),
+    )
+    op.create_index("ix_students_id", "students", ["id"])
+
+    op.create_table(
+        "responses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id")),
+        sa.Column("question_id", sa.Integer(), sa.ForeignKey("questions.id")),
+        sa.Column("answer", sa.Integer()),
+    )
+    op.create_index("ix_responses_id", "responses", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("responses")
+    op.drop_table("students")
+    op.drop_table("questions")
+    op.drop_table("tests")
@@ -0,0 +1,135 @@
+"""Tahlil natijalari, shkala sozlamalari va bot sessiyalari
+
+Bu jadvallar migratsiyalardan oldin create_tables() bilan yaratilgan
+bo'lishi mumkin, shuning uchun mavjud jadval va ustunlar o'tkazib yuboriladi.
+
+Revision ID: 0002_analysis_results
+Revises: 0001_baseline
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_analysis_results"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+FIT_COLUMNS = ("infit_mnsq", "infit_zstd", "outfit_mnsq", "outfit_zstd")
+
+
+def _tables() -> set:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _columns(table: str) -> set:
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _add_columns(table: str, columns: list) -> None:
+    existing = _columns(table)
+    missing = [column for column in columns if column.name not in existing]
+    if missing:
+        with op.batch_alter_table(table) as batch:
+            for column in missing:
+                batch.add_column(column)
+
+
+def upgrade() -> None:
+    _add_columns("tests", [
+        sa.Column("data_version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("scale_slope", sa.Float()),
+        sa.Column("scale_intercept", sa.Float()),
+        sa.Column("grade_cuts", sa.Text()),
+    ])
+    tables = _tables()
+
+    if "analysis_runs" not in tables:
+        op.create_table(
+            "analysis_runs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("test_id", sa.Integer(), sa.ForeignKey("tests.id")),
+            sa.Column("data_version", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("total_students", sa.Integer()),
+            sa.Column("total_questions", sa.Integer()),
+            sa.Column("reliability", sa.Float()),
+            sa.Column("iterations", sa.Integer()),
+            sa.Column("converged", sa.Boolean()),
+            sa.Column("summary", sa.Text()),
+        )
+        op.create_index("ix_analysis_runs_id", "analysis_runs", ["id"])
+        op.create_index("ix_analysis_runs_test_id", "analysis_runs", ["test_id"])
+    _add_columns("analysis_runs", [
+        sa.Column("mode", sa.String()),
+        sa.Column("updated_at", sa.DateTime()),
+        sa.Column("last_response_id", sa.Integer()),
+        sa.Column("state", sa.LargeBinary()),
+    ])
+
+    if "person_estimates" not in tables:
+        op.create_table(
+            "person_estimates",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("run_id", sa.Integer(), sa.ForeignKey("analysis_runs.id")),
+            sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id")),
+            sa.Column("raw_score", sa.Integer()),
+            sa.Column("theta", sa.Float()),
+            sa.Column("theta_se", sa.Float()),
+        )
+        op.create_index("ix_person_estimates_id", "person_estimates", ["id"])
+        op.create_index("ix_person_estimates_run_id", "person_estimates", ["run_id"])
+    _add_columns("person_estimates", [
+        sa.Column("pattern", sa.Integer()),
+        sa.Column("scaled_score", sa.Float()),
+        sa.Column("grade", sa.String()),
+        *[sa.Column(name, sa.Float()) for name in FIT_COLUMNS],
+    ])
+    indexes = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("person_estimates")}
+    if "ix_person_estimates_group" not in indexes:
+        op.create_index("ix_person_estimates_group", "person_estimates", ["run_id", "pattern", "raw_score"])
+
+    if "item_estimates" not in tables:
+        op.create_table(
+            "item_estimates",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("run_id", sa.Integer(), sa.ForeignKey("analysis_runs.id")),
+            sa.Column("question_id", sa.Integer(), sa.ForeignKey("questions.id")),
+            sa.Column("difficulty_b", sa.Float()),
+            sa.Column("difficulty_se", sa.Float()),
+        )
+        op.create_index("ix_item_estimates_id", "item_estimates", ["id"])
+        op.create_index("ix_item_estimates_run_id", "item_estimates", ["run_id"])
+    _add_columns("item_estimates", [sa.Column(name, sa.Float()) for name in FIT_COLUMNS])
+
+    if "score_conversions" not in tables:
+        op.create_table(
+            "score_conversions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("run_id", sa.Integer(), sa.ForeignKey("analysis_runs.id")),
+            sa.Column("raw_score", sa.Integer()),
+            sa.Column("theta", sa.Float()),
+            sa.Column("theta_se", sa.Float()),
+        )
+        op.create_index("ix_score_conversions_id", "score_conversions", ["id"])
+        op.create_index("ix_score_conversions_run_id", "score_conversions", ["run_id"])
+
+    if "bot_sessions" not in tables:
+        op.create_table(
+            "bot_sessions",
+            sa.Column("key", sa.String(), primary_key=True),
+            sa.Column("data", sa.LargeBinary(), nullable=False),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+        op.create_index("ix_bot_sessions_updated_at", "bot_sessions", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("bot_sessions")
+    op.drop_table("score_conversions")
+    op.drop_table("item_estimates")
+    op.drop_table("person_estimates")
+    op.drop_table("analysis_runs")
+    with op.batch_alter_table("tests") as batch:
+        for name in ("grade_cuts", "scale_intercept", "scale_slope", "data_version"):
+            batch.drop_column(name)
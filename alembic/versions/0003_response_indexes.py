@@ -0,0 +1,47 @@
+"""Javoblar jadvali: test_id nusxasi, indekslar va (student_id, question_id) yagonaligi
+
+Revision ID: 0003_response_indexes
+Revises: 0002_analysis_results
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_response_indexes"
+down_revision = "0002_analysis_results"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # SQLite da jadval bir marta nusxalanadi, PostgreSQL da oddiy ALTER TABLE
+    with op.batch_alter_table("responses") as batch:
+        batch.add_column(sa.Column("test_id", sa.Integer()))
+        batch.create_foreign_key("fk_responses_test_id", "tests", ["test_id"], ["id"])
+    op.execute(
+        "UPDATE responses SET test_id = "
+        "(SELECT questions.test_id FROM questions WHERE questions.id = responses.question_id)"
+    )
+
+    # Takroriy javoblardan eng oxirgisi (eng katta id) qoladi
+    op.execute(
+        "DELETE FROM responses WHERE id NOT IN "
+        "(SELECT keep_id FROM (SELECT MAX(id) AS keep_id FROM responses "
+        "GROUP BY student_id, question_id) AS latest)"
+    )
+    op.create_index("uq_responses_student_question", "responses", ["student_id", "question_id"], unique=True)
+    op.create_index("ix_responses_test_id_id", "responses", ["test_id", "id"])
+    op.create_index("ix_responses_question_id", "responses", ["question_id"])
+    op.create_index("ix_questions_test_id", "questions", ["test_id"])
+    op.create_index("ix_students_test_id", "students", ["test_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_students_test_id", "students")
+    op.drop_index("ix_questions_test_id", "questions")
+    op.drop_index("ix_responses_question_id", "responses")
+    op.drop_index("ix_responses_test_id_id", "responses")
+    op.drop_index("uq_responses_student_question", "responses")
+    with op.batch_alter_table("responses") as batch:
+        batch.drop_constraint("fk_responses_test_id", type_="foreignkey")
+        batch.drop_column("test_id")
@@ -0,0 +1,21 @@
+"""Talabgorlar natijalarini student_id bo'yicha sahifalash indeksi
+
+Revision ID: 0004_person_estimates_page
+Revises: 0003_response_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0004_person_estimates_page"
+down_revision = "0003_response_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # GET /results/{test_id}/students?after=...: (run_id, student_id > after) bo'yicha kalitli sahifalash
+    op.create_index("ix_person_estimates_run_student", "person_estimates", ["run_id", "student_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_person_estimates_run_student", "person_estimates")
@@ -0,0 +1,21 @@
+"""Javoblar jadvalidagi ortiqcha ix_responses_id indeksini olib tashlash
+
+Revision ID: 0005_drop_responses_id_index
+Revises: 0004_person_estimates_page
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0005_drop_responses_id_index"
+down_revision = "0004_person_estimates_page"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # id birlamchi kalit (SQLite da rowid) - alohida indeks faqat har bir yozuvni sekinlashtiradi
+    op.drop_index("ix_responses_id", "responses")
+
+
+def downgrade() -> None:
+    op.create_index("ix_responses_id", "responses", ["id"])
@@ -0,0 +1,32 @@
+"""Talabgor guruhi kaliti: CRC32 xeshi o'rniga javob berilgan savollar maskasi
+
+Revision ID: 0006_person_pattern_mask
+Revises: 0005_drop_responses_id_index
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_person_pattern_mask"
+down_revision = "0005_drop_responses_id_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_person_estimates_group", "person_estimates")
+    with op.batch_alter_table("person_estimates") as batch:
+        batch.drop_column("pattern")
+        batch.add_column(sa.Column("pattern", sa.LargeBinary()))
+    op.create_index("ix_person_estimates_group", "person_estimates", ["run_id", "pattern", "raw_score"])
+    # Eski natijalarda maska yo'q: keyingi qo'shimcha tahlil to'liq tahlilga o'tadi
+    op.execute("UPDATE analysis_runs SET state = NULL")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_person_estimates_group", "person_estimates")
+    with op.batch_alter_table("person_estimates") as batch:
+        batch.drop_column("pattern")
+        batch.add_column(sa.Column("pattern", sa.Integer()))
+    op.create_index("ix_person_estimates_group", "person_estimates", ["run_id", "pattern", "raw_score"])
+    op.execute("UPDATE analysis_runs SET state = NULL")
@@ -0,0 +1,192 @@
+"""API ishga tushish tezligi: import vaqti va /health tayyorligi budjetlari.
+
+Ishga tushirish (loyiha ildizidan):
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --modes ingest --import-budget 1.0 --ready-budget 3
+    python -m benchmarks.import_budget --output startup.json
+
+Har bir APP_MODE (full, ingest) uchun alohida jarayonda
+`python -X importtime -c "import src.main"` bajariladi va src.main ning
+jamlanma import vaqti budjet bilan solishtiriladi (--repeat o'lchovning eng
+kichigi olinadi: shovqin vaqtni faqat oshiradi). Rejimda import qilinmasligi kerak bo'lgan modullar (ingest
+rejimida pandas va tahlil moduli, har ikkisida telegram) tekshiriladi.
+So'ng uvicorn ishga tushirilib, jarayon boshlanishidan /health 200
+qaytarguncha vaqt o'lchanadi. Budjet buzilsa skript 1 kodi bilan tugaydi.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ("full", "ingest")
+
+# src.main import vaqti budjeti (soniya)
+IMPORT_BUDGETS = {"full": 2.0, "ingest": 1.5}
+
+# Jarayon boshlanishidan /health 200 gacha budjet (soniya)
+READY_BUDGET = 5.0
+
+# Shu rejimda import qilingan bo'lsa xato hisoblanadigan modullar
+FORBIDDEN_MODULES = {
+    "full": ("pandas", "telegram"),
+    "ingest": ("pandas", "telegram", "src.api.routes", "src.services.analysis_tasks",
+               "src.services.rasch_service"),
+}
+
+# Tayyorlikni kutish chegarasi va so'rovlar oralig'i (soniya)
+READY_TIMEOUT = 60.0
+POLL_INTERVAL = 0.02
+
+_PROBE = "import json, sys, src.main; print(json.dumps(sorted(sys.modules)))"
+
+
+def _environment(mode: str, database_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.pop("TELEGRAM_TOKEN", None)
+    env.update({
+        "APP_MODE": mode,
+        # full rejimida webhook yo'li ham tekshiriladi: bot fonda, tokensiz darhol to'xtaydi
+        "BOT_MODE": "webhook",
+        "DATABASE_URL": database_url,
+        "PYTHONPATH": ROOT + os.pathsep + env.get("PYTHONPATH", ""),
+    })
+    return env
+
+
+def _cumulative_import_time(stderr: str, module: str) -> float:
+    """-X importtime chiqishidan modulning jamlanma import vaqti (soniya)"""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1e6
+    raise RuntimeError(f"importtime chiqishida {module} topilmadi")
+
+
+def measure_import(mode: str, env: Dict[str, str], repeat: int) -> Dict:
+    seconds, modules = [], []
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", _PROBE], cwd=ROOT, env=env,
+                                   capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{mode}: src.main import qilinmadi:\n{completed.stderr[-2000:]}")
+        seconds.append(_cumulative_import_time(completed.stderr, "src.main"))
+        modules = json.loads(completed.stdout.strip().splitlines()[-1])
+    loaded = set(modules)
+    return {
+        "import_seconds": min(seconds),
+        "import_runs": seconds,
+        "modules": len(modules),
+        "forbidden_loaded": [name for name in FORBIDDEN_MODULES[mode] if name in loaded],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_ready(env: Dict[str, str]) -> float:
+    """uvicorn jarayoni boshlanishidan /health 200 qaytarguncha vaqt (soniya)"""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        while time.perf_counter() - started < READY_TIMEOUT:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn to'xtadi:\n{process.stderr.read().decode()[-2000:]}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                pass
+            time.sleep(POLL_INTERVAL)
+        raise RuntimeError(f"/health {READY_TIMEOUT:.0f} s ichida tayyor bo'lmadi")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def _prepare_database(database_url: str) -> None:
+    env = dict(os.environ, DATABASE_URL=database_url)
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True,
+                   capture_output=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="API import vaqti va /health tayyorligi budjetlari")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"APP_MODE lar: {','.join(MODES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="import o'lchovlari soni (eng kichigi olinadi)")
+    parser.add_argument("--import-budget", type=float, help="barcha rejimlar uchun import budjeti (soniya)")
+    parser.add_argument("--ready-budget", type=float, default=READY_BUDGET)
+    parser.add_argument("--skip-ready", action="store_true", help="uvicorn ni ishga tushirmaslik")
+    parser.add_argument("--output", help="natijalarni JSON faylga yozish")
+    args = parser.parse_args(argv)
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"noma'lum rejimlar: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="rasch_startup_")
+    database_url = f"sqlite:///{os.path.join(workdir, 'startup.db')}"
+    results: Dict = {'python': sys.version.split()[0], 'modes': {}}
+    failures: List[str] = []
+    try:
+        _prepare_database(database_url)
+        for mode in modes:
+            env = _environment(mode, database_url)
+            result = measure_import(mode, env, max(args.repeat, 1))
+            budget = args.import_budget if args.import_budget is not None else IMPORT_BUDGETS[mode]
+            print(f"{mode:>6}: import {result['import_seconds']:.3f} s (budjet {budget:.2f} s), "
+                  f"{result['modules']} modul")
+            if result['import_seconds'] > budget:
+                failures.append(f"{mode}: import {result['import_seconds']:.3f} s > {budget:.2f} s")
+            if result['forbidden_loaded']:
+                failures.append(f"{mode}: import qilinmasligi kerak: {', '.join(result['forbidden_loaded'])}")
+            if not args.skip_ready:
+                result['ready_seconds'] = measure_ready(env)
+                print(f"{mode:>6}: /health {result['ready_seconds']:.3f} s (budjet {args.ready_budget:.2f} s)")
+                if result['ready_seconds'] > args.ready_budget:
+                    failures.append(f"{mode}: /health {result['ready_seconds']:.3f} s > {args.ready_budget:.2f} s")
+            results['modes'][mode] = result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if failures:
+        print("\nMUAMMOLAR:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nBarcha budjetlar bajarildi")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
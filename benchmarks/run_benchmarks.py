@@ -0,0 +1,315 @@
+"""Rasch tahlili unumdorligi va parametrlarni tiklash aniqligi benchmarklari.
+
+Ishga tushirish (loyiha ildizidan):
+
+    python -m benchmarks.run_benchmarks --scales 1000,100000,1000000 --items 50 --missing 0.05
+    python -m benchmarks.run_benchmarks --output natija.json
+    python -m benchmarks.run_benchmarks --baseline natija.json   # sekinlashuv bo'lsa chiqish kodi 1
+
+Har bir o'lcham uchun sintetik 1PL javoblar yaratiladi va bosqichlar
+(fayl o'qish, bazaga yuklash, bazadan yuklash, baholash, moslik
+statistikasi, analyze_matrix, API /analyze) vaqti va jarayon xotirasi
+cho'qqisi o'lchanadi (--tracemalloc - bosqich ajratmalari cho'qqisi ham).
+Baholangan b va theta haqiqiy qiymatlar bilan solishtiriladi; aniqlik
+chegaralardan chiqsa, ommaviy yuklash MIN_INGEST_RATE javob/s dan sekin
+bo'lsa yoki bosqich baseline dan TOLERANCE dan ko'proq sekinlashsa skript
+1 kodi bilan tugaydi.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Benchmark o'z vaqtinchalik bazasida ishlaydi: sozlamalar src import qilinishidan oldin
+_WORKDIR = tempfile.mkdtemp(prefix="rasch_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_WORKDIR, 'bench.db')}"
+os.environ["SESSION_DIR"] = os.path.join(_WORKDIR, "sessions")
+os.environ.setdefault("BOT_MODE", "none")
+
+from benchmarks.synthetic import simulate_responses, write_csv  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = ("parse", "ingest", "load", "estimate", "fit", "analyze_matrix", "api_analyze")
+
+# Parametrlarni tiklash chegaralari (markazlashtirilgan b va theta bo'yicha)
+MIN_DIFFICULTY_CORR = 0.99
+MAX_DIFFICULTY_RMSE = 0.15
+MIN_ABILITY_CORR = 0.85
+
+# Baseline bilan solishtirishda ruxsat etilgan sekinlashuv ulushi
+TOLERANCE = 0.25
+
+# Ommaviy yuklash tezligi chegarasi (javob/soniya) va u tekshiriladigan eng kichik
+# matritsa (kichik fayllarda talabgor/savol yaratish va tranzaksiya xarajati ustun)
+MIN_INGEST_RATE = 100_000
+MIN_RATE_CELLS = 1_000_000
+
+# Bundan qisqa bosqichlar baseline bilan solishtirilmaydi (o'lchash shovqini)
+MIN_COMPARED_SECONDS = 0.05
+
+# API vazifasi natijasini kutish chegarasi (soniya)
+API_TIMEOUT = 3600
+
+
+def _max_rss_mb() -> float:
+    # Linux da ru_maxrss kilobaytda
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@contextmanager
+def measure(results: Dict, stage: str, trace: bool = False):
+    """Bosqich vaqti va jarayon RSS cho'qqisi; trace=True bo'lsa Python/NumPy ajratmalari
+    cho'qqisi ham (tracemalloc Python qismi ko'p bosqichlarni sezilarli sekinlashtiradi)"""
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        results[stage] = {'seconds': round(elapsed, 4), 'max_rss_mb': round(_max_rss_mb(), 1)}
+        line = f"  {stage:<15} {elapsed:9.3f} s  RSS {results[stage]['max_rss_mb']:9.1f} MB"
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[stage]['peak_mb'] = round(peak / 2**20, 1)
+            line += f"  cho'qqi {peak / 2**20:9.1f} MB"
+        print(line)
+
+
+def _centered(values: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    return values - values.mean() + reference.mean()
+
+
+def recovery(data: Dict, estimates: Dict, abilities: np.ndarray) -> Dict:
+    """Baholangan parametrlarning haqiqiy qiymatlarga yaqinligi"""
+    b_true = data['b']
+    b_hat = _centered(np.asarray(estimates['b'], dtype=np.float64), b_true)
+    theta_true = data['theta']
+    theta_hat = np.asarray(abilities, dtype=np.float64)
+    finite = np.isfinite(theta_hat)
+    return {
+        'difficulty_corr': float(np.corrcoef(b_true, b_hat)[0, 1]),
+        'difficulty_rmse': float(np.sqrt(np.mean((b_true - b_hat) ** 2))),
+        'difficulty_bias': float(np.mean(b_hat - b_true)),
+        'ability_corr': float(np.corrcoef(theta_true[finite], theta_hat[finite])[0, 1]),
+        'ability_rmse': float(np.sqrt(np.mean((theta_true[finite] - _centered(theta_hat[finite],
+                                                                              theta_true[finite])) ** 2))),
+    }
+
+
+def recovery_failures(scale: str, accuracy: Dict) -> List[str]:
+    failures = []
+    if accuracy['difficulty_corr'] < MIN_DIFFICULTY_CORR:
+        failures.append(f"{scale}: b korrelyatsiyasi {accuracy['difficulty_corr']:.4f} < {MIN_DIFFICULTY_CORR}")
+    if accuracy['difficulty_rmse'] > MAX_DIFFICULTY_RMSE:
+        failures.append(f"{scale}: b RMSE {accuracy['difficulty_rmse']:.4f} > {MAX_DIFFICULTY_RMSE}")
+    if accuracy['ability_corr'] < MIN_ABILITY_CORR:
+        failures.append(f"{scale}: theta korrelyatsiyasi {accuracy['ability_corr']:.4f} < {MIN_ABILITY_CORR}")
+    return failures
+
+
+def _prepare_database() -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    command.upgrade(config, "head")
+
+
+def _create_test(name: str) -> int:
+    from src.models.database import SessionLocal, Test
+
+    db = SessionLocal()
+    try:
+        test = Test(name=name, subject="benchmark", teacher_id=0)
+        db.add(test)
+        db.commit()
+        return test.id
+    finally:
+        db.close()
+
+
+def _run_api_analysis(client, test_id: int) -> Dict:
+    response = client.post(f"/api/analyze/{test_id}", params={"force": "true"})
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+    deadline = time.monotonic() + API_TIMEOUT
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/jobs/{job_id}").json()
+        if job["status"] == "done":
+            return job
+        if job["status"] == "failed":
+            raise RuntimeError(f"API tahlili xatosi: {job['error']}")
+        time.sleep(0.05)
+    raise TimeoutError("API tahlili kutish vaqtidan oshdi")
+
+
+def run_scale(n_persons: int, n_items: int, missing_rate: float, seed: int, stages: List[str], client,
+              trace: bool = False) -> Dict:
+    from src.models.database import SessionLocal
+    from src.services.data_loader import load_response_matrix
+    from src.services.estimation import estimate_from_statistics
+    from src.services.fit_statistics import fit_statistics
+    from src.services.ingestion_service import IngestionService
+    from src.services.rasch_service import RaschService
+    from src.services.response_matrix import ResponseMatrix
+    from src.services.upload_parser import parse_upload
+
+    print(f"\n{n_persons} talabgor x {n_items} savol (yo'q javoblar {missing_rate:.0%})")
+    timings: Dict[str, Dict] = {}
+    with measure(timings, "generate", trace):
+        data = simulate_responses(n_persons, n_items, missing_rate, seed)
+    csv_path = os.path.join(_WORKDIR, f"responses_{n_persons}.csv")
+    with open(csv_path, "wb") as file:
+        write_csv(data, file)
+
+    matrix = None
+    if "parse" in stages:
+        with measure(timings, "parse", trace), open(csv_path, "rb") as file:
+            matrix = parse_upload(file, "responses.csv")['matrix']
+
+    test_id = None
+    if "ingest" in stages or "load" in stages or "api_analyze" in stages:
+        test_id = _create_test(f"benchmark-{n_persons}x{n_items}")
+        db = SessionLocal()
+        try:
+            with measure(timings, "ingest", trace), open(csv_path, "rb") as file:
+                stats = IngestionService().ingest_file(db, test_id, file, "responses.csv")
+            timings['ingest']['responses'] = stats['responses_inserted']
+            timings['ingest']['rate'] = stats['responses_inserted'] / timings['ingest']['seconds']
+            print(f"  {'':<15} {timings['ingest']['rate']:11,.0f} javob/s")
+            if "load" in stages:
+                with measure(timings, "load", trace):
+                    load_response_matrix(db, test_id)
+        finally:
+            db.close()
+    os.remove(csv_path)
+
+    if matrix is None:
+        matrix = ResponseMatrix.from_array(data['responses'], data['names'])
+
+    with measure(timings, "estimate", trace):
+        groups = matrix.score_groups()
+        estimates = estimate_from_statistics(groups)
+    abilities = estimates['theta'][groups['inverse']]
+    if "fit" in stages:
+        with measure(timings, "fit", trace):
+            fit_statistics(matrix, abilities, estimates['b'])
+    if "analyze_matrix" in stages:
+        with measure(timings, "analyze_matrix", trace):
+            RaschService().analyze_matrix(matrix)
+    if "api_analyze" in stages and test_id is not None:
+        # Tahlil navbat ishchisida bajariladi: xotira ishchi jarayonda, bu yerda faqat vaqt
+        with measure(timings, "api_analyze", trace):
+            _run_api_analysis(client, test_id)
+
+    accuracy = recovery(data, estimates, abilities)
+    accuracy.update(iterations=int(estimates['iterations']), converged=bool(estimates['converged']))
+    print(f"  b: r={accuracy['difficulty_corr']:.4f} RMSE={accuracy['difficulty_rmse']:.4f}   "
+          f"theta: r={accuracy['ability_corr']:.4f} RMSE={accuracy['ability_rmse']:.4f}   "
+          f"iteratsiyalar={accuracy['iterations']}")
+    return {'persons': n_persons, 'items': n_items, 'missing_rate': missing_rate,
+            'stages': timings, 'recovery': accuracy}
+
+
+def ingest_rate_failures(scale: str, result: Dict, min_rate: float) -> List[str]:
+    ingest = result['stages'].get('ingest')
+    if not min_rate or ingest is None or result['persons'] * result['items'] < MIN_RATE_CELLS:
+        return []
+    if ingest['rate'] < min_rate:
+        return [f"{scale}: yuklash {ingest['rate']:,.0f} javob/s < {min_rate:,.0f}"]
+    return []
+
+
+def compare_with_baseline(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Baseline dagi bir xil o'lchamlar bo'yicha sekinlashgan bosqichlar"""
+    regressions = []
+    for scale, result in results['scales'].items():
+        previous = baseline.get('scales', {}).get(scale)
+        if previous is None:
+            continue
+        for stage, timing in result['stages'].items():
+            before = previous['stages'].get(stage, {}).get('seconds')
+            if before is None or before < MIN_COMPARED_SECONDS:
+                continue
+            if timing['seconds'] > before * (1 + tolerance):
+                regressions.append(f"{scale} {stage}: {before:.3f} s -> {timing['seconds']:.3f} s")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rasch tahlili benchmarklari")
+    parser.add_argument("--scales", default="1000,100000", help="talabgorlar soni, vergul bilan (masalan 1000,100000,1000000)")
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--missing", type=float, default=0.05, help="yo'q javoblar ulushi")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"bosqichlar: {','.join(STAGES)}")
+    parser.add_argument("--tracemalloc", action="store_true", help="ajratmalar cho'qqisini ham o'lchash (sekinroq)")
+    parser.add_argument("--output", help="natijalarni JSON faylga yozish")
+    parser.add_argument("--baseline", help="oldingi natijalar JSON fayli bilan solishtirish")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--min-ingest-rate", type=float, default=MIN_INGEST_RATE,
+                        help=f"ommaviy yuklash tezligi chegarasi, javob/s ({MIN_RATE_CELLS:,} katakdan katta "
+                             "matritsalarda; 0 - tekshirmaslik)")
+    args = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"noma'lum bosqichlar: {', '.join(sorted(unknown))}")
+    scales = [int(scale) for scale in args.scales.split(",")]
+
+    _prepare_database()
+    client = None
+    if "api_analyze" in stages:
+        from fastapi.testclient import TestClient
+        from src.main import app
+
+        client = TestClient(app)
+        client.__enter__()
+
+    results = {'python': sys.version.split()[0], 'numpy': np.__version__, 'cpu_count': os.cpu_count(),
+               'scales': {}}
+    failures: List[str] = []
+    try:
+        for n_persons in scales:
+            result = run_scale(n_persons, args.items, args.missing, args.seed, stages, client, args.tracemalloc)
+            key = f"{n_persons}x{args.items}"
+            results['scales'][key] = result
+            failures += recovery_failures(key, result['recovery'])
+            failures += ingest_rate_failures(key, result, args.min_ingest_rate)
+    finally:
+        if client is not None:
+            client.__exit__(None, None, None)
+        shutil.rmtree(_WORKDIR, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            failures += compare_with_baseline(results, json.load(file), args.tolerance)
+
+    if failures:
+        print("\nMUAMMOLAR:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nBarcha tekshiruvlar o'tdi")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
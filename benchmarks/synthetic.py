@@ -0,0 +1,54 @@
+import numpy as np
+from typing import BinaryIO, Dict, Optional
+
+# Yo'q javob kodi (ResponseMatrix.from_array va upload_parser bilan bir xil)
+MISSING = 255
+
+# Generatsiya va CSV yozish shu hajmdagi qatorlar bo'laklarida bajariladi
+CHUNK_ROWS = 50000
+
+
+def simulate_responses(n_persons: int, n_items: int, missing_rate: float = 0.0, seed: Optional[int] = 0,
+                       theta_sd: float = 1.0, b_range: float = 2.0) -> Dict:
+    """Ma'lum theta va b qiymatlaridan 1PL (Rasch) javoblar matritsasini simulyatsiya qilish.
+
+    theta ~ N(0, theta_sd), b tekis [-b_range, b_range] oralig'ida va
+    o'rtachasi 0 ga keltiriladi (baholashdagi identifikatsiya sharti).
+    missing_rate ulushdagi kataklar tasodifiy yo'q qiymat (255) bo'ladi.
+    Natija: {'responses' (uint8), 'theta', 'b', 'names'}.
+    """
+    if not 0 <= missing_rate < 1:
+        raise ValueError("missing_rate 0 va 1 orasida bo'lishi kerak")
+    rng = np.random.default_rng(seed)
+    theta = rng.normal(0.0, theta_sd, n_persons)
+    b = rng.uniform(-b_range, b_range, n_items)
+    b -= b.mean()
+
+    responses = np.empty((n_persons, n_items), dtype=np.uint8)
+    for start in range(0, n_persons, CHUNK_ROWS):
+        rows = slice(start, start + CHUNK_ROWS)
+        probability = 1.0 / (1.0 + np.exp(b[None, :] - theta[rows, None]))
+        block = (rng.random(probability.shape) < probability).astype(np.uint8)
+        if missing_rate:
+            block[rng.random(block.shape) < missing_rate] = MISSING
+        responses[rows] = block
+    names = [f"S{index:07d}" for index in range(n_persons)]
+    return {'responses': responses, 'theta': theta, 'b': b, 'names': names}
+
+
+def write_csv(data: Dict, file: BinaryIO) -> None:
+    """Simulyatsiya natijasini yuklash formatidagi CSV ga yozish (ism, q1..qN; bo'sh katak - javob yo'q)"""
+    responses = data['responses']
+    n_items = responses.shape[1]
+    file.write(("name," + ",".join(f"q{index}" for index in range(1, n_items + 1)) + "\n").encode())
+    # 0, 1 va yo'q qiymat kataklari baytlar jadvali orqali matnga aylantiriladi
+    cells = np.array([b"0", b"1", b""], dtype=object)
+    for start in range(0, responses.shape[0], CHUNK_ROWS):
+        block = responses[start:start + CHUNK_ROWS]
+        codes = np.where(block == MISSING, 2, block)
+        text = cells[codes]
+        lines = [
+            name.encode() + b"," + b",".join(row)
+            for name, row in zip(data['names'][start:start + CHUNK_ROWS], text.tolist())
+        ]
+        file.write(b"\n".join(lines) + b"\n")
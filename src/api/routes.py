@@ -1,220 +1,291 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import numpy as np
 from pydantic import BaseModel
 
-from src.models.database import get_db, Test, Question, Student, Response
+from src.api.ingestion_routes import router as ingestion_router
+from src.models.database import get_db, Test
+from src.services.results_store import ResultsStore, bump_data_version
+from src.services.job_queue import QueueFullError, get_job_queue
+from src.services.analysis_tasks import ANALYSIS_MODES, run_dif_analysis, run_test_analysis
+from src.services.batch_analysis import MAX_RESAMPLES, BatchAnalysisService
 from src.services.rasch_service import RaschService
+from src.services.report_service import REPORT_FORMATS, ReportService
+from src.services.scoring import score_candidates
+from src.services.wright_map import MEDIA_TYPES, cached_wright_map
+from src.utils.serialization import ARRAY_MEDIA_TYPES, array_stream, compact_result, json_response, to_builtin
 
 router = APIRouter()
-rasch_service = RaschService()
+# Testlar, savollar, talabgorlar va javoblarni kiritish (CRUD, ommaviy yuklash)
+router.include_router(ingestion_router)
+results_store = ResultsStore()
+report_service = ReportService(results_store)
+batch_service = BatchAnalysisService(results_store)
+
+# Bitta so'rovdagi testlar soni chegarasi
+MAX_BATCH_TESTS = 200
+
+# Talabgorlar natijalari sahifasi hajmi (standart va eng katta)
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
 
 # Pydantic modellar
-class TestCreate(BaseModel):
-    name: str
-    subject: str
-    teacher_id: int
-
-class QuestionCreate(BaseModel):
-    test_id: int
-    question_text: str
-    correct_answer: int
-
-class StudentCreate(BaseModel):
-    test_id: int
-    name: str
-
-class ResponseCreate(BaseModel):
-    student_id: int
-    question_id: int
-    answer: int
-
-# Test routelari
-@router.post("/tests", response_model=Dict[str, Any])
-def create_test(test: TestCreate, db: Session = Depends(get_db)):
-    """Yangi test yaratish"""
-    try:
-        db_test = Test(
-            name=test.name,
-            subject=test.subject,
-            teacher_id=test.teacher_id
-        )
-        db.add(db_test)
-        db.commit()
-        db.refresh(db_test)
-        
-        return {
-            "success": True,
-            "test_id": db_test.id,
-            "message": "Test muvaffaqiyatli yaratildi"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/tests", response_model=List[Dict[str, Any]])
-def get_tests(db: Session = Depends(get_db)):
-    """Barcha testlarni olish"""
-    tests = db.query(Test).all()
-    return [
-        {
-            "id": test.id,
-            "name": test.name,
-            "subject": test.subject,
-            "created_at": test.created_at
-        }
-        for test in tests
-    ]
+class ScaleUpdate(BaseModel):
+    scale_slope: float = 10.0
+    scale_intercept: float = 50.0
+    grade_cuts: List[float] = [70.0, 65.0, 60.0, 55.0, 50.0]  # A+, A, B+, B, C+ quyi chegaralari
 
-# Savol routelari
-@router.post("/questions", response_model=Dict[str, Any])
-def create_question(question: QuestionCreate, db: Session = Depends(get_db)):
-    """Yangi savol qo'shish"""
-    try:
-        db_question = Question(
-            test_id=question.test_id,
-            question_text=question.question_text,
-            correct_answer=question.correct_answer
-        )
-        db.add(db_question)
-        db.commit()
-        db.refresh(db_question)
-        
-        return {
-            "success": True,
-            "question_id": db_question.id,
-            "message": "Savol muvaffaqiyatli qo'shildi"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/tests/{test_id}/questions", response_model=List[Dict[str, Any]])
-def get_test_questions(test_id: int, db: Session = Depends(get_db)):
-    """Test savollarini olish"""
-    questions = db.query(Question).filter(Question.test_id == test_id).all()
-    return [
-        {
-            "id": question.id,
-            "question_text": question.question_text,
-            "correct_answer": question.correct_answer,
-            "difficulty_b": question.difficulty_b
-        }
-        for question in questions
-    ]
+class ScoreRequest(BaseModel):
+    raw_scores: Optional[List[int]] = None  # To'liq javob berganlar xom ballari
+    responses: Optional[List[List[Optional[float]]]] = None  # 0/1 javoblar, null - javob yo'q
 
-# Talabgor routelari
-@router.post("/students", response_model=Dict[str, Any])
-def create_student(student: StudentCreate, db: Session = Depends(get_db)):
-    """Yangi talabgor qo'shish"""
-    try:
-        db_student = Student(
-            test_id=student.test_id,
-            name=student.name
-        )
-        db.add(db_student)
-        db.commit()
-        db.refresh(db_student)
-        
-        return {
-            "success": True,
-            "student_id": db_student.id,
-            "message": "Talabgor muvaffaqiyatli qo'shildi"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/tests/{test_id}/students", response_model=List[Dict[str, Any]])
-def get_test_students(test_id: int, db: Session = Depends(get_db)):
-    """Test talabgorlarini olish"""
-    students = db.query(Student).filter(Student.test_id == test_id).all()
-    return [
-        {
-            "id": student.id,
-            "name": student.name
-        }
-        for student in students
-    ]
+class BatchAnalyzeRequest(BaseModel):
+    test_ids: List[int]
+    force: bool = False
+    mode: str = "full"  # full, incremental yoki anchored
+    bootstrap: int = 0  # > 0 bo'lsa savollar qiyinligi uchun shuncha bootstrap takrorlash
+    confidence: float = 0.95
+    seed: Optional[int] = None
+
+class DifRequest(BaseModel):
+    groups: Dict[int, str]  # talabgor id si -> guruh (hudud, jins, til ...)
+    reference: Optional[str] = None  # tayanch guruh, berilmasa eng katta guruh
 
-# Javob routelari
-@router.post("/responses", response_model=Dict[str, Any])
-def create_response(response: ResponseCreate, db: Session = Depends(get_db)):
-    """Yangi javob qo'shish"""
+@router.put("/tests/{test_id}/scale", response_model=Dict[str, Any])
+def update_test_scale(test_id: int, scale: ScaleUpdate, db: Session = Depends(get_db)):
+    """Test shkalasi (ball = intercept + slope * theta) va daraja chegaralarini o'zgartirish"""
+    test = db.get(Test, test_id)
+    if test is None:
+        raise HTTPException(status_code=404, detail="Test topilmadi")
     try:
-        db_response = Response(
-            student_id=response.student_id,
-            question_id=response.question_id,
-            answer=response.answer
-        )
-        db.add(db_response)
-        db.commit()
-        db.refresh(db_response)
-        
-        return {
-            "success": True,
-            "response_id": db_response.id,
-            "message": "Javob muvaffaqiyatli qo'shildi"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        RaschService(scale.scale_slope, scale.scale_intercept, scale.grade_cuts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    test.scale_slope = scale.scale_slope
+    test.scale_intercept = scale.scale_intercept
+    test.grade_cuts = json.dumps(scale.grade_cuts)
+    # Saqlangan natijalardagi darajalar eskiradi
+    bump_data_version(db, test_id)
+    db.commit()
+    return {"success": True, "test_id": test_id, **scale.dict(), "message": "Shkala sozlamalari saqlandi"}
 
 # Rasch tahlili routelari
+@router.post("/analyze/batch", response_model=Dict[str, Any])
+def analyze_batch(request: BatchAnalyzeRequest, db: Session = Depends(get_db)):
+    """Bir nechta testni navbatga qo'yish; bootstrap > 0 bo'lsa har bir test uchun
+    savollar qiyinligining bootstrap ishonch oraliqlari hisoblanadi.
+
+    Har bir test alohida vazifa (holati GET /jobs/{job_id} orqali), bootstrap
+    takrorlashlari esa vazifa ichida jarayonlar puliga tarqatiladi.
+    """
+    if not 1 <= len(request.test_ids) <= MAX_BATCH_TESTS:
+        raise HTTPException(status_code=400, detail=f"test_ids 1..{MAX_BATCH_TESTS} ta bo'lishi kerak")
+    if request.mode not in ANALYSIS_MODES:
+        raise HTTPException(status_code=400, detail=f"Noma'lum tahlil rejimi: {request.mode}")
+    if not 0 <= request.bootstrap <= MAX_RESAMPLES:
+        raise HTTPException(status_code=400, detail=f"bootstrap 0..{MAX_RESAMPLES} oralig'ida bo'lishi kerak")
+    if not 0 < request.confidence < 1:
+        raise HTTPException(status_code=400, detail="confidence 0 va 1 orasida bo'lishi kerak")
+
+    jobs = batch_service.submit_tests(db, request.test_ids, request.force, request.mode,
+                                      request.bootstrap, request.confidence, request.seed)
+    return {
+        "success": True,
+        "jobs": jobs,
+        "queued": sum(1 for job in jobs if job["job_id"] is not None),
+        "message": "Testlar tahlil navbatiga qo'yildi"
+    }
+
 @router.post("/analyze/{test_id}", response_model=Dict[str, Any])
-def analyze_test(test_id: int, db: Session = Depends(get_db)):
-    """Test uchun Rasch tahlilini bajarish"""
-    try:
-        # Test ma'lumotlarini olish
-        responses = db.query(Response).join(Question).filter(Question.test_id == test_id).all()
-        
-        if not responses:
-            raise HTTPException(status_code=404, detail="Test uchun javoblar topilmadi")
-        
-        # Javoblarni formatga o'tkazish
-        response_data = [
-            {
-                "student_id": r.student_id,
-                "question_id": r.question_id,
-                "answer": r.answer
-            }
-            for r in responses
-        ]
-        
-        # Rasch tahlilini bajarish
-        results = rasch_service.run_rasch_analysis(
-            rasch_service.prepare_data(response_data)
-        )
-        
+def analyze_test(test_id: int, force: bool = False,
+                 mode: str = Query("full", pattern="^(full|incremental|anchored)$"),
+                 db: Session = Depends(get_db)):
+    """Test uchun Rasch tahlilini navbatga qo'yish (javoblar o'zgarmagan bo'lsa saqlangan natija qaytadi).
+
+    mode=incremental - faqat yangi talabgorlar qo'shilib savollar qayta baholanadi,
+    mode=anchored - yangi talabgorlar saqlangan savol qiyinliklari bo'yicha baholanadi.
+    """
+    test = db.get(Test, test_id)
+    if test is None:
+        raise HTTPException(status_code=404, detail="Test topilmadi")
+
+    run = None if force else results_store.get_current_run(db, test)
+    if run is not None:
         return {
             "success": True,
             "test_id": test_id,
-            "results": results,
-            "message": "Rasch tahlili muvaffaqiyatli bajarildi"
+            "cached": True,
+            "job_id": None,
+            "results": results_store.summary(run),
+            "message": "Saqlangan natija qaytarildi"
         }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        job_id = get_job_queue().submit(run_test_analysis, test_id, force, mode, kind="test_analysis")
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {
+        "success": True,
+        "test_id": test_id,
+        "cached": False,
+        "job_id": job_id,
+        "message": "Rasch tahlili navbatga qo'yildi"
+    }
+
+@router.post("/analyze/{test_id}/dif", response_model=Dict[str, Any])
+def analyze_dif(test_id: int, request: DifRequest, db: Session = Depends(get_db)):
+    """Guruhlar bo'yicha DIF tahlilini navbatga qo'yish (Mantel-Haenszel va guruh qiyinliklari).
+
+    Natijada har bir fokal guruh uchun savollar bo'yicha MH-delta, chi-kvadrat,
+    ETS tasnifi (A/B/C) va qiyinliklar farqi qaytadi.
+    """
+    if db.get(Test, test_id) is None:
+        raise HTTPException(status_code=404, detail="Test topilmadi")
+    labels = {label.strip() for label in request.groups.values() if label.strip()}
+    if len(labels) < 2:
+        raise HTTPException(status_code=400, detail="DIF uchun kamida 2 ta guruh kerak")
+    if request.reference is not None and request.reference.strip() not in labels:
+        raise HTTPException(status_code=400, detail=f"Tayanch guruh topilmadi: {request.reference}")
+
+    try:
+        job_id = get_job_queue().submit(run_dif_analysis, test_id, request.groups,
+                                        request.reference and request.reference.strip(), kind="dif")
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {
+        "success": True,
+        "test_id": test_id,
+        "job_id": job_id,
+        "message": "DIF tahlili navbatga qo'yildi"
+    }
+
+@router.get("/jobs/{job_id}", response_model=Dict[str, Any])
+def get_job(job_id: str):
+    """Tahlil vazifasi holati va tugaganda natijasi.
+
+    Natijadagi talabgorlar bo'yicha uzun massivlar qaytarilmaydi (nomlari
+    'omitted' da); ular /results/{test_id}/students orqali sahifalab olinadi.
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Vazifa topilmadi")
+    if "result" in job:
+        job["result"] = compact_result(job["result"])
+    return json_response({"success": True, **job})
+
+@router.post("/score/{test_id}", response_model=Dict[str, Any])
+def score_test(test_id: int, request: ScoreRequest, db: Session = Depends(get_db)):
+    """Talabgorlarni saqlangan kalibrovka bo'yicha baholash (qayta tahlilsiz, xom ball -> theta jadvali)"""
+    if (request.raw_scores is None) == (request.responses is None):
+        raise HTTPException(status_code=400, detail="raw_scores yoki responses dan bittasini yuboring")
+    responses = None
+    if request.responses is not None:
+        responses = np.array([[np.nan if value is None else value for value in row] for row in request.responses],
+                             dtype=np.float64)
+        if responses.ndim != 2:
+            raise HTTPException(status_code=400, detail="responses qatorlari bir xil uzunlikda bo'lishi kerak")
+    try:
+        scores = score_candidates(db, test_id, request.raw_scores, responses)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if scores is None:
+        raise HTTPException(status_code=404, detail="Test kalibrlanmagan, avval /analyze ni bajaring")
+    return {"success": True, "test_id": test_id, **to_builtin(scores)}
+
+def _latest_run(db: Session, test_id: int):
+    test = db.get(Test, test_id)
+    run = results_store.latest_run(db, test_id) if test is not None else None
+    if run is None:
+        raise HTTPException(status_code=404, detail="Natijalar topilmadi, avval /analyze ni bajaring")
+    return test, run
 
 @router.get("/results/{test_id}", response_model=Dict[str, Any])
 def get_test_results(test_id: int, db: Session = Depends(get_db)):
-    """Test natijalarini olish"""
-    try:
-        # Bu yerda natijalarni olish logikasi
-        # Hozircha oddiy struktura qaytaraman
-        
-        return {
-            "success": True,
-            "test_id": test_id,
-            "results": {
-                "total_students": 25,
-                "average_score": 65.4,
-                "grade_distribution": {
-                    "A+": 3,
-                    "A": 8,
-                    "B+": 7,
-                    "B": 4,
-                    "C+": 2,
-                    "C": 1
-                }
-            }
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    """Test natijalarini olish (saqlangan oxirgi tahlildan, qayta hisoblamasdan)"""
+    test, run = _latest_run(db, test_id)
+    return {
+        "success": True,
+        "test_id": test_id,
+        # Tahlildan keyin yangi javoblar kelgan bo'lsa natija eskirgan
+        "stale": run.data_version != test.data_version,
+        "results": results_store.summary(run)
+    }
+
+@router.get("/results/{test_id}/students", response_model=Dict[str, Any])
+def get_student_results(test_id: int, after: Optional[int] = None,
+                        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        format: str = Query("json", pattern="^(json|npy|arrow)$"),
+                        db: Session = Depends(get_db)):
+    """Talabgorlar bo'yicha saqlangan theta baholari.
+
+    json - student_id tartibida sahifalab: keyingi sahifa uchun after=next_after.
+    npy / arrow - tahlilning barcha talabgorlari ustunlar ko'rinishida oqim
+    sifatida (.npy yozuvli massiv yoki Arrow IPC oqimi); after/limit hisobga olinmaydi.
+    """
+    test, run = _latest_run(db, test_id)
+    if format != "json":
+        try:
+            chunks = array_stream(results_store.person_columns(db, run), format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        filename = f"rasch_test_{test_id}_run_{run.id}_students.{format}"
+        return StreamingResponse(chunks, media_type=ARRAY_MEDIA_TYPES[format],
+                                 headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+    students = results_store.person_results(db, run, after=after, limit=limit)
+    return json_response({
+        "success": True,
+        "test_id": test_id,
+        "run_id": run.id,
+        "total": results_store.person_count(db, run),
+        "students": students,
+        "next_after": students[-1]["student_id"] if len(students) == limit else None,
+    })
+
+@router.get("/results/{test_id}/questions", response_model=Dict[str, Any])
+def get_question_results(test_id: int, db: Session = Depends(get_db)):
+    """Savollar bo'yicha saqlangan qiyinlik baholari"""
+    test, run = _latest_run(db, test_id)
+    return {
+        "success": True,
+        "test_id": test_id,
+        "run_id": run.id,
+        "questions": results_store.item_results(db, run)
+    }
+
+@router.get("/results/{test_id}/wright-map")
+def get_wright_map(test_id: int, format: str = Query("png", pattern="^(png|svg)$"), db: Session = Depends(get_db)):
+    """Saqlangan tahlil bo'yicha Rayt xaritasi (tahlil versiyasi bo'yicha keshlanadi)"""
+    test, run = _latest_run(db, test_id)
+
+    def build() -> bytes:
+        abilities, weights, difficulties = results_store.measures(db, run)
+        return RaschService().create_wright_map(difficulties, abilities, weights, format)
+
+    path = cached_wright_map(f"test_{test_id}_run_{run.id}_v{run.data_version}", format, build,
+                             prefix=f"test_{test_id}_")
+    return FileResponse(path, media_type=MEDIA_TYPES[format])
+
+@router.get("/results/{test_id}/report")
+def get_report(test_id: int, format: str = Query("xlsx", pattern="^(xlsx|pdf)$"), part: int = Query(1, ge=1),
+               db: Session = Depends(get_db)):
+    """Talabgorlar (theta, ball, daraja) va savollar statistikasi hisoboti, oqim sifatida uzatiladi.
+
+    Katta kogortalar PDF hisoboti qismlarga bo'linadi (part, X-Report-Parts sarlavhasi).
+    """
+    test, run = _latest_run(db, test_id)
+    parts = report_service.report_parts(run, format)
+    if part > parts:
+        raise HTTPException(status_code=400, detail=f"Hisobot {parts} qismdan iborat")
+    filename = f"rasch_test_{test_id}_run_{run.id}" + (f"_part{part}of{parts}" if parts > 1 else "") + f".{format}"
+    return StreamingResponse(
+        report_service.stream_report(test_id, run.id, format, part),
+        media_type=REPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Report-Parts": str(parts)},
+    )
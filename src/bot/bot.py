@@ -1,7 +1,12 @@
+import asyncio
+import io
 import os
-import pandas as pd
+import tempfile
+import time
+from functools import wraps
+import numpy as np
 from loguru import logger
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 from telegram import Update
 from telegram.ext import (
@@ -13,7 +18,21 @@ from telegram.ext import (
     filters,
 )
 
+from src.bot.config import BOT_PORT, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_URL
+from src.models.database import SessionLocal, Test
+from src.services.analysis_tasks import run_session_analysis
+from src.services.job_queue import QueueFullError, get_job_queue
 from src.services.rasch_service import RaschService
+from src.services.report_service import REPORT_FORMATS, ReportService
+from src.services.response_matrix import ResponseMatrix
+from src.services.results_store import ResultsStore
+from src.services.scoring import score_candidates
+from src.services.session_store import get_session_store
+from src.services.upload_parser import UPLOAD_FORMATS, parse_upload
+from src.utils.metrics import BOT_ERRORS, BOT_LATENCY
+
+# Telegram Bot API bot orqali 20 MB dan katta fayllarni yuklab bermaydi
+MAX_DOCUMENT_BYTES = 20 << 20
 
 
 class RaschBot:
@@ -23,36 +42,74 @@ class RaschBot:
             raise ValueError("TELEGRAM_TOKEN environment variable topilmadi")
 
         self.application = Application.builder().token(self.token).build()
-        self.rasch_service = RaschService()
         self._register_handlers()
 
     def _register_handlers(self) -> None:
-        self.application.add_handler(CommandHandler("start", self.start_command))
-        self.application.add_handler(CommandHandler("analyze", self.analyze_command))
-        self.application.add_handler(CommandHandler("help", self.help_command))
-        self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
-        self.application.add_handler(CallbackQueryHandler(self.button_callback))
+        timed = self._timed
+        self.application.add_handler(CommandHandler("start", timed("start", self.start_command)))
+        self.application.add_handler(CommandHandler("analyze", timed("analyze", self.analyze_command)))
+        self.application.add_handler(CommandHandler("score", timed("score", self.score_command)))
+        self.application.add_handler(CommandHandler("report", timed("report", self.report_command)))
+        self.application.add_handler(CommandHandler("help", timed("help", self.help_command)))
+        self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND,
+                                                    timed("message", self.handle_message)))
+        self.application.add_handler(MessageHandler(filters.Document.ALL, timed("document", self.handle_document)))
+        self.application.add_handler(CallbackQueryHandler(timed("callback", self.button_callback)))
+
+    @staticmethod
+    def _timed(name: str, handler):
+        """Handler davomiyligi va xatolarini /metrics ga yozish"""
+        @wraps(handler)
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+            started = time.perf_counter()
+            try:
+                return await handler(update, context)
+            except Exception:
+                BOT_ERRORS.inc(handler=name)
+                raise
+            finally:
+                BOT_LATENCY.observe(time.perf_counter() - started, handler=name)
+        return wrapper
 
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         text = (
             "🎓 Rasch Modeli Botiga xush kelibsiz!\n\n"
-            "Bu bot 0/1 matritsa asosida 1-bosqichda ball hisoblab beradi.\n\n"
+            "Bu bot 0/1 matritsa asosida 1PL Rasch modeli bo'yicha baholaydi.\n\n"
             "📋 Ma'lumotlar formati:\n"
-            "Ism,0,1,0,1,0 yoki\nIsm\t0\t1\t0\t1\t0\n\n"
-            "1) Matritsani yuboring\n2) /analyze ni bosing\n"
+            "Ism,0,1,0,1,0 yoki\nIsm\t0\t1\t0\t1\t0\n"
+            "Katta matritsani CSV, XLSX yoki ZIP fayl sifatida yuboring.\n\n"
+            "1) Matritsani yuboring\n2) /analyze ni bosing\n\n"
+            "Kalibrlangan test bo'yicha baholash: /score <test_id> <ball yoki javoblar>\n"
         )
         await update.message.reply_text(text)
 
     async def analyze_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        if "data_matrix" not in context.user_data:
+        # Bot qayta ishga tushgan bo'lsa kalit foydalanuvchi ID sidan tiklanadi
+        session_key = context.user_data.get("session") or str(update.effective_user.id)
+        if not await asyncio.to_thread(get_session_store().exists, session_key):
             await update.message.reply_text("❌ Avval matritsani yuboring!")
             return
 
-        await update.message.reply_text("🔬 Tahlil bajarilmoqda...")
         try:
-            df: pd.DataFrame = context.user_data["data_matrix"]
-            results: Dict = self.rasch_service.analyze_matrix(df)
+            # Matritsa ishchi jarayonda saqlagichdan o'qiladi, bot xotirasiga yuklanmaydi
+            job_id = get_job_queue().submit(run_session_analysis, session_key, kind="bot_analysis")
+        except QueueFullError as exc:
+            await update.message.reply_text(f"⏳ {exc}")
+            return
+
+        await update.message.reply_text("🔬 Tahlil navbatga qo'yildi, natija tayyor bo'lganda yuboriladi...")
+        # Event loop bloklanmaydi: natija kelganda alohida vazifa javob yuboradi
+        context.application.create_task(self._deliver_results(update, job_id))
+
+    async def _deliver_results(self, update: Update, job_id: str) -> None:
+        try:
+            results: Dict = await asyncio.wrap_future(get_job_queue().future(job_id))
             await self._send_results(update, results)
+            # Xarita tayyor baholardan chiziladi, tahlil qayta bajarilmaydi
+            image = await asyncio.to_thread(
+                RaschService().create_wright_map, results["question_difficulties"], results["student_abilities"]
+            )
+            await update.message.reply_photo(photo=image, caption="🗺 Rayt xaritasi")
         except Exception as exc:
             logger.exception("Analyze failed")
             await update.message.reply_text(f"❌ Xatolik: {exc}")
@@ -62,11 +119,18 @@ class RaschBot:
             "📊 Natijalar",
             f"👥 Jami talabgor: {results['total_students']}",
             f"📝 Jami savol: {results['total_questions']}",
-            f"📈 O'rtacha ball: {results['avg_ability']:.2f}",
+            f"📈 O'rtacha qobiliyat (logit): {results['avg_ability']:.2f}",
             f"⬆️ Eng yuqori: {results['max_ability']:.2f}",
             f"⬇️ Eng past: {results['min_ability']:.2f}",
+            f"🎯 O'rtacha qiyinlik (logit): {results['avg_difficulty']:.2f}",
             f"🧪 Ishonchlilik (alpha): {results['reliability']:.3f}",
         ]
+        model_fit = results.get("model_fit")
+        if isinstance(model_fit, dict) and model_fit.get("person_separation") is not None:
+            lines.append(
+                f"📏 Talabgorlar ajratilishi: {model_fit['person_separation']:.2f} "
+                f"(ishonchlilik {model_fit['person_reliability']:.3f})"
+            )
         lines.append("\n🏆 Sertifikat darajalari:")
         for grade, count in results["grade_distribution"].items():
             lines.append(f"- {grade}: {count} ta")
@@ -79,40 +143,151 @@ class RaschBot:
                 top.append(f"{i}. {name}: {score:.2f}")
             await update.message.reply_text("\n".join(top))
 
+    async def score_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """/score <test_id> <xom ball yoki 0/1 javoblar> - kalibrlangan test bo'yicha darhol baholash"""
+        args = context.args or []
+        if len(args) < 2 or not args[0].isdigit():
+            await update.message.reply_text("Namuna: /score 12 17 yoki /score 12 1,0,1,1,0")
+            return
+
+        test_id = int(args[0])
+        try:
+            if len(args) == 2 and "," not in args[1]:
+                # Bitta son - xom ball
+                scores = await asyncio.to_thread(self._score, test_id, [int(args[1])], None)
+            else:
+                # Vergul yoki probel bilan ajratilgan javoblar, 0/1 dan boshqasi - javob yo'q
+                answers = [x.strip() for x in ",".join(args[1:]).split(",") if x.strip()]
+                values = np.array([[float(x) if x in ("0", "1") else np.nan for x in answers]])
+                scores = await asyncio.to_thread(self._score, test_id, None, values)
+        except ValueError as exc:
+            await update.message.reply_text(f"❌ {exc}")
+            return
+
+        if scores is None:
+            await update.message.reply_text("❌ Test kalibrlanmagan (avval API orqali tahlil qiling)")
+            return
+        await update.message.reply_text(
+            f"🎯 Xom ball: {int(scores['raw_scores'][0])}\n"
+            f"📈 Theta (logit): {scores['theta'][0]:.2f} ± {scores['theta_se'][0]:.2f}\n"
+            f"📊 Ball: {scores['scaled_scores'][0]:.1f}, daraja: {scores['grades'][0]}"
+        )
+
+    @staticmethod
+    def _score(test_id: int, raw_scores, responses) -> Optional[Dict]:
+        db = SessionLocal()
+        try:
+            return score_candidates(db, test_id, raw_scores, responses)
+        finally:
+            db.close()
+
+    async def report_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """/report <test_id> [pdf|xlsx] [qism] - saqlangan tahlil hisobotini fayl sifatida yuborish"""
+        args = context.args or []
+        report_format = args[1].lower() if len(args) > 1 else "pdf"
+        part = args[2] if len(args) > 2 else "1"
+        if not args or not args[0].isdigit() or report_format not in REPORT_FORMATS or not part.isdigit():
+            await update.message.reply_text("Namuna: /report 12 pdf, /report 12 pdf 2 yoki /report 12 xlsx")
+            return
+
+        test_id = int(args[0])
+        await update.message.reply_text("📄 Hisobot tayyorlanmoqda...")
+        # Hisobot alohida oqimda diskka yoziladi, event loop bloklanmaydi
+        try:
+            built = await asyncio.to_thread(self._build_report, test_id, report_format, int(part))
+        except ValueError as exc:
+            await update.message.reply_text(f"❌ {exc}")
+            return
+        if built is None:
+            await update.message.reply_text("❌ Test natijalari topilmadi (avval tahlil qiling)")
+            return
+        path, parts = built
+        suffix = f"_{part}of{parts}" if parts > 1 else ""
+        try:
+            with open(path, "rb") as file:
+                await update.message.reply_document(document=file,
+                                                    filename=f"rasch_test_{test_id}{suffix}.{report_format}")
+        finally:
+            os.unlink(path)
+        if parts > 1 and int(part) < parts:
+            await update.message.reply_text(f"Hisobot {parts} qismdan iborat. Keyingisi: "
+                                            f"/report {test_id} {report_format} {int(part) + 1}")
+
+    @staticmethod
+    def _build_report(test_id: int, report_format: str, part: int = 1) -> Optional[Tuple[str, int]]:
+        db = SessionLocal()
+        try:
+            test = db.get(Test, test_id)
+            run = ResultsStore().latest_run(db, test_id) if test is not None else None
+            if run is None:
+                return None
+            service = ReportService()
+            with tempfile.NamedTemporaryFile(suffix=f".{report_format}", delete=False) as file:
+                try:
+                    service.write_report(db, test, run, report_format, file, part)
+                except ValueError:
+                    file.close()
+                    os.unlink(file.name)
+                    raise
+            return file.name, service.report_parts(run, report_format)
+        finally:
+            db.close()
+
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         text = (update.message.text or "").strip()
         if not text:
             await update.message.reply_text("Matn yuboring.")
             return
+        await self._accept_matrix(update, context, text.encode("utf-8"), "message.txt")
 
+    async def handle_document(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """CSV/XLSX/ZIP fayl ko'rinishidagi matritsani qabul qilish"""
+        document = update.message.document
+        filename = document.file_name or ""
+        extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+        if extension not in UPLOAD_FORMATS:
+            await update.message.reply_text("❌ CSV, XLSX yoki ZIP fayl yuboring.")
+            return
+        if document.file_size and document.file_size > MAX_DOCUMENT_BYTES:
+            await update.message.reply_text("❌ Fayl 20 MB dan katta. API orqali yuklang: POST /api/tests/{id}/responses/bulk")
+            return
+
+        telegram_file = await document.get_file()
+        data = await telegram_file.download_as_bytearray()
+        await self._accept_matrix(update, context, bytes(data), filename)
+
+    async def _accept_matrix(self, update: Update, context: ContextTypes.DEFAULT_TYPE, data: bytes,
+                             filename: str) -> None:
         try:
-            lines = [ln for ln in text.splitlines() if ln.strip()]
-            data = []
-            for line in lines:
-                row = [cell.strip() for cell in (line.split("\t") if "\t" in line else line.split(","))]
-                if not row:
-                    continue
-                name = row[0]
-                answers = [int(x) for x in row[1:] if x in ("0", "1")]
-                if answers:
-                    data.append([name] + answers)
-
-            if not data:
-                await update.message.reply_text("❌ Formatda xato. Namuna: Ism,1,0,1,0")
-                return
-
-            df = pd.DataFrame(data)
-            df.columns = ["student_name"] + [f"q{i+1}" for i in range(len(df.columns) - 1)]
-            context.user_data["data_matrix"] = df
-            await update.message.reply_text(
-                f"✅ Qabul qilindi. Talabgorlar: {len(df)}, Savollar: {len(df.columns) - 1}. /analyze ni bosing."
-            )
+            # O'qish alohida oqimda, event loop bloklanmaydi
+            parsed = await asyncio.to_thread(parse_upload, io.BytesIO(data), filename)
+        except ValueError as exc:
+            await update.message.reply_text(f"❌ Formatda xato: {exc}\nNamuna: Ism,1,0,1,0")
+            return
         except Exception as exc:
             logger.exception("Parse error")
             await update.message.reply_text(f"❌ Parse xatosi: {exc}")
+            return
+
+        matrix: ResponseMatrix = parsed["matrix"]
+        # user_data da faqat kalit saqlanadi, matritsa - sessiya saqlagichida
+        session_key = str(update.effective_user.id)
+        await asyncio.to_thread(get_session_store().save, session_key, matrix)
+        context.user_data["session"] = session_key
+        lines = [f"✅ Qabul qilindi. Talabgorlar: {matrix.n_persons}, Savollar: {matrix.n_items}. /analyze ni bosing."]
+        if parsed["malformed_count"]:
+            lines.append(f"\n⚠️ {parsed['malformed_count']} ta qatorda xato (0/1 bo'lmagan kataklar javob yo'q deb olindi):")
+            lines += [f"- {line}-qator: {reason}" for line, reason in parsed["malformed_rows"]]
+            if parsed["malformed_count"] > len(parsed["malformed_rows"]):
+                lines.append("...")
+        await update.message.reply_text("\n".join(lines))
 
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        await update.message.reply_text("Matritsa yuboring va /analyze ni bosing.")
+        await update.message.reply_text(
+            "Matritsani matn yoki CSV/XLSX/ZIP fayl sifatida yuboring va /analyze ni bosing.\n"
+            "/score <test_id> <ball yoki javoblar> - kalibrlangan test bo'yicha baholash.\n"
+            "/report <test_id> [pdf|xlsx] - natijalar hisoboti."
+        )
 
     async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         query = update.callback_query
@@ -120,17 +295,28 @@ class RaschBot:
         await query.edit_message_text("✅ Tanlandi!")
 
     def run(self) -> None:
-        # Thread ichida event loop tayyorlash
-        import asyncio
-        try:
-            asyncio.get_running_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        """Botni alohida jarayon sifatida ishga tushirish.
+
+        WEBHOOK_URL berilsa o'z webhook serverini (BOT_PORT), aks holda
+        polling ni ishlatadi. API ichida webhook rejimi uchun src.bot.webhook.
+        """
         logger.info("Rasch Bot ishga tushmoqda...")
-        self.application.run_polling()
+        if WEBHOOK_URL:
+            self.application.run_webhook(
+                listen="0.0.0.0",
+                port=BOT_PORT,
+                url_path=WEBHOOK_PATH.lstrip("/"),
+                webhook_url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET,
+            )
+        else:
+            self.application.run_polling()
 
 
 def start_bot() -> None:
     bot = RaschBot()
     bot.run()
+
+
+if __name__ == "__main__":
+    start_bot()
@@ -0,0 +1,11 @@
+import os
+from typing import Optional
+
+# Webhook sozlamalari: WEBHOOK_URL - tashqi manzil (masalan https://example.uz),
+# WEBHOOK_SECRET - Telegram X-Telegram-Bot-Api-Secret-Token sarlavhasi.
+# Alohida modulda: API webhook routeri bot (telegram, tahlil moduli) ni
+# import qilmasdan ulanadi
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_SECRET: Optional[str] = os.getenv("WEBHOOK_SECRET") or None
+BOT_PORT = int(os.getenv("BOT_PORT", "8443"))
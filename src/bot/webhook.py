@@ -0,0 +1,85 @@
+import asyncio
+import importlib
+from typing import TYPE_CHECKING, Optional
+from fastapi import APIRouter, HTTPException, Request
+from loguru import logger
+
+from src.bot.config import WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_URL
+
+if TYPE_CHECKING:
+    from src.bot.bot import RaschBot
+
+# API jarayoni ichida uvicorn event loop ida ishlaydigan bot (BOT_MODE=webhook).
+# telegram va tahlil moduli shu yerda import qilinmaydi: API ularsiz ishga tushadi
+router = APIRouter()
+_bot: Optional["RaschBot"] = None
+_startup: Optional[asyncio.Task] = None
+
+
+def schedule_webhook_bot() -> None:
+    """Botni fon vazifasida ishga tushirish: startup kutmaydi, /health darhol javob beradi"""
+    global _startup
+    _startup = asyncio.get_running_loop().create_task(start_webhook_bot())
+
+
+async def start_webhook_bot() -> None:
+    """Bot Application ni joriy event loop da ishga tushirish va webhook ni o'rnatish"""
+    global _bot
+    try:
+        # Og'ir import (telegram, pandas, tahlil moduli) alohida oqimda: event loop band bo'lmaydi
+        bot_module = await asyncio.to_thread(importlib.import_module, "src.bot.bot")
+        bot = bot_module.RaschBot()
+    except ValueError as exc:
+        logger.warning(f"Bot ishga tushirilmadi: {exc}")
+        return
+
+    from telegram import Update
+
+    # Telegram ga ulanib bo'lmasa ham API ishlashda davom etadi
+    try:
+        await bot.application.initialize()
+        await bot.application.start()
+        if WEBHOOK_URL:
+            await bot.application.bot.set_webhook(
+                url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET,
+                allowed_updates=Update.ALL_TYPES,
+            )
+        else:
+            logger.warning("WEBHOOK_URL berilmagan: webhook Telegram da qo'lda o'rnatilishi kerak")
+    except Exception:
+        logger.exception("Bot webhook rejimida ishga tushmadi")
+        return
+    _bot = bot
+    logger.info("Rasch Bot webhook rejimida ishga tushdi")
+
+
+async def stop_webhook_bot() -> None:
+    global _bot, _startup
+    if _startup is not None and not _startup.done():
+        _startup.cancel()
+        try:
+            await _startup
+        except asyncio.CancelledError:
+            pass
+    _startup = None
+    if _bot is None:
+        return
+    await _bot.application.stop()
+    await _bot.application.shutdown()
+    _bot = None
+
+
+@router.post(WEBHOOK_PATH, include_in_schema=False)
+async def telegram_webhook(request: Request):
+    """Telegram yangilanishlarini qabul qilib bot navbatiga qo'yish"""
+    if _bot is None:
+        raise HTTPException(status_code=503, detail="Bot ishga tushmagan")
+    if WEBHOOK_SECRET and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != WEBHOOK_SECRET:
+        raise HTTPException(status_code=403, detail="Noto'g'ri webhook kaliti")
+
+    from telegram import Update
+
+    update = Update.de_json(await request.json(), _bot.application.bot)
+    await _bot.application.update_queue.put(update)
+    return {"ok": True}
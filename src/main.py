@@ -1,11 +1,24 @@
-from fastapi import FastAPI
+import os
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+from fastapi.responses import JSONResponse, Response
 from loguru import logger
+from sqlalchemy import text
 
-from src.api.routes import router as api_router
-from threading import Thread
-from src.bot.bot import start_bot
+from src.models.database import engine
+from src.services.job_queue import queue_status, shutdown_job_queue
+from src.utils.metrics import CONTENT_TYPE, HTTP_LATENCY, HTTP_REQUESTS, REGISTRY
+
+# full - barcha API routelari; ingest - faqat ma'lumot kiritish (testlar, savollar,
+# talabgorlar, javoblar va ommaviy yuklash): tahlil moduli, pandas va bot import qilinmaydi
+APP_MODE = os.getenv("APP_MODE", "full")
+if APP_MODE not in ("full", "ingest"):
+    raise ValueError(f"APP_MODE noto'g'ri: {APP_MODE} (full yoki ingest bo'lishi kerak)")
+
+# webhook - bot shu jarayonda uvicorn event loop ida ishlaydi (har bir worker da),
+# off - faqat API (bot alohida: python -m src.bot.bot)
+BOT_MODE = os.getenv("BOT_MODE", "webhook") if APP_MODE == "full" else "off"
 
 app = FastAPI(title="Rasch Bot API", version="1.0.0")
 
@@ -18,22 +31,75 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def measure_requests(request: Request, call_next):
+    """Har bir so'rov davomiyligi va holat kodi (route shabloni bo'yicha, masalan /api/analyze/{test_id})"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        HTTP_LATENCY.observe(time.perf_counter() - started, method=request.method, route=path)
+        HTTP_REQUESTS.inc(method=request.method, route=path, status=str(status))
+
 # API routelarini qo'shish
+if APP_MODE == "ingest":
+    from src.api.ingestion_routes import router as api_router
+else:
+    from src.api.routes import router as api_router
 app.include_router(api_router, prefix="/api")
 
+if BOT_MODE == "webhook":
+    from src.bot.webhook import router as webhook_router, schedule_webhook_bot, stop_webhook_bot
+    app.include_router(webhook_router)
+
 @app.on_event("startup")
 async def startup_event():
-    logger.info("Rasch Bot API ishga tushmoqda...")
-    # Botni alohida threadda ishga tushirish (API ni bloklamaslik uchun)
-    Thread(target=start_bot, daemon=True).start()
+    logger.info(f"Rasch Bot API ishga tushmoqda (APP_MODE={APP_MODE})...")
+    if BOT_MODE == "webhook":
+        # Bot fonda ishga tushadi: API va /health uni kutmaydi
+        schedule_webhook_bot()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if BOT_MODE == "webhook":
+        await stop_webhook_bot()
+    shutdown_job_queue()
 
 @app.get("/")
 async def root():
     return {"message": "Rasch Bot API ishga tushgan"}
 
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+def health_check():
+    """Tayyorlik tekshiruvi: bazaga ulanish va tahlil navbati to'la emasligi (aks holda 503)"""
+    checks = {}
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        checks["database"] = "ok"
+    except Exception as e:
+        logger.error(f"Health: bazaga ulanib bo'lmadi: {e}")
+        checks["database"] = "error"
+    queue = queue_status()
+    checks["queue"] = "full" if queue["full"] else "ok"
+    healthy = all(value == "ok" for value in checks.values())
+    return JSONResponse(
+        status_code=200 if healthy else 503,
+        content={"status": "healthy" if healthy else "unhealthy", "checks": checks,
+                 "queue_pending": queue["pending"], "queue_max_pending": queue["max_pending"]},
+    )
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus formatidagi metrikalar (shu jarayon va uning navbat ishchilari)"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
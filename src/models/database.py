@@ -1,12 +1,44 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, LargeBinary, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
 import os
 
+from src.utils.metrics import count_query
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./rasch_bot.db")
 
-engine = create_engine(DATABASE_URL)
+# Ulanishlar puli (SQLite da ishlatilmaydi)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+def _engine_options(url: str) -> dict:
+    if url.startswith("sqlite"):
+        # API oqimlari, bot va navbat ishchilari bitta faylni ishlatadi
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL: o'quvchilar yozuvchini kutmaydi (tahlil o'qishi paytida yuklash davom etadi)
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_queries(conn, cursor, statement, parameters, context, executemany):
+    count_query(statement)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -18,15 +50,20 @@ class Test(Base):
     subject = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     teacher_id = Column(Integer)
+    data_version = Column(Integer, nullable=False, default=0)  # Har bir yangi javoblar to'plamida oshadi
+    scale_slope = Column(Float, default=10.0)  # Shkala bali = scale_intercept + scale_slope * theta
+    scale_intercept = Column(Float, default=50.0)
+    grade_cuts = Column(Text)  # JSON: A+, A, B+, B, C+ darajalari quyi chegaralari (bo'lmasa standart)
     
     questions = relationship("Question", back_populates="test")
     students = relationship("Student", back_populates="test")
+    analysis_runs = relationship("AnalysisRun", back_populates="test")
 
 class Question(Base):
     __tablename__ = "questions"
     
     id = Column(Integer, primary_key=True, index=True)
-    test_id = Column(Integer, ForeignKey("tests.id"))
+    test_id = Column(Integer, ForeignKey("tests.id"), index=True)
     question_text = Column(Text, nullable=False)
     correct_answer = Column(Integer)  # 0 yoki 1
     difficulty_b = Column(Float)  # Rasch qiyinlik parametri
@@ -39,22 +76,109 @@ class Student(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    test_id = Column(Integer, ForeignKey("tests.id"))
+    test_id = Column(Integer, ForeignKey("tests.id"), index=True)
     
     test = relationship("Test", back_populates="students")
     responses = relationship("Response", back_populates="student")
 
 class Response(Base):
     __tablename__ = "responses"
+    __table_args__ = (
+        # Bitta talabgor bitta savolga bitta javob; talabgor bo'yicha qidiruvga ham xizmat qiladi
+        Index("uq_responses_student_question", "student_id", "question_id", unique=True),
+        # Test javoblari (va Response.id oralig'i) indeks oralig'ini skanerlash bilan o'qiladi
+        Index("ix_responses_test_id_id", "test_id", "id"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Birlamchi kalit indeksidan tashqari alohida id indeksi yo'q (ommaviy yozuvni sekinlashtiradi)
+    id = Column(Integer, primary_key=True)
+    test_id = Column(Integer, ForeignKey("tests.id"))  # Question.test_id nusxasi (join siz o'qish uchun)
     student_id = Column(Integer, ForeignKey("students.id"))
-    question_id = Column(Integer, ForeignKey("questions.id"))
+    question_id = Column(Integer, ForeignKey("questions.id"), index=True)
     answer = Column(Integer)  # 0 yoki 1
     
     student = relationship("Student", back_populates="responses")
     question = relationship("Question", back_populates="responses")
 
+class AnalysisRun(Base):
+    __tablename__ = "analysis_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    test_id = Column(Integer, ForeignKey("tests.id"), index=True)
+    data_version = Column(Integer, nullable=False)  # Tahlil qilingan Test.data_version
+    created_at = Column(DateTime, default=datetime.utcnow)
+    total_students = Column(Integer)
+    total_questions = Column(Integer)
+    reliability = Column(Float)
+    iterations = Column(Integer)
+    converged = Column(Boolean)
+    summary = Column(Text)  # JSON: o'rtacha qiymatlar, darajalar taqsimoti, top talabgorlar
+    mode = Column(String, default="full")  # full, incremental yoki anchored
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    last_response_id = Column(Integer)  # Tahlilga kirgan eng katta Response.id
+    state = Column(LargeBinary)  # npz: yetarli statistikalar va parametrlar (qo'shimcha baholash uchun)
+    
+    test = relationship("Test", back_populates="analysis_runs")
+    person_estimates = relationship("PersonEstimate", back_populates="run", cascade="all, delete-orphan")
+    item_estimates = relationship("ItemEstimate", back_populates="run", cascade="all, delete-orphan")
+    score_conversions = relationship("ScoreConversion", back_populates="run", cascade="all, delete-orphan")
+
+class PersonEstimate(Base):
+    __tablename__ = "person_estimates"
+    __table_args__ = (
+        Index("ix_person_estimates_group", "run_id", "pattern", "raw_score"),
+        Index("ix_person_estimates_run_student", "run_id", "student_id"),  # Natijalarni sahifalash
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("analysis_runs.id"), index=True)
+    student_id = Column(Integer, ForeignKey("students.id"))
+    raw_score = Column(Integer)
+    pattern = Column(LargeBinary, default=b"")  # Javob berilgan savollar bitlar maskasi (to'liq - b"")
+    theta = Column(Float)  # Rasch qobiliyat parametri (logit)
+    theta_se = Column(Float)
+    scaled_score = Column(Float)  # Test shkalasidagi ball
+    grade = Column(String)  # Sertifikat darajasi
+    infit_mnsq = Column(Float)  # Moslik statistikalari (fit_statistics)
+    infit_zstd = Column(Float)
+    outfit_mnsq = Column(Float)
+    outfit_zstd = Column(Float)
+    
+    run = relationship("AnalysisRun", back_populates="person_estimates")
+
+class ItemEstimate(Base):
+    __tablename__ = "item_estimates"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("analysis_runs.id"), index=True)
+    question_id = Column(Integer, ForeignKey("questions.id"))
+    difficulty_b = Column(Float)
+    difficulty_se = Column(Float)
+    infit_mnsq = Column(Float)  # Moslik statistikalari (fit_statistics)
+    infit_zstd = Column(Float)
+    outfit_mnsq = Column(Float)
+    outfit_zstd = Column(Float)
+    
+    run = relationship("AnalysisRun", back_populates="item_estimates")
+
+class ScoreConversion(Base):
+    __tablename__ = "score_conversions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("analysis_runs.id"), index=True)
+    raw_score = Column(Integer)  # To'liq javob bergan talabgor xom balli
+    theta = Column(Float)
+    theta_se = Column(Float)
+    
+    run = relationship("AnalysisRun", back_populates="score_conversions")
+
+class BotSession(Base):
+    __tablename__ = "bot_sessions"
+    
+    key = Column(String, primary_key=True)  # Telegram foydalanuvchi ID si
+    data = Column(LargeBinary, nullable=False)  # ResponseMatrix.to_bytes()
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -0,0 +1,133 @@
+import numpy as np
+from typing import Dict, Optional
+from loguru import logger
+
+from src.models.database import AnalysisRun, SessionLocal, Test
+from src.services.data_loader import latest_response_id, load_response_matrix
+from src.services.job_queue import report_progress
+from src.services.rasch_service import RaschService
+from src.services.response_matrix import ResponseMatrix
+from src.services.results_store import ResultsStore
+from src.services.session_store import get_session_store
+from src.utils.metrics import stage_timer
+from src.utils.serialization import to_builtin
+
+# Navbat ishchilarida bajariladigan vazifalar (modul darajasida - pickle uchun)
+
+# full - to'liq qayta baholash, incremental - yangi talabgorlar qo'shilib savollar
+# iliq startdan qayta baholanadi, anchored - yangi talabgorlar saqlangan qiyinliklar bo'yicha
+ANALYSIS_MODES = ("full", "incremental", "anchored")
+
+
+def run_test_analysis(test_id: int, force: bool = False, mode: str = "full") -> Dict:
+    """Test javoblarini bazadan yuklab tahlil qilish va natijani saqlash.
+
+    incremental/anchored rejimlarda oldingi tahlildan keyin kelgan javoblar
+    yuklanadi; buning iloji bo'lmasa (holat saqlanmagan, savollar o'zgargan,
+    mavjud talabgorga javob qo'shilgan) to'liq tahlil bajariladi.
+    """
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Noma'lum tahlil rejimi: {mode}")
+    results_store = ResultsStore()
+    db = SessionLocal()
+    try:
+        test = db.get(Test, test_id)
+        if test is None:
+            raise ValueError("Test topilmadi")
+
+        run = None if force else results_store.get_current_run(db, test)
+        if run is None:
+            data_version = test.data_version
+            last_response_id = latest_response_id(db, test_id)
+
+            if mode != "full":
+                previous = results_store.latest_run(db, test_id)
+                if previous is not None:
+                    run = _update_run(db, results_store, previous, test, data_version, last_response_id, mode)
+
+        if run is None:
+            report_progress(0.1, "load")
+            with stage_timer("load"):
+                matrix = load_response_matrix(db, test_id, upto_response_id=last_response_id)
+            if matrix is None:
+                raise ValueError("Test uchun javoblar topilmadi")
+
+            report_progress(0.4, "estimate")
+            results = RaschService.for_test(test).analyze_matrix(matrix)
+
+            report_progress(0.8, "save")
+            run = results_store.save_run(db, test_id, data_version, matrix, results, last_response_id)
+
+        return to_builtin(results_store.summary(run))
+    finally:
+        db.close()
+
+
+def _update_run(db, results_store: ResultsStore, previous: AnalysisRun, test: Test, data_version: int,
+                last_response_id: Optional[int], mode: str) -> Optional[AnalysisRun]:
+    """Oldingi tahlilga yangi javoblarni qo'shish (imkoni bo'lmasa None - to'liq tahlil kerak)"""
+    test_id = test.id
+    state = results_store.load_state(previous)
+    if state is None or previous.last_response_id is None or last_response_id is None:
+        return None
+
+    report_progress(0.1, "load")
+    with stage_timer("load"):
+        matrix = load_response_matrix(db, test_id, after_response_id=previous.last_response_id,
+                                      upto_response_id=last_response_id)
+    if matrix is None:
+        # Versiya o'zgargan, lekin yangi javob yo'q (masalan, javoblar o'chirilgan)
+        logger.info(f"Test {test_id}: yangi javoblar yo'q, to'liq tahlil bajariladi")
+        return None
+    if not np.array_equal(matrix.question_ids, state['question_ids']):
+        logger.info(f"Test {test_id}: savollar o'zgargan, to'liq tahlil bajariladi")
+        return None
+    if results_store.has_persons(db, previous, matrix.student_ids):
+        logger.info(f"Test {test_id}: mavjud talabgorlarga javob qo'shilgan, to'liq tahlil bajariladi")
+        return None
+
+    report_progress(0.4, "estimate")
+    results = RaschService.for_test(test).update_analysis(state, matrix, anchored=mode == "anchored")
+
+    report_progress(0.8, "save")
+    return results_store.update_run(db, previous, data_version, last_response_id, matrix, results, mode)
+
+
+def run_matrix_analysis(matrix: ResponseMatrix) -> Dict:
+    """Bot yuborgan matritsani tahlil qilish"""
+    report_progress(0.2, "estimate")
+    return RaschService().analyze_matrix(matrix)
+
+
+def run_session_analysis(session_key: str) -> Dict:
+    """Sessiya saqlagichidagi matritsani ishchi jarayonda o'qib tahlil qilish"""
+    with stage_timer("load"):
+        matrix = get_session_store().load(session_key)
+    if matrix is None:
+        raise ValueError("Matritsa topilmadi yoki muddati o'tgan, qaytadan yuboring")
+    return run_matrix_analysis(matrix)
+
+
+def run_dif_analysis(test_id: int, student_groups: Dict[int, str], reference: Optional[str] = None) -> Dict:
+    """Test javoblari bo'yicha DIF tahlili; student_groups - talabgor id si -> guruh nomi.
+
+    Guruhi berilmagan talabgorlar umumiy kalibrovkaga kiradi, lekin
+    guruhlar solishtiruvida qatnashmaydi.
+    """
+    db = SessionLocal()
+    try:
+        test = db.get(Test, test_id)
+        if test is None:
+            raise ValueError("Test topilmadi")
+        report_progress(0.1, "load")
+        with stage_timer("load"):
+            matrix = load_response_matrix(db, test_id)
+        if matrix is None:
+            raise ValueError("Test uchun javoblar topilmadi")
+    finally:
+        db.close()
+
+    report_progress(0.4, "dif")
+    labels = [student_groups.get(int(student_id)) for student_id in matrix.student_ids]
+    result = RaschService.for_test(test).analyze_dif(matrix, labels, reference)
+    return to_builtin({'test_id': test_id, 'total_students': matrix.n_persons, **result})
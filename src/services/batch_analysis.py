@@ -0,0 +1,248 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+
+from src.models.database import SessionLocal, Test
+from src.services.analysis_tasks import run_test_analysis
+from src.services.data_loader import load_response_matrix
+from src.services.estimation import estimate_from_statistics
+from src.services.job_queue import MAX_WORKERS, QueueFullError, get_job_queue, report_progress
+from src.services.response_matrix import ResponseMatrix
+from src.services.results_store import ResultsStore
+from src.utils.serialization import to_builtin
+
+# Bootstrap jarayonlari soni va bitta vazifadagi takrorlashlar. Bootstrap navbat ishchisi ichida
+# ishlaydi: standart qiymat yadrolarni ANALYSIS_WORKERS ta parallel vazifa orasida bo'ladi
+BOOTSTRAP_WORKERS = int(os.getenv("BOOTSTRAP_WORKERS") or max(1, (os.cpu_count() or 1) // MAX_WORKERS))
+BOOTSTRAP_CHUNK = 8
+MAX_RESAMPLES = 2000
+
+# Memmap fayllar papkasi (masalan RAM dagi /dev/shm), bo'lmasa tizim vaqtinchalik papkasi
+BOOTSTRAP_TMPDIR = os.getenv("BOOTSTRAP_TMPDIR") or None
+
+# Takrorlash og'irliklari shu qatorlar bo'laklarida matritsaga ko'paytiriladi
+WEIGHT_CHUNK_ROWS = 65536
+
+
+def _write_arrays(directory: str, matrix: ResponseMatrix, groups: Dict) -> Dict[str, Optional[str]]:
+    """Javoblar, kuzatilgan maska, guruh indeksi va guruhlar maskasini .npy fayllarga bo'laklab yozish"""
+    paths = {
+        'answers': os.path.join(directory, "answers.npy"),
+        'observed': os.path.join(directory, "observed.npy") if matrix.missing is not None else None,
+        'inverse': os.path.join(directory, "inverse.npy"),
+        'group_observed': os.path.join(directory, "group_observed.npy") if groups['observed'] is not None else None,
+    }
+    np.save(paths['inverse'], groups['inverse'])
+    if paths['group_observed']:
+        np.save(paths['group_observed'], groups['observed'])
+    shape = (matrix.n_persons, matrix.n_items)
+    answers = np.lib.format.open_memmap(paths['answers'], mode="w+", dtype=np.uint8, shape=shape)
+    observed = (np.lib.format.open_memmap(paths['observed'], mode="w+", dtype=np.uint8, shape=shape)
+                if paths['observed'] else None)
+    for rows, block, mask in matrix.iter_chunks():
+        answers[rows] = block
+        if observed is not None:
+            observed[rows] = mask
+    answers.flush()
+    del answers
+    if observed is not None:
+        observed.flush()
+        del observed
+    return paths
+
+
+def _bootstrap_chunk(paths: Dict[str, Optional[str]], scores: np.ndarray, point: Dict,
+                     seeds: List[np.random.SeedSequence]) -> np.ndarray:
+    """Ishchi jarayonda bir nechta bootstrap takrorlashini baholash.
+
+    Talabgorlarni qaytarib tanlash har bir talabgorga multinomial og'irlik
+    berish bilan teng: savol marginallari W @ X, guruh sonlari esa
+    og'irliklarning guruhlar bo'yicha yig'indisi. Matritsa va guruhlar
+    maskasi memmap orqali o'qiladi, jarayonlar orasida nusxalanmaydi.
+    point - to'liq ma'lumotdagi baho ('b', guruhlar 'theta'si), har bir
+    takrorlash undan iliq start qiladi.
+    """
+    answers = np.load(paths['answers'], mmap_mode="r")
+    observed = np.load(paths['observed'], mmap_mode="r") if paths['observed'] else None
+    inverse = np.load(paths['inverse'], mmap_mode="r")
+    group_observed = np.load(paths['group_observed'], mmap_mode="r") if paths['group_observed'] else None
+    n_persons, n_items = answers.shape
+
+    # Har bir talabgor necha marta tanlangani (multinomial og'irlik)
+    weights = np.stack([
+        np.bincount(np.random.default_rng(seed).integers(0, n_persons, n_persons), minlength=n_persons)
+        for seed in seeds
+    ]).astype(np.float32)
+    item_scores = np.zeros((len(seeds), n_items))
+    item_counts = np.zeros((len(seeds), n_items))
+    for start in range(0, n_persons, WEIGHT_CHUNK_ROWS):
+        rows = slice(start, start + WEIGHT_CHUNK_ROWS)
+        item_scores += weights[:, rows] @ answers[rows].astype(np.float32)
+        if observed is not None:
+            item_counts += weights[:, rows] @ observed[rows].astype(np.float32)
+    if observed is None:
+        item_counts[:] = n_persons
+
+    difficulties = np.full((len(seeds), n_items), np.nan)
+    for index in range(len(seeds)):
+        counts = np.bincount(inverse, weights=weights[index], minlength=scores.size)
+        drawn = counts > 0
+        resample = {
+            'scores': scores[drawn],
+            'counts': np.rint(counts[drawn]).astype(np.int64),
+            'observed': None if group_observed is None else group_observed[drawn],
+            'item_scores': np.rint(item_scores[index]).astype(np.int64),
+            'item_counts': np.rint(item_counts[index]).astype(np.int64),
+            'n_persons': n_persons,
+            'n_items': n_items,
+        }
+        try:
+            difficulties[index] = estimate_from_statistics(resample, initial_b=point['b'],
+                                                           initial_theta=point['theta'][drawn])['b']
+        except ValueError:
+            # Takrorlashda ekstremal bo'lmagan javoblar qolmagan
+            pass
+    return difficulties
+
+
+def bootstrap_difficulties(matrix: ResponseMatrix, n_resamples: int, confidence: float = 0.95,
+                           seed: Optional[int] = None, workers: int = BOOTSTRAP_WORKERS) -> Dict:
+    """Savollar qiyinligi uchun talabgorlar bo'yicha bootstrap ishonch oraliqlari.
+
+    Takrorlashlar BOOTSTRAP_CHUNK talik vazifalarga bo'linib jarayonlar
+    puliga tarqatiladi; matritsa bir marta .npy fayllarga yoziladi va
+    ishchilarda memmap bilan ochiladi. Tasodifiy sonlar har bir
+    takrorlash uchun SeedSequence dan olinadi, shuning uchun natija ishchilar
+    soniga bog'liq emas. Xato yoki vaqt tugashida navbatdagi bo'laklar
+    bekor qilinadi.
+
+    Narx guruhlar soniga bog'liq: to'liq javoblarda guruhlar xom ballar
+    (savollar soni + 1 ta), yo'q javoblar bo'lsa esa deyarli har bir
+    talabgor alohida guruh, va har bir Newton iteratsiyasi O(talabgorlar x
+    savollar) bo'ladi. 200k x 100 matritsada 5% yo'q javob bilan 32
+    takrorlash to'liq matritsadagidan yuzlab marta sekinroq (daqiqalar va
+    0.6 s). Shuning uchun har bir takrorlash asosiy bahodan
+    (b va guruhlar theta si) iliq start qiladi, bu iteratsiyalarni taxminan
+    ikki baravar kamaytiradi.
+    """
+    if not 1 <= n_resamples <= MAX_RESAMPLES:
+        raise ValueError(f"Bootstrap takrorlashlar soni 1..{MAX_RESAMPLES} oralig'ida bo'lishi kerak")
+    if not 0 < confidence < 1:
+        raise ValueError("Ishonch darajasi 0 va 1 orasida bo'lishi kerak")
+
+    groups = matrix.score_groups()
+    estimate = estimate_from_statistics(groups)
+    point = {'b': estimate['b'], 'theta': estimate['theta']}
+    seeds = np.random.SeedSequence(seed).spawn(n_resamples)
+    chunks = [seeds[start:start + BOOTSTRAP_CHUNK] for start in range(0, n_resamples, BOOTSTRAP_CHUNK)]
+
+    with tempfile.TemporaryDirectory(prefix="rasch_bootstrap_", dir=BOOTSTRAP_TMPDIR) as directory:
+        paths = _write_arrays(directory, matrix, groups)
+        scores = groups['scores']
+        del groups
+        results = []
+        executor = ProcessPoolExecutor(max_workers=max(1, min(workers, len(chunks))))
+        try:
+            futures = [executor.submit(_bootstrap_chunk, paths, scores, point, chunk) for chunk in chunks]
+            for done, future in enumerate(futures, start=1):
+                results.append(future.result())
+                report_progress(0.3 + 0.7 * done / len(futures), "bootstrap")
+        except BaseException:
+            # Xato yoki navbat vaqti tugashi (JobTimeoutError): kutayotgan bo'laklar bekor qilinadi,
+            # vazifa ishlayotgan bo'laklarni kutmasdan tugaydi
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+    difficulties = np.concatenate(results)
+
+    alpha = (1.0 - confidence) / 2.0
+    valid = np.isfinite(difficulties).all(axis=1)
+    samples = difficulties[valid]
+    low, high = (np.percentile(samples, [100 * alpha, 100 * (1 - alpha)], axis=0) if samples.size
+                 else (np.full(matrix.n_items, np.nan), np.full(matrix.n_items, np.nan)))
+    return {
+        'n_resamples': n_resamples,
+        'n_valid': int(valid.sum()),
+        'confidence': confidence,
+        'difficulty': estimate['b'],
+        'difficulty_mean': samples.mean(axis=0) if samples.size else np.full(matrix.n_items, np.nan),
+        'difficulty_se': samples.std(axis=0, ddof=1) if samples.shape[0] > 1 else np.full(matrix.n_items, np.nan),
+        'ci_low': low,
+        'ci_high': high,
+    }
+
+
+def run_bootstrap_analysis(test_id: int, n_resamples: int, confidence: float = 0.95,
+                           seed: Optional[int] = None) -> Dict:
+    """Navbat vazifasi: test matritsasini yuklab savollar qiyinligi bootstrap oraliqlarini hisoblash"""
+    db = SessionLocal()
+    try:
+        report_progress(0.1, "load")
+        matrix = load_response_matrix(db, test_id)
+    finally:
+        db.close()
+    if matrix is None:
+        raise ValueError("Test uchun javoblar topilmadi")
+
+    report_progress(0.3, "bootstrap")
+    result = bootstrap_difficulties(matrix, n_resamples, confidence, seed)
+    questions = [
+        {
+            'question_id': question_id,
+            'difficulty': result['difficulty'][index],
+            'bootstrap_mean': result['difficulty_mean'][index],
+            'bootstrap_se': result['difficulty_se'][index],
+            'ci_low': result['ci_low'][index],
+            'ci_high': result['ci_high'][index],
+        }
+        for index, question_id in enumerate(matrix.question_ids)
+    ]
+    return to_builtin({
+        'test_id': test_id,
+        'total_students': matrix.n_persons,
+        'n_resamples': result['n_resamples'],
+        'n_valid': result['n_valid'],
+        'confidence': result['confidence'],
+        'questions': questions,
+    })
+
+
+class BatchAnalysisService:
+    """Bir nechta testni bitta so'rovda tahlil navbatiga qo'yish.
+
+    Har bir test alohida vazifa sifatida jarayonlar puliga tushadi va
+    matritsasini ishchi ichida bazadan o'qiydi, shuning uchun testlar
+    soniga qarab yadrolar bo'ylab tarqaladi.
+    """
+
+    def __init__(self, results_store: Optional[ResultsStore] = None):
+        self.results_store = results_store or ResultsStore()
+
+    def submit_tests(self, db: Session, test_ids: List[int], force: bool = False, mode: str = "full",
+                     bootstrap: int = 0, confidence: float = 0.95, seed: Optional[int] = None) -> List[Dict]:
+        jobs = []
+        for test_id in dict.fromkeys(test_ids):
+            entry = {'test_id': test_id, 'cached': False, 'job_id': None, 'error': None}
+            jobs.append(entry)
+            test = db.get(Test, test_id)
+            if test is None:
+                entry['error'] = "Test topilmadi"
+                continue
+            if not bootstrap and not force:
+                run = self.results_store.get_current_run(db, test)
+                if run is not None:
+                    entry.update(cached=True, results=self.results_store.summary(run))
+                    continue
+            try:
+                if bootstrap:
+                    entry['job_id'] = get_job_queue().submit(run_bootstrap_analysis, test_id, bootstrap,
+                                                             confidence, seed, kind="bootstrap")
+                else:
+                    entry['job_id'] = get_job_queue().submit(run_test_analysis, test_id, force, mode,
+                                                             kind="test_analysis")
+            except QueueFullError as exc:
+                entry['error'] = str(exc)
+        return jobs
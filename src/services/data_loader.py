@@ -0,0 +1,99 @@
+import numpy as np
+from itertools import chain
+from typing import Optional
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.models.database import Question, Response, Student
+from src.services.response_matrix import ResponseMatrix
+
+# Javoblar bazadan shuncha qatorlik bo'laklarda olinadi
+FETCH_ROWS = 50000
+
+# Zich matritsada javob berilmagan katak belgisi
+MISSING = 255
+
+
+def _positions(ids: np.ndarray, values: np.ndarray):
+    """values ning tartiblangan ids dagi o'rni va ids ga tegishlilik maskasi"""
+    position = np.searchsorted(ids, values)
+    known = (position < ids.size) & (ids[np.minimum(position, ids.size - 1)] == values)
+    return position, known
+
+
+def latest_response_id(db: Session, test_id: int) -> Optional[int]:
+    """Test javoblari ichidagi eng katta Response.id (javob bo'lmasa None)"""
+    return db.execute(
+        select(func.max(Response.id)).where(Response.test_id == test_id)
+    ).scalar()
+
+
+def load_response_matrix(db: Session, test_id: int, after_response_id: Optional[int] = None,
+                         upto_response_id: Optional[int] = None) -> Optional[ResponseMatrix]:
+    """Test javoblarini ORM obyektlarisiz to'g'ridan-to'g'ri matritsaga yuklash.
+
+    Faqat (student_id, question_id, answer) ustunlari yield_per bilan
+    bo'laklab o'qiladi va ID lar zich tartib raqamlariga aylantirilib
+    oldindan ajratilgan matritsaga joylanadi. after_response_id /
+    upto_response_id berilsa faqat shu oraliqdagi javoblar va ularning
+    talabgorlari yuklanadi (qo'shimcha baholash uchun). Javob bo'lmasa None.
+    """
+    # (test_id, id) indeksi bo'yicha oraliq skanerlash, questions bilan join kerak emas
+    conditions = [Response.test_id == test_id, Response.answer.is_not(None)]
+    if after_response_id is not None:
+        conditions.append(Response.id > after_response_id)
+    if upto_response_id is not None:
+        conditions.append(Response.id <= upto_response_id)
+
+    student_query = select(Student.id, Student.name).where(Student.test_id == test_id)
+    if after_response_id is not None:
+        student_query = student_query.where(Student.id.in_(
+            select(Response.student_id).where(*conditions)
+        ))
+    students = db.execute(student_query.order_by(Student.id)).all()
+    question_ids = np.asarray(db.execute(
+        select(Question.id).where(Question.test_id == test_id).order_by(Question.id)
+    ).scalars().all(), dtype=np.int64)
+    if not students or question_ids.size == 0:
+        return None
+
+    student_ids = np.fromiter((row.id for row in students), dtype=np.int64, count=len(students))
+    values = np.full((student_ids.size, question_ids.size), MISSING, dtype=np.uint8)
+
+    query = (
+        select(Response.student_id, Response.question_id, Response.answer)
+        .where(*conditions)
+        .execution_options(yield_per=FETCH_ROWS)
+    )
+    n_responses = 0
+    n_unknown_students = 0
+    n_unknown_questions = 0
+    # Session.execute emas, Core ulanishi: ORM qator qayta ishlash bosqichi chetlab o'tiladi
+    for partition in db.connection().execute(query).partitions():
+        rows = np.fromiter(chain.from_iterable(partition), dtype=np.int64,
+                           count=3 * len(partition)).reshape(-1, 3)
+        person, known_student = _positions(student_ids, rows[:, 0])
+        item, known_question = _positions(question_ids, rows[:, 1])
+        # Boshqa testning savoliga yozilgan javob qo'shni savol ustuniga tushmasligi kerak
+        known = known_student & known_question
+        answers = rows[known, 2]
+        values[person[known], item[known]] = np.where((answers >= 0) & (answers < MISSING), answers, MISSING)
+        n_responses += len(partition)
+        n_unknown_students += int((~known_student).sum())
+        n_unknown_questions += int((known_student & ~known_question).sum())
+
+    if n_responses == 0:
+        return None
+    if n_unknown_students:
+        logger.warning(f"Test {test_id}: {n_unknown_students} ta javob testga tegishli bo'lmagan "
+                       f"talabgorlarga yozilgan")
+    if n_unknown_questions:
+        logger.warning(f"Test {test_id}: {n_unknown_questions} ta javob testga tegishli bo'lmagan "
+                       f"savollarga yozilgan")
+
+    # 0/1 dan boshqa kodlar (MISSING) from_array da yo'q qiymat maskasiga tushadi
+    matrix = ResponseMatrix.from_array(values, [row.name for row in students])
+    matrix.student_ids = student_ids
+    matrix.question_ids = question_ids
+    return matrix
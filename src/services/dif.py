@@ -0,0 +1,221 @@
+import math
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+from src.services.estimation import EXTREME_ADJUSTMENT, MAX_ITER, MAX_STEP, TOLERANCE, _expit, _logit
+from src.services.response_matrix import ResponseMatrix
+
+# Bir bo'lakda yoyiladigan qatorlar (bincount indekslari ~ qatorlar x savollar x 8 bayt)
+DIF_CHUNK_ROWS = 16384
+
+# ETS tasnifi: |delta| chegaralari va ahamiyatlilik darajasi
+ETS_B_DELTA = 1.0
+ETS_C_DELTA = 1.5
+SIGNIFICANCE = 0.05
+
+_erfc = np.vectorize(math.erfc, otypes=[np.float64])
+
+
+def _score_strata(groups: Dict, estimates: Dict) -> Dict[str, np.ndarray]:
+    """Talabgorlar qatlamlari: (ekstremal guruh, javob berilgan savollar soni, xom ball).
+
+    Baholash guruhlari yo'q javoblarda deyarli har bir talabgor uchun
+    alohida (javoblar maskasi bo'yicha), bunday qatlamlarda MH ma'lumotsiz
+    bo'lib qoladi. Shuning uchun guruhlar xom ball va javob berilgan
+    savollar soni bo'yicha birlashtiriladi: qatlamlar soni O(savollar^2)
+    dan oshmaydi, to'liq matritsada esa aynan xom ball guruhlari qoladi.
+    Qatlam theta si - ekstremal bo'lmagan guruhlar theta sining talabgorlar
+    soni bo'yicha o'rtachasi (to'liq matritsada aniq, bukletlarda yaqin).
+    """
+    n_items = groups['n_items']
+    extreme = np.asarray(estimates['extreme_groups'], dtype=bool)
+    answered = (np.full(groups['scores'].size, n_items) if groups['observed'] is None
+                else groups['observed'].sum(axis=1))
+    keys = (extreme.astype(np.int64) * (n_items + 1) + answered) * (n_items + 1) + groups['scores']
+    stratum_keys, group_strata = np.unique(keys, return_inverse=True)
+    n_strata = stratum_keys.size
+    weights = np.where(extreme, 0.0, groups['counts'])
+    size = np.bincount(group_strata, weights=weights, minlength=n_strata)
+    with np.errstate(invalid='ignore'):
+        theta = np.bincount(group_strata, weights=weights * np.where(extreme, 0.0, estimates['theta']),
+                            minlength=n_strata) / size
+    return {
+        'strata': group_strata[groups['inverse']],
+        'n_strata': n_strata,
+        'theta': theta,
+        'informative': size > 0,
+    }
+
+
+def _stratum_tables(matrix: ResponseMatrix, strata: np.ndarray, group_codes: np.ndarray,
+                    n_strata: int, n_groups: int) -> Dict[str, np.ndarray]:
+    """(qatlam, guruh, savol) bo'yicha to'g'ri javoblar va javob berganlar soni.
+
+    Har bir bo'lakda katakning yassi indeksi (qatlam * G + guruh) * L + savol
+    bo'yicha bitta np.bincount bilan yig'iladi - savol yoki qatlam bo'yicha
+    Python tsikli yo'q.
+    """
+    n_items = matrix.n_items
+    size = n_strata * n_groups * n_items
+    correct = np.zeros(size)
+    answered = np.zeros(size)
+    items = np.arange(n_items)
+    for rows, block, observed in matrix.iter_chunks(DIF_CHUNK_ROWS):
+        codes = group_codes[rows]
+        keep = codes >= 0
+        if not keep.any():
+            continue
+        cells = strata[rows][keep] * n_groups + codes[keep]
+        index = (cells[:, None] * n_items + items).ravel()
+        correct += np.bincount(index, weights=block[keep].ravel(), minlength=size)
+        answered += np.bincount(index, weights=observed[keep].ravel(), minlength=size)
+    shape = (n_strata, n_groups, n_items)
+    return {'correct': correct.reshape(shape), 'answered': answered.reshape(shape)}
+
+
+def mantel_haenszel(correct: np.ndarray, answered: np.ndarray, reference: int, focal: int) -> Dict[str, np.ndarray]:
+    """Barcha savollar uchun Mantel-Haenszel umumiy odds nisbati, MH-delta va chi-kvadrat.
+
+    correct/answered - (qatlam, guruh, savol) jadvallari. Faqat ikkala guruh
+    ham bor qatlamlar hisobga olinadi.
+    """
+    a = correct[:, reference]
+    n_ref = answered[:, reference]
+    c = correct[:, focal]
+    n_focal = answered[:, focal]
+    b = n_ref - a
+    d = n_focal - c
+    total = n_ref + n_focal
+    right = a + c
+    wrong = b + d
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        informative = (n_ref > 0) & (n_focal > 0) & (total > 1)
+        inverse_total = np.where(informative, 1.0 / np.where(informative, total, 1.0), 0.0)
+        numerator = (a * d * inverse_total).sum(axis=0)
+        denominator = (b * c * inverse_total).sum(axis=0)
+        odds_ratio = numerator / denominator
+        expected = (n_ref * right * inverse_total).sum(axis=0)
+        variance = np.where(
+            informative, n_ref * n_focal * right * wrong / np.where(informative, total ** 2 * (total - 1), 1.0), 0.0
+        ).sum(axis=0)
+        observed = np.where(informative, a, 0.0).sum(axis=0)
+        # Yates tuzatishi bilan
+        chi_square = (np.maximum(np.abs(observed - expected) - 0.5, 0.0)) ** 2 / variance
+        delta = -2.35 * np.log(odds_ratio)
+    p_value = np.where(np.isfinite(chi_square), _erfc(np.sqrt(np.nan_to_num(chi_square) / 2.0)), np.nan)
+    return {
+        'mh_odds_ratio': odds_ratio,
+        'mh_delta': delta,
+        'mh_chi_square': chi_square,
+        'mh_p_value': p_value,
+        'ets_class': ets_classes(delta, p_value),
+    }
+
+
+def ets_classes(delta: np.ndarray, p_value: np.ndarray) -> List[Optional[str]]:
+    """ETS tasnifi: A - ahamiyatsiz yoki |delta| < 1, C - |delta| >= 1.5 va ahamiyatli, qolgani B"""
+    size = np.abs(delta)
+    significant = p_value < SIGNIFICANCE
+    labels = np.where(~significant | (size < ETS_B_DELTA), 'A', np.where(size >= ETS_C_DELTA, 'C', 'B'))
+    return [None if not np.isfinite(value) else label for value, label in zip(delta, labels.tolist())]
+
+
+def group_difficulties(theta: np.ndarray, correct: np.ndarray, answered: np.ndarray,
+                       max_iter: int = MAX_ITER, tol: float = TOLERANCE) -> Dict[str, np.ndarray]:
+    """Umumiy kalibrovka theta lari bo'yicha bitta guruh uchun savollar qiyinligi.
+
+    theta - qatlamlar (_score_strata) theta si, correct/answered - shu
+    guruhning (qatlam, savol) jadvallari. Barcha savollar bir vaqtda Newton
+    usulida yechiladi.
+    """
+    n_responses = answered.sum(axis=0)
+    scores = np.clip(correct.sum(axis=0), EXTREME_ADJUSTMENT, np.maximum(n_responses - EXTREME_ADJUSTMENT,
+                                                                          EXTREME_ADJUSTMENT))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        b = (theta @ answered) / n_responses - _logit(scores / n_responses)
+        b = np.nan_to_num(b)
+        for _ in range(max_iter):
+            p = _expit(theta[:, None] - b[None, :])
+            expected = (answered * p).sum(axis=0)
+            information = (answered * p * (1.0 - p)).sum(axis=0)
+            step = np.clip(np.where(information > 0, (expected - scores) / information, 0.0), -MAX_STEP, MAX_STEP)
+            b += step
+            if np.abs(step).max() < tol:
+                break
+        p = _expit(theta[:, None] - b[None, :])
+        information = (answered * p * (1.0 - p)).sum(axis=0)
+        se = 1.0 / np.sqrt(information)
+    unanswered = n_responses == 0
+    b[unanswered] = np.nan
+    se[unanswered] = np.nan
+    return {'difficulty': b, 'difficulty_se': se}
+
+
+def dif_analysis(matrix: ResponseMatrix, group_labels: Sequence, estimates: Dict,
+                 groups: Optional[Dict] = None, reference: Optional[str] = None) -> Dict:
+    """Guruhlar bo'yicha DIF: Mantel-Haenszel va Rasch guruh qiyinliklari.
+
+    group_labels - har bir talabgor guruhi (None yoki bo'sh - tahlildan
+    tashqari), estimates - estimate_from_statistics natijasi (umumiy
+    kalibrovka), groups - uning ball guruhlari. Qatlamlar - javob berilgan
+    savollar soni va xom ball juftligi (_score_strata), to'liq matritsada
+    xom ball. reference berilmasa eng katta guruh olinadi, qolganlari
+    unga solishtiriladi.
+    """
+    labels = np.asarray([None if label is None or str(label).strip() == "" else str(label).strip()
+                         for label in group_labels], dtype=object)
+    if labels.size != matrix.n_persons:
+        raise ValueError("Guruhlar soni talabgorlar soniga teng bo'lishi kerak")
+    present = labels != None  # noqa: E711 - object massivda elementlar bo'yicha solishtirish
+    names, codes, sizes = np.unique(labels[present].astype(str), return_inverse=True, return_counts=True)
+    if names.size < 2:
+        raise ValueError("DIF uchun kamida 2 ta guruh kerak")
+    if reference is None:
+        reference_code = int(np.argmax(sizes))
+    elif reference in names:
+        reference_code = int(np.flatnonzero(names == reference)[0])
+    else:
+        raise ValueError(f"Tayanch guruh topilmadi: {reference}")
+    group_codes = np.full(matrix.n_persons, -1, dtype=np.int64)
+    group_codes[present] = codes
+
+    groups = groups if groups is not None else matrix.score_groups()
+    strata = _score_strata(groups, estimates)
+    tables = _stratum_tables(matrix, strata['strata'], group_codes, strata['n_strata'], names.size)
+
+    # Ekstremal ball guruhlari Rasch guruh qiyinliklariga kirmaydi
+    informative = strata['informative']
+    theta = strata['theta'][informative]
+    per_group = [
+        group_difficulties(theta, tables['correct'][informative, code], tables['answered'][informative, code])
+        for code in range(names.size)
+    ]
+
+    comparisons = []
+    for focal_code in range(names.size):
+        if focal_code == reference_code:
+            continue
+        reference_fit, focal_fit = per_group[reference_code], per_group[focal_code]
+        contrast = focal_fit['difficulty'] - reference_fit['difficulty']
+        with np.errstate(invalid='ignore'):
+            contrast_se = np.sqrt(focal_fit['difficulty_se'] ** 2 + reference_fit['difficulty_se'] ** 2)
+            contrast_t = contrast / contrast_se
+        comparisons.append({
+            'focal': names[focal_code],
+            **mantel_haenszel(tables['correct'], tables['answered'], reference_code, focal_code),
+            'difficulty_reference': reference_fit['difficulty'],
+            'difficulty_focal': focal_fit['difficulty'],
+            'dif_contrast': contrast,
+            'contrast_se': contrast_se,
+            'contrast_t': contrast_t,
+            'contrast_p_value': np.where(np.isfinite(contrast_t),
+                                         _erfc(np.abs(np.nan_to_num(contrast_t)) / math.sqrt(2.0)), np.nan),
+        })
+
+    return {
+        'reference': names[reference_code],
+        'group_sizes': dict(zip(names.tolist(), sizes.tolist())),
+        'excluded': int((~present).sum()),
+        'comparisons': comparisons,
+    }
@@ -0,0 +1,361 @@
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+# Newton-Raphson sozlamalari
+MAX_ITER = 100
+TOLERANCE = 1e-4
+MAX_STEP = 1.0
+
+# Ekstremal (0 yoki maksimal) ballar shu qiymatga siljitiladi
+EXTREME_ADJUSTMENT = 0.3
+
+# Ehtimollar matritsasi shuncha guruh bo'lagida hisoblanadi (xotira chegarasi)
+GROUP_CHUNK = 16384
+
+
+def _expit(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _logit(p: np.ndarray) -> np.ndarray:
+    return np.log(p / (1.0 - p))
+
+
+def group_scores(raw_scores: np.ndarray, item_scores: np.ndarray, patterns: Optional[np.ndarray] = None,
+                 pattern_index: Optional[np.ndarray] = None, item_counts: Optional[np.ndarray] = None) -> Dict:
+    """Xom ballar va savol marginallarini yetarli statistikalarga siqish.
+
+    Rasch modelida talabgor theta si faqat xom balliga va qaysi savollarga
+    javob berganiga bog'liq, shuning uchun baholash noyob (maska, ball)
+    juftliklari bo'yicha bajariladi. patterns - kuzatilgan savollar
+    maskalari (K x L), pattern_index - har bir talabgorning maska raqami,
+    item_counts - har bir savolga javob berganlar soni. To'liq matritsada
+    patterns berilmaydi.
+    """
+    n_items = len(item_scores)
+    raw_scores = np.asarray(raw_scores, dtype=np.int64)
+    if patterns is None:
+        keys = raw_scores
+    else:
+        keys = np.asarray(pattern_index, dtype=np.int64) * (n_items + 1) + raw_scores
+    keys, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    return {
+        'scores': keys % (n_items + 1),
+        'counts': counts,
+        'inverse': inverse,
+        'observed': None if patterns is None else np.asarray(patterns, dtype=bool)[keys // (n_items + 1)],
+        'item_scores': np.asarray(item_scores, dtype=np.int64),
+        'item_counts': (np.full(n_items, len(raw_scores), dtype=np.int64) if item_counts is None
+                        else np.asarray(item_counts, dtype=np.int64)),
+        'n_persons': len(raw_scores),
+        'n_items': n_items,
+    }
+
+
+def collapse_scores(responses: np.ndarray, missing: Optional[np.ndarray] = None) -> Dict:
+    """Zich 0/1 matritsadan ball guruhlari va savol marginallarini hisoblash.
+
+    missing - yo'q qiymatlar maskasi (True - javob yo'q).
+    """
+    data = np.asarray(responses)
+    if missing is None or not np.any(missing):
+        return group_scores(data.sum(axis=1, dtype=np.int64), data.sum(axis=0, dtype=np.int64))
+    observed = ~np.asarray(missing, dtype=bool)
+    data = np.where(observed, data, 0)
+    patterns, pattern_index = np.unique(observed, axis=0, return_inverse=True)
+    return group_scores(data.sum(axis=1, dtype=np.int64), data.sum(axis=0, dtype=np.int64),
+                        patterns, pattern_index, observed.sum(axis=0, dtype=np.int64))
+
+
+def merge_groups(first: Dict, second: Dict) -> Dict:
+    """Ikki guruhlar jadvalini (masalan, oldingi tahlil va yangi talabgorlar) birlashtirish.
+
+    Yetarli statistikalar qo'shiluvchan: bir xil (maska, ball) guruhlari
+    sonlari va savol marginallari qo'shiladi. 'inverse' o'rniga
+    'merged_index' qaytariladi - first va keyin second guruhlarining
+    birlashgan jadvaldagi raqamlari.
+    """
+    n_items = first['n_items']
+    if second['n_items'] != n_items:
+        raise ValueError("Guruhlar jadvallari savollar soni bo'yicha mos emas")
+    scores = np.concatenate([first['scores'], second['scores']])
+    counts = np.concatenate([first['counts'], second['counts']])
+    if first['observed'] is None and second['observed'] is None:
+        keys = scores
+        patterns = None
+    else:
+        patterns, pattern_index = np.unique(np.vstack([_observed(first), _observed(second)]), axis=0,
+                                            return_inverse=True)
+        keys = pattern_index.ravel() * (n_items + 1) + scores
+    keys, merged_index = np.unique(keys, return_inverse=True)
+    return {
+        'scores': keys % (n_items + 1),
+        'counts': np.bincount(merged_index, weights=counts, minlength=keys.size).astype(np.int64),
+        'merged_index': merged_index.ravel(),
+        'observed': None if patterns is None else patterns[keys // (n_items + 1)],
+        'item_scores': first['item_scores'] + second['item_scores'],
+        'item_counts': first['item_counts'] + second['item_counts'],
+        'n_persons': first['n_persons'] + second['n_persons'],
+        'n_items': n_items,
+    }
+
+
+def pattern_keys(groups: Dict) -> np.ndarray:
+    """Guruhlar maskalarining tahlillar orasida o'zgarmaydigan kaliti (bytes, object massivi).
+
+    To'liq javob bergan guruhlar uchun b"", qolganlari uchun bitlarga
+    joylangan maskaning o'zi: kalit maskani aynan ifodalaydi, shuning uchun
+    turli maskalar (xesh kabi) to'qnashmaydi.
+    """
+    keys = np.full(groups['scores'].size, b"", dtype=object)
+    if groups['observed'] is None:
+        return keys
+    observed = groups['observed']
+    packed = np.ascontiguousarray(np.packbits(observed, axis=1))
+    partial = np.flatnonzero(~observed.all(axis=1))
+    # void ko'rinishi har bir qatorni (oxiridagi nol baytlari bilan) bytes sifatida beradi
+    rows = packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
+    keys[partial] = rows[partial].tolist()
+    return keys
+
+
+def _observed(groups: Dict) -> np.ndarray:
+    if groups['observed'] is None:
+        return np.ones((groups['scores'].size, groups['n_items']), dtype=bool)
+    return groups['observed']
+
+
+def _person_sums(theta: np.ndarray, b: np.ndarray, observed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Har bir guruh uchun kutilgan ball va axborot (faqat kuzatilgan kataklar)"""
+    expected = np.empty(theta.size)
+    information = np.empty(theta.size)
+    for start in range(0, theta.size, GROUP_CHUNK):
+        rows = slice(start, start + GROUP_CHUNK)
+        p = _expit(theta[rows, None] - b[None, :]) * observed[rows]
+        expected[rows] = p.sum(axis=1)
+        information[rows] = (p * (1.0 - p)).sum(axis=1)
+    return expected, information
+
+
+def _item_sums(theta: np.ndarray, b: np.ndarray, observed: np.ndarray,
+               counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Har bir savol uchun kutilgan marginal va axborot (faqat kuzatilgan kataklar)"""
+    expected = np.zeros(b.size)
+    information = np.zeros(b.size)
+    for start in range(0, theta.size, GROUP_CHUNK):
+        rows = slice(start, start + GROUP_CHUNK)
+        p = _expit(theta[rows, None] - b[None, :]) * observed[rows]
+        expected += counts[rows] @ p
+        information += counts[rows] @ (p * (1.0 - p))
+    return expected, information
+
+
+def _find_extremes(groups: Dict, observed: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Ekstremal bo'lmagan ball guruhlari va savollarni topish.
+
+    Ekstremal savollarni olib tashlash yangi ekstremal talabgorlarni keltirib
+    chiqarishi mumkin, shuning uchun holat o'zgarmaguncha takrorlanadi.
+    Hammasi to'g'ri savol uni ko'rgan har bir qolgan talabgor balliga,
+    hammasi to'g'ri talabgor esa u ko'rgan har bir qolgan savol marginaliga
+    qo'shiladi - shu sababli hisob faqat statistikalar ustida yuradi.
+    Qaytaradi: faol guruhlar, faol savollar, faol savollar bo'yicha
+    guruh ballari va faol talabgorlar bo'yicha savol marginallari.
+    """
+    scores, counts, item_scores = groups['scores'], groups['counts'], groups['item_scores']
+    weights = observed.astype(np.float64)
+    active = np.ones(scores.size, dtype=bool)
+    high = np.zeros(scores.size, dtype=bool)
+    items = np.ones(groups['n_items'], dtype=bool)
+    easy = np.zeros(groups['n_items'], dtype=bool)
+    while True:
+        n_observed = weights @ items
+        person_scores = scores - weights @ easy
+        low = person_scores <= 0
+        high = high | (active & ~low & (person_scores >= n_observed))
+        new_active = active & ~low & ~high
+
+        n_responses = (counts * new_active) @ weights
+        marginals = item_scores - (counts * high) @ weights
+        new_easy = easy | (items & (n_responses > 0) & (marginals >= n_responses))
+        new_items = items & ~new_easy & (marginals > 0)
+        if (np.array_equal(new_active, active) and np.array_equal(new_items, items)
+                and np.array_equal(new_easy, easy)):
+            return active, items, person_scores, marginals
+        active, items, easy = new_active, new_items, new_easy
+
+
+def solve_abilities(difficulties: np.ndarray, raw_scores: np.ndarray, observed: Optional[np.ndarray] = None,
+                    max_iter: int = MAX_ITER, tol: float = TOLERANCE) -> Tuple[np.ndarray, np.ndarray]:
+    """Berilgan qiyinliklar bo'yicha xom ballarga mos theta va SE ni topish.
+
+    observed bo'lmasa barcha savollar kuzatilgan deb, har bir noyob ball
+    uchun bir marta yechiladi. Ekstremal ballar EXTREME_ADJUSTMENT ga
+    siljitiladi, birorta ham javobi yo'q qatorlar uchun NaN qaytadi.
+    """
+    b = np.asarray(difficulties, dtype=np.float64)
+    if observed is None:
+        unique_scores, inverse = np.unique(raw_scores, return_inverse=True)
+        theta, se = solve_abilities(b, unique_scores, np.ones((unique_scores.size, b.size), dtype=bool),
+                                    max_iter, tol)
+        return theta[inverse], se[inverse]
+
+    n_observed = observed.sum(axis=1)
+    answered = n_observed > 0
+    scores = np.clip(np.asarray(raw_scores, dtype=np.float64),
+                     EXTREME_ADJUSTMENT, np.maximum(n_observed - EXTREME_ADJUSTMENT, EXTREME_ADJUSTMENT))
+    theta = np.zeros(scores.size)
+    theta[answered] = _logit(scores[answered] / n_observed[answered]) + b.mean()
+    for _ in range(max_iter):
+        expected, information = _person_sums(theta, b, observed)
+        step = np.zeros(theta.size)
+        step[answered] = np.clip((scores[answered] - expected[answered]) / information[answered],
+                                 -MAX_STEP, MAX_STEP)
+        theta += step
+        if np.abs(step).max() < tol:
+            break
+
+    _, information = _person_sums(theta, b, observed)
+    theta[~answered] = np.nan
+    with np.errstate(divide='ignore'):
+        se = np.where(answered, 1.0 / np.sqrt(information), np.nan)
+    return theta, se
+
+
+def solve_difficulties(abilities: np.ndarray, item_scores: np.ndarray, counts: Optional[np.ndarray] = None,
+                       observed: Optional[np.ndarray] = None,
+                       max_iter: int = MAX_ITER, tol: float = TOLERANCE) -> Tuple[np.ndarray, np.ndarray]:
+    """Berilgan theta qiymatlari bo'yicha savollar qiyinligi va SE ni topish.
+
+    counts - har bir theta guruhidagi talabgorlar soni (bo'lmasa 1),
+    observed - guruh x savol kuzatilgan maskasi (bo'lmasa hammasi).
+    """
+    theta = np.asarray(abilities, dtype=np.float64)
+    scores = np.asarray(item_scores, dtype=np.float64)
+    weights = np.ones_like(theta) if counts is None else np.asarray(counts, dtype=np.float64)
+    if observed is None:
+        observed = np.ones((theta.size, scores.size), dtype=bool)
+    n_responses = weights @ observed
+    scores = np.clip(scores, EXTREME_ADJUSTMENT, n_responses - EXTREME_ADJUSTMENT)
+
+    b = (weights @ (observed * theta[:, None])) / n_responses - _logit(scores / n_responses)
+    for _ in range(max_iter):
+        expected, information = _item_sums(theta, b, observed, weights)
+        step = np.clip((expected - scores) / information, -MAX_STEP, MAX_STEP)
+        b += step
+        if np.abs(step).max() < tol:
+            break
+
+    _, information = _item_sums(theta, b, observed, weights)
+    return b, 1.0 / np.sqrt(information)
+
+
+def estimate_from_statistics(groups: Dict, max_iter: int = MAX_ITER, tol: float = TOLERANCE,
+                             initial_b: Optional[np.ndarray] = None,
+                             initial_theta: Optional[np.ndarray] = None) -> Dict:
+    """Dixotomik 1PL Rasch modelini JML (Newton-Raphson) usulida baholash.
+
+    groups - group_scores natijasi. Likelihood yig'indilari faqat kuzatilgan
+    kataklar bo'yicha olinadi, shuning uchun umumiy (anchor) savollari bor
+    turli bukletlar bitta kalibrovkada baholanadi. Har bir iteratsiya
+    O(savollar x guruhlar). theta va theta_se guruhlar bo'yicha qaytariladi,
+    talabgorlarga groups['inverse'] orqali tarqatiladi. Theta va b logit
+    shkalada, savollar qiyinligi o'rtachasi 0 ga markazlashtiriladi.
+    initial_b / initial_theta - oldingi tahlil qiyinliklari va guruhlar
+    theta si (iliq start, noma'lumlari NaN): statistikalar kam o'zgargan
+    bo'lsa bir necha Newton qadamida yaqinlashadi.
+    """
+    if groups['n_persons'] < 2 or groups['n_items'] < 2:
+        raise ValueError("Rasch tahlili uchun kamida 2 talabgor va 2 savol kerak")
+
+    observed = _observed(groups)
+    active, items, person_scores, marginals = _find_extremes(groups, observed)
+    if groups['counts'][active].sum() < 2 or items.sum() < 2:
+        raise ValueError("Ekstremal bo'lmagan javoblar Rasch tahlili uchun yetarli emas")
+
+    # Ekstremal bo'lmagan qism: ballar faol savollar bo'yicha, marginallar faol talabgorlar bo'yicha
+    counts = groups['counts'][active].astype(np.float64)
+    mask = observed[np.ix_(active, items)]
+    person_scores = person_scores[active]
+    item_scores = marginals[items].astype(np.float64)
+    n_items = items.sum()
+
+    theta = _logit(person_scores / mask.sum(axis=1))
+    b = -_logit(item_scores / (counts @ mask))
+    # Saqlangan parametrlar (L-1)/L ga tuzatilgan, iliq start tuzatilmagan shkalada
+    if initial_theta is not None:
+        previous = np.asarray(initial_theta, dtype=np.float64)[active] * n_items / (n_items - 1)
+        theta = np.where(np.isfinite(previous), previous, theta)
+    if initial_b is not None:
+        previous = np.asarray(initial_b, dtype=np.float64)[items] * n_items / (n_items - 1)
+        b = np.where(np.isfinite(previous), previous, b)
+    b -= b.mean()
+
+    # Theta va b navbatma-navbat yangilanadi: bir vaqtdagi qadam umumiy
+    # siljish yo'nalishida ikki marta hisoblanib, tebranishga olib keladi
+    converged = False
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        expected, information = _person_sums(theta, b, mask)
+        step_theta = np.clip((person_scores - expected) / information, -MAX_STEP, MAX_STEP)
+        theta += step_theta
+
+        expected, information = _item_sums(theta, b, mask, counts)
+        step_b = np.clip((expected - item_scores) / information, -MAX_STEP, MAX_STEP)
+        b += step_b
+        shift = b.mean()
+        b -= shift
+        theta -= shift
+        if max(np.abs(step_theta).max(), np.abs(step_b).max()) < tol:
+            converged = True
+            break
+
+    # JML siljishini tuzatish (Wright, (L-1)/L)
+    b *= (n_items - 1) / n_items
+
+    # Ekstremal savollar qiyinligi ularni ko'rgan ekstremal bo'lmagan talabgorlar bo'yicha.
+    # Faqat ekstremal talabgorlar ko'rgan savollar uchun taxminiy p-qiymat logiti olinadi
+    difficulties = np.empty(groups['n_items'])
+    difficulties[items] = b
+    extreme = np.flatnonzero(~items)
+    if extreme.size:
+        reached = (counts @ observed[np.ix_(active, extreme)]) > 0
+        if reached.any():
+            difficulties[extreme[reached]], _ = solve_difficulties(
+                theta, marginals[extreme[reached]], counts, observed[np.ix_(active, extreme[reached])],
+                max_iter, tol
+            )
+        unreached = extreme[~reached]
+        p_values = np.clip(groups['item_scores'][unreached], EXTREME_ADJUSTMENT, None) / \
+            np.maximum(groups['item_counts'][unreached], 1)
+        difficulties[unreached] = -_logit(np.clip(p_values, 0.01, 0.99))
+
+    # Barcha guruhlar yakuniy qiyinliklar bo'yicha baholanadi
+    abilities, ability_se = solve_abilities(difficulties, groups['scores'], groups['observed'], max_iter, tol)
+
+    _, information = _item_sums(abilities[active], difficulties, observed[active], counts)
+    with np.errstate(divide='ignore'):
+        difficulty_se = 1.0 / np.sqrt(information)
+
+    return {
+        'theta': abilities,
+        'theta_se': ability_se,
+        'b': difficulties,
+        'b_se': difficulty_se,
+        'extreme_groups': ~active,
+        'extreme_items': ~items,
+        'iterations': iterations,
+        'converged': converged,
+    }
+
+
+def estimate_rasch(responses: np.ndarray, missing: Optional[np.ndarray] = None,
+                   max_iter: int = MAX_ITER, tol: float = TOLERANCE) -> Dict:
+    """0/1 matritsani guruhlarga siqib baholash va natijani talabgorlarga tarqatish"""
+    groups = collapse_scores(responses, missing)
+    estimates = estimate_from_statistics(groups, max_iter, tol)
+    inverse = groups['inverse']
+    estimates['theta'] = estimates['theta'][inverse]
+    estimates['theta_se'] = estimates['theta_se'][inverse]
+    estimates['extreme_persons'] = estimates.pop('extreme_groups')[inverse]
+    estimates['raw_scores'] = groups['scores'][inverse]
+    return estimates
@@ -0,0 +1,111 @@
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+from src.services.response_matrix import ResponseMatrix
+
+# Bir bo'lakda hisoblanadigan kataklar soni: har bir float64 vaqtinchalik massiv ~4 MB
+FIT_CHUNK_CELLS = 1 << 19
+
+
+def _zstd(mnsq: np.ndarray, variance: np.ndarray) -> np.ndarray:
+    """Mean-square ni Wilson-Hilferty kub ildiz o'zgartirishi bilan standartlashtirish"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        q = np.sqrt(np.maximum(variance, 0))
+        return (np.cbrt(mnsq) - 1.0) * (3.0 / q) + q / 3.0
+
+
+def _mean_squares(z2: np.ndarray, r2: np.ndarray, w: np.ndarray, outfit_var: np.ndarray,
+                  infit_var: np.ndarray, n: np.ndarray) -> Dict[str, np.ndarray]:
+    """Yig'indilardan infit/outfit MNSQ va ZSTD (Wright & Masters)"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        outfit = z2 / n
+        infit = r2 / w
+        outfit_variance = outfit_var / n ** 2 - 1.0 / n
+        infit_variance = infit_var / w ** 2
+    return {
+        'infit_mnsq': infit,
+        'infit_zstd': _zstd(infit, infit_variance),
+        'outfit_mnsq': outfit,
+        'outfit_zstd': _zstd(outfit, outfit_variance),
+    }
+
+
+def fit_statistics(matrix: ResponseMatrix, abilities: np.ndarray, difficulties: np.ndarray,
+                   chunk_cells: int = FIT_CHUNK_CELLS) -> Dict[str, Dict[str, np.ndarray]]:
+    """Talabgorlar va savollar uchun infit/outfit mean-square va ZSTD.
+
+    Matritsa bitta o'tishda qator bo'laklari bo'yicha yoyiladi: kutilgan
+    qiymat, dispersiya va qoldiqlar faqat bo'lak uchun hisoblanadi,
+    shuning uchun xotira bo'lak hajmi bilan chegaralangan. Savollar
+    statistikasiga ekstremal (0 yoki maksimal) ballli talabgorlar kirmaydi.
+    Natija: {'persons': {...}, 'items': {...}}, har birida infit_mnsq,
+    infit_zstd, outfit_mnsq, outfit_zstd massivlari.
+    """
+    abilities = np.asarray(abilities, dtype=np.float64)
+    difficulties = np.asarray(difficulties, dtype=np.float64)
+    n_persons, n_items = matrix.shape
+    raw_scores = matrix.row_sums()
+    answered = matrix.row_counts()
+    # Ekstremal va baholanmagan talabgorlar savollar statistikasiga kirmaydi
+    informative = ((raw_scores > 0) & (raw_scores < answered) & np.isfinite(abilities)).astype(np.float64)
+
+    # Savollar bo'yicha yig'indilar: z^2, r^2, W, outfit va infit dispersiya hadlari, n
+    item_sums = np.zeros((6, n_items))
+    persons = {name: np.full(n_persons, np.nan)
+               for name in ('infit_mnsq', 'infit_zstd', 'outfit_mnsq', 'outfit_zstd')}
+
+    chunk_rows = max(1, chunk_cells // max(n_items, 1))
+    for rows, block, observed in matrix.iter_chunks(chunk_rows):
+        theta = np.nan_to_num(abilities[rows])[:, None]
+        p = 1.0 / (1.0 + np.exp(difficulties - theta))
+        w = p * (1.0 - p)
+        r2 = block - p
+        r2 *= r2
+        z2 = r2 / w
+        # Bernoulli uchun C/W^2 = 1/W - 3 va C - W^2 = W(1 - 4W)
+        outfit_var = 1.0 / w - 3.0
+        infit_var = w * (1.0 - 4.0 * w)
+
+        # Kuzatilmagan kataklar nolga tushiriladi
+        for values in (z2, r2, w, outfit_var, infit_var):
+            values *= observed
+        n = observed.sum(axis=1, dtype=np.float64)
+
+        chunk = _mean_squares(z2.sum(axis=1), r2.sum(axis=1), w.sum(axis=1), outfit_var.sum(axis=1),
+                              infit_var.sum(axis=1), n)
+        for name, values in chunk.items():
+            persons[name][rows] = values
+
+        weights = informative[rows]
+        for index, values in enumerate((z2, r2, w, outfit_var, infit_var, observed)):
+            item_sums[index] += weights @ values
+
+    items = _mean_squares(*item_sums)
+    # Baholanmagan talabgorlar uchun fit yo'q
+    unscored = ~np.isfinite(abilities)
+    for values in persons.values():
+        values[unscored] = np.nan
+    return {'persons': persons, 'items': items}
+
+
+def separation_reliability(measures: np.ndarray, errors: np.ndarray,
+                           weights: Optional[np.ndarray] = None) -> Tuple[float, float]:
+    """Ajratish indeksi (separation) va Rasch ishonchliligi.
+
+    Haqiqiy dispersiya = kuzatilgan dispersiya - o'rtacha xato kvadrati.
+    weights - guruhlar bo'yicha hisoblanganda talabgorlar soni.
+    """
+    measures = np.asarray(measures, dtype=np.float64)
+    errors = np.asarray(errors, dtype=np.float64)
+    weights = np.ones_like(measures) if weights is None else np.asarray(weights, dtype=np.float64)
+    valid = np.isfinite(measures) & np.isfinite(errors) & (weights > 0)
+    if valid.sum() < 2:
+        return np.nan, np.nan
+    measures, errors, weights = measures[valid], errors[valid], weights[valid]
+    mean = np.average(measures, weights=weights)
+    observed_variance = np.average((measures - mean) ** 2, weights=weights)
+    error_variance = np.average(errors ** 2, weights=weights)
+    true_variance = max(observed_variance - error_variance, 0.0)
+    if observed_variance == 0 or error_variance == 0:
+        return np.nan, np.nan
+    return np.sqrt(true_variance / error_variance), true_variance / observed_variance
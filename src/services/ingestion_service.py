@@ -0,0 +1,256 @@
+import csv
+import io
+import numpy as np
+from typing import Any, BinaryIO, Dict, Iterator, List, Sequence, Tuple
+from loguru import logger
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from src.models.database import Question, Response, Student
+from src.services.results_store import bump_data_version
+
+# Fayl shu hajmdagi qatorlar bo'laklarida o'qiladi
+CHUNK_ROWS = 5000
+
+# PostgreSQL bo'lmagan bazalar uchun executemany paketi hajmi
+INSERT_BATCH = 50000
+
+SUPPORTED_FORMATS = ("csv", "xlsx", "parquet")
+
+# Tez yo'l: ko'p uchraydigan kataklar lug'at orqali, qolganlari float() bilan o'qiladi
+_ANSWERS = {"0": 0.0, "1": 1.0, 0: 0.0, 1: 1.0}
+
+
+def _coerce(cell: Any) -> float:
+    """Katakni 0/1 javobga aylantirish (pd.to_numeric(errors='coerce') kabi), aks holda NaN"""
+    if cell is None:
+        return np.nan
+    try:
+        value = float(cell.strip() if isinstance(cell, str) else cell)
+    except (TypeError, ValueError):
+        return np.nan
+    return value if value == 0.0 or value == 1.0 else np.nan
+
+
+def _answer_values(rows: Sequence[Sequence[Any]], n_items: int) -> np.ndarray:
+    """Qatorlar (ism, javoblar...) dan javoblar matritsasi; 0/1 bo'lmagan kataklar NaN"""
+    values = np.full((len(rows), n_items), np.nan)
+    answers = _ANSWERS
+    for index, row in enumerate(rows):
+        cells = row[1:n_items + 1]
+        values[index, :len(cells)] = [answers[cell] if cell in answers else _coerce(cell) for cell in cells]
+    return values
+
+
+def _names(cells: Sequence[Any]) -> List[str]:
+    return ["" if name is None else str(name).strip() for name in cells]
+
+
+class IngestionService:
+    """Javoblar matritsasini fayldan ommaviy yuklash.
+
+    Fayl formati: birinchi ustun - talabgor ismi, qolgan ustunlar - test
+    savollari tartibida 0/1 javoblar. Bo'sh yoki 0/1 bo'lmagan kataklar
+    javob berilmagan deb hisoblanadi va yozilmaydi.
+
+    Modul pandas ni import qilmaydi: fayllar csv/openpyxl/pyarrow bilan
+    to'g'ridan-to'g'ri NumPy bo'laklariga o'qiladi (APP_MODE=ingest).
+    """
+
+    def ingest_file(self, db: Session, test_id: int, file: BinaryIO, filename: str) -> Dict:
+        """Faylni bo'laklab o'qish va javoblarni bazaga ommaviy yozish"""
+        file_format = self.detect_format(filename)
+        # Bir xil ismli talabgorlar bo'lsa eng kichik ID ishlatiladi
+        students = dict(db.execute(
+            select(Student.name, Student.id).where(Student.test_id == test_id).order_by(Student.id.desc())
+        ).all())
+        question_ids = None
+        stats = {'rows': 0, 'students_created': 0, 'questions_created': 0,
+                 'responses_inserted': 0, 'cells_skipped': 0}
+
+        for names, values in self.read_chunks(file, file_format):
+            if question_ids is None:
+                question_ids = self._resolve_questions(db, test_id, values.shape[1], stats)
+
+            student_ids = self._resolve_students(db, test_id, names, students, stats)
+
+            answered = (values == 0) | (values == 1)
+            rows, cols = np.nonzero(answered)
+            self._write_responses(db, test_id, student_ids[rows], question_ids[cols],
+                                  values[rows, cols].astype(np.int64))
+
+            stats['rows'] += len(names)
+            stats['responses_inserted'] += rows.size
+            stats['cells_skipped'] += answered.size - rows.size
+
+        if question_ids is None:
+            raise ValueError("Faylda ma'lumot topilmadi")
+
+        bump_data_version(db, test_id)
+        db.commit()
+        logger.info(f"Test {test_id}: {stats['responses_inserted']} ta javob yuklandi ({filename})")
+        return stats
+
+    def detect_format(self, filename: str) -> str:
+        extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+        if extension not in SUPPORTED_FORMATS:
+            raise ValueError(f"Qo'llab-quvvatlanmaydigan fayl turi: {extension or filename}")
+        return extension
+
+    def read_chunks(self, file: BinaryIO, file_format: str) -> Iterator[Tuple[List[str], np.ndarray]]:
+        """Faylni CHUNK_ROWS qatorlik (ismlar, javoblar matritsasi) bo'laklari sifatida o'qish"""
+        if file_format == 'csv':
+            yield from self._read_csv(file)
+        elif file_format == 'xlsx':
+            yield from self._read_xlsx(file)
+        else:
+            yield from self._read_parquet(file)
+
+    def _read_csv(self, file: BinaryIO) -> Iterator[Tuple[List[str], np.ndarray]]:
+        text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        try:
+            rows = csv.reader(text)
+            header = next(rows, None)
+            if header is None:
+                return
+            yield from self._row_chunks(rows, len(header) - 1)
+        except csv.Error as exc:
+            raise ValueError(f"CSV faylni o'qib bo'lmadi: {exc}")
+        finally:
+            # UploadFile.file ni yopmaslik uchun o'ram ajratiladi
+            text.detach()
+
+    def _read_xlsx(self, file: BinaryIO) -> Iterator[Tuple[List[str], np.ndarray]]:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            yield from self._row_chunks(rows, len(header) - 1)
+        finally:
+            workbook.close()
+
+    def _row_chunks(self, rows: Iterator[Sequence[Any]], n_items: int) -> Iterator[Tuple[List[str], np.ndarray]]:
+        chunk: List[Sequence[Any]] = []
+        for row in rows:
+            # Bo'sh qatorlar (pd.read_csv dagi kabi) o'tkazib yuboriladi
+            if all(cell is None or cell == "" for cell in row):
+                continue
+            if len(row) > n_items + 1 and any(cell is not None and cell != "" for cell in row[n_items + 1:]):
+                raise ValueError(f"Qatorda ustunlar sarlavhadagidan ko'p: {len(row)} > {n_items + 1}")
+            chunk.append(row)
+            if len(chunk) == CHUNK_ROWS:
+                yield _names([row[0] for row in chunk]), _answer_values(chunk, n_items)
+                chunk = []
+        if chunk:
+            yield _names([row[0] for row in chunk]), _answer_values(chunk, n_items)
+
+    def _read_parquet(self, file: BinaryIO) -> Iterator[Tuple[List[str], np.ndarray]]:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet fayllar uchun pyarrow o'rnatilmagan")
+
+        for batch in pq.ParquetFile(file).iter_batches(batch_size=CHUNK_ROWS):
+            values = np.full((batch.num_rows, batch.num_columns - 1), np.nan)
+            for position, column in enumerate(batch.columns[1:]):
+                cells = column.to_numpy(zero_copy_only=False)
+                if cells.dtype.kind in 'iuf':
+                    cells = cells.astype(np.float64)
+                    values[:, position] = np.where((cells == 0) | (cells == 1), cells, np.nan)
+                else:
+                    values[:, position] = [_coerce(cell) for cell in cells]
+            yield _names(batch.column(0).to_pylist()), values
+
+    def _resolve_questions(self, db: Session, test_id: int, n_items: int, stats: Dict) -> np.ndarray:
+        """Ustunlarni test savollariga tartib bo'yicha moslash, yetmaganlarini yaratish"""
+        question_ids = db.execute(
+            select(Question.id).where(Question.test_id == test_id).order_by(Question.id)
+        ).scalars().all()
+        if len(question_ids) < n_items:
+            new_questions = [
+                {'test_id': test_id, 'question_text': f"Savol {position + 1}"}
+                for position in range(len(question_ids), n_items)
+            ]
+            created = db.execute(insert(Question).returning(Question.id, sort_by_parameter_order=True),
+                                 new_questions).scalars().all()
+            question_ids = list(question_ids) + list(created)
+            stats['questions_created'] += len(created)
+        return np.asarray(question_ids[:n_items], dtype=np.int64)
+
+    def _resolve_students(self, db: Session, test_id: int, names: List[str],
+                          students: Dict[str, int], stats: Dict) -> np.ndarray:
+        """Ismlarni talabgor ID lariga moslash, yangilarini bitta so'rovda yaratish"""
+        new_names = list(dict.fromkeys(name for name in names if name not in students))
+        if new_names:
+            # Core INSERT: ORM bulk insert ning har bir qator uchun qo'shimcha ishisiz
+            table = Student.__table__
+            created = db.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True),
+                [{'test_id': test_id, 'name': name} for name in new_names]
+            ).scalars().all()
+            students.update(zip(new_names, created))
+            stats['students_created'] += len(created)
+        return np.fromiter((students[name] for name in names), dtype=np.int64, count=len(names))
+
+    def _write_responses(self, db: Session, test_id: int, student_ids: np.ndarray, question_ids: np.ndarray,
+                         answers: np.ndarray) -> None:
+        """Javoblarni yozish; talabgor shu savolga avval javob bergan bo'lsa eski javob almashtiriladi.
+
+        Almashtirilgan javob yangi Response.id oladi, shuning uchun qo'shimcha
+        baholash uni yangi javob sifatida ko'radi.
+        """
+        if student_ids.size == 0:
+            return
+        connection = db.connection()
+        dialect = connection.dialect.name
+        if dialect == 'postgresql':
+            self._copy_responses(connection, test_id, student_ids, question_ids, answers)
+            return
+        # (student_id, question_id, answer) yozuvli massivi: tolist() kortejlarni C da yaratadi
+        triples = np.rec.fromarrays((student_ids, question_ids, answers))
+        for start in range(0, student_ids.size, INSERT_BATCH):
+            rows = triples[start:start + INSERT_BATCH].tolist()
+            if dialect == 'sqlite':
+                # Drayverning executemany i ORM/Core parametr qayta ishlashini chetlab o'tadi;
+                # REPLACE eski (student_id, question_id) qatorini o'chirib yangisini qo'shadi
+                connection.exec_driver_sql(
+                    "INSERT OR REPLACE INTO responses (test_id, student_id, question_id, answer) "
+                    f"VALUES ({int(test_id)}, ?, ?, ?)", rows
+                )
+            else:
+                db.execute(delete(Response).where(
+                    tuple_(Response.student_id, Response.question_id).in_([(s, q) for s, q, _ in rows])
+                ))
+                db.execute(insert(Response), [
+                    {'test_id': test_id, 'student_id': s, 'question_id': q, 'answer': a} for s, q, a in rows
+                ])
+
+    def _copy_responses(self, connection, test_id: int, student_ids: np.ndarray, question_ids: np.ndarray,
+                        answers: np.ndarray) -> None:
+        """PostgreSQL: COPY bilan vaqtinchalik jadvalga, keyin eski javoblarni almashtirib ko'chirish"""
+        buffer = io.StringIO()
+        np.savetxt(buffer, np.column_stack((student_ids, question_ids, answers)), fmt='%d', delimiter=',')
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.execute("CREATE TEMPORARY TABLE IF NOT EXISTS responses_upload "
+                           "(position bigserial, student_id integer, question_id integer, answer integer) "
+                           "ON COMMIT DROP")
+            cursor.execute("TRUNCATE responses_upload")
+            cursor.copy_expert("COPY responses_upload (student_id, question_id, answer) FROM STDIN WITH (FORMAT csv)",
+                               buffer)
+            cursor.execute("DELETE FROM responses r USING responses_upload u "
+                           "WHERE r.student_id = u.student_id AND r.question_id = u.question_id")
+            # Faylda takrorlangan juftlardan oxirgisi olinadi
+            cursor.execute(
+                "INSERT INTO responses (test_id, student_id, question_id, answer) "
+                "SELECT DISTINCT ON (student_id, question_id) %s, student_id, question_id, answer "
+                "FROM responses_upload ORDER BY student_id, question_id, position DESC",
+                (test_id,)
+            )
+        finally:
+            cursor.close()
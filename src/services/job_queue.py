@@ -0,0 +1,226 @@
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from loguru import logger
+
+from src.models.database import engine
+from src.utils.metrics import JOBS, REGISTRY
+
+# Navbat sozlamalari
+MAX_WORKERS = int(os.getenv("ANALYSIS_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_PENDING = int(os.getenv("ANALYSIS_QUEUE_SIZE", "100"))
+JOB_TIMEOUT = float(os.getenv("ANALYSIS_TIMEOUT", "600"))
+
+# Tugagan vazifalar shuncha soniyadan keyin xotiradan o'chiriladi
+JOB_TTL = 3600
+
+# Ishchi metrikalarini progress navbati orqali yuboriladigan xabar belgisi
+_METRICS_MESSAGE = "__metrics__"
+
+# Ishchi jarayon holati: progress navbati va joriy vazifa ID si
+_progress_queue: Optional[multiprocessing.Queue] = None
+_current_job: Optional[str] = None
+
+
+class QueueFullError(Exception):
+    """Navbatda bo'sh joy qolmagan"""
+
+
+class JobTimeoutError(Exception):
+    """Vazifa ajratilgan vaqtdan oshib ketdi"""
+
+
+def _init_worker(progress_queue: multiprocessing.Queue) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+    # Ota jarayondan meros qolgan ulanishlar ishchida ishlatilmasligi kerak
+    engine.dispose(close=False)
+    # fork da nusxalangan ota jarayon metrikalari qayta yuborilmasligi uchun
+    REGISTRY.drain()
+
+
+def _raise_timeout(signum, frame) -> None:
+    raise JobTimeoutError("Vazifa vaqti tugadi")
+
+
+def report_progress(fraction: float, stage: str) -> None:
+    """Ishchi ichidan vazifa holatini yuborish (navbatdan tashqarida hech narsa qilmaydi)"""
+    if _progress_queue is not None and _current_job is not None:
+        _progress_queue.put((_current_job, fraction, stage))
+
+
+def _run_job(job_id: str, timeout: Optional[float], func: Callable, args: tuple, kwargs: dict) -> Any:
+    """Ishchi jarayonda vazifani vaqt chegarasi bilan bajarish"""
+    global _current_job
+    _current_job = job_id
+    report_progress(0.0, "running")
+    use_alarm = bool(timeout) and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        _current_job = None
+        # Vazifa davomida yig'ilgan metrikalar ota jarayonning /metrics iga qo'shiladi
+        if _progress_queue is not None:
+            snapshot = REGISTRY.drain()
+            if snapshot:
+                _progress_queue.put((_METRICS_MESSAGE, snapshot))
+
+
+class JobQueue:
+    """Tahlil vazifalari uchun ProcessPoolExecutor asosidagi navbat.
+
+    Bir vaqtda MAX_WORKERS ta vazifa bajariladi, kutayotganlar soni
+    MAX_PENDING bilan cheklanadi. Har bir vazifa ishchi jarayonda
+    JOB_TIMEOUT soniyadan keyin to'xtatiladi.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_pending: int = MAX_PENDING,
+                 timeout: float = JOB_TIMEOUT):
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._jobs: Dict[str, Dict] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._progress = multiprocessing.Queue()
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                             initargs=(self._progress,))
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+        self._listener.start()
+
+    def submit(self, func: Callable, *args, kind: str = "analysis", **kwargs) -> str:
+        """Vazifani navbatga qo'yish va uning ID sini qaytarish"""
+        with self._lock:
+            self._evict_finished()
+            if self.pending_count() >= self.max_pending:
+                raise QueueFullError("Tahlil navbati to'la, keyinroq urinib ko'ring")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "id": job_id,
+                "kind": kind,
+                "status": "queued",
+                "progress": 0.0,
+                "stage": "queued",
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+            }
+            future = self._executor.submit(_run_job, job_id, self.timeout, func, args, kwargs)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda done: self._finish(job_id, done))
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Vazifa holati (tugagan bo'lsa natijasi bilan)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job)
+            future = self._futures[job_id]
+        if job["status"] == "done":
+            job["result"] = future.result()
+        return job
+
+    def future(self, job_id: str) -> Future:
+        return self._futures[job_id]
+
+    def pending_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job["status"] in ("queued", "running"))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._progress.put(None)
+
+    def _finish(self, job_id: str, future: Future) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job["finished_at"] = time.time()
+            if future.cancelled():
+                job["status"] = "cancelled"
+            else:
+                error = future.exception()
+                if error is None:
+                    job.update(status="done", progress=1.0, stage="done")
+                else:
+                    job.update(status="timeout" if isinstance(error, JobTimeoutError) else "failed", error=str(error))
+                    logger.error(f"Vazifa {job_id} xatosi: {error}")
+        JOBS.inc(kind=job["kind"], status=job["status"])
+
+    def _listen(self) -> None:
+        """Ishchilardan kelgan progress xabarlarini qabul qilish"""
+        while True:
+            try:
+                message = self._progress.get(timeout=1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            if message is None:
+                return
+            if message[0] == _METRICS_MESSAGE:
+                REGISTRY.merge(message[1])
+                continue
+            job_id, fraction, stage = message
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job["status"] not in ("queued", "running"):
+                    continue
+                if job["status"] == "queued":
+                    job.update(status="running", started_at=time.time())
+                job.update(progress=fraction, stage=stage)
+
+    def _evict_finished(self) -> None:
+        threshold = time.time() - JOB_TTL
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["finished_at"] is not None and job["finished_at"] < threshold]
+        for job_id in expired:
+            del self._jobs[job_id]
+            del self._futures[job_id]
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Jarayon bo'yicha yagona navbat (birinchi chaqiruvda yaratiladi)"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
+
+
+def shutdown_job_queue() -> None:
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is not None:
+            _job_queue.shutdown()
+            _job_queue = None
+
+
+def queue_status() -> Dict:
+    """Navbat chuqurligi (/health va /metrics uchun); navbat hali yaratilmagan bo'lsa uni yaratmaydi"""
+    job_queue = _job_queue
+    if job_queue is None:
+        pending, max_pending = 0, MAX_PENDING
+    else:
+        with job_queue._lock:
+            pending, max_pending = job_queue.pending_count(), job_queue.max_pending
+    return {"pending": pending, "max_pending": max_pending, "full": pending >= max_pending}
+
+
+REGISTRY.gauge("rasch_queue_pending", "Navbatdagi va bajarilayotgan vazifalar",
+               function=lambda: queue_status()["pending"])
@@ -1,141 +1,394 @@
-import pandas as pd
+import json
 import numpy as np
-from typing import Dict, List, Tuple
-import subprocess
-import tempfile
-import os
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple, Union
 from loguru import logger
 
+from src.services.dif import dif_analysis
+from src.services.estimation import estimate_from_statistics, merge_groups, pattern_keys, solve_abilities
+from src.services.fit_statistics import fit_statistics, separation_reliability
+from src.services.response_matrix import ResponseMatrix
+from src.services.wright_map import bin_measures, render_wright_map
+from src.utils.metrics import ANALYZED_PERSONS, ESTIMATION_ITERATIONS, ESTIMATIONS, stage_timer
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Sertifikat darajalari (yuqoridan pastga) va ularning standart quyi chegaralari
+GRADE_LABELS = ('A+', 'A', 'B+', 'B', 'C+', 'C')
+DEFAULT_GRADE_CUTS = (70.0, 65.0, 60.0, 55.0, 50.0)
+
+# Standart shkala: 50 + 10 * theta
+DEFAULT_SCALE_SLOPE = 10.0
+DEFAULT_SCALE_INTERCEPT = 50.0
+
 class RaschService:
-    def __init__(self):
-        self.r_script_path = "src/r_scripts/rasch_analysis.R"
-    
-    def analyze_matrix(self, data_matrix: pd.DataFrame) -> Dict:
+    def __init__(self, scale_slope: float = DEFAULT_SCALE_SLOPE, scale_intercept: float = DEFAULT_SCALE_INTERCEPT,
+                 grade_cuts: Sequence[float] = DEFAULT_GRADE_CUTS):
+        if len(grade_cuts) != len(GRADE_LABELS) - 1:
+            raise ValueError(f"Darajalar uchun {len(GRADE_LABELS) - 1} ta chegara kerak")
+        if any(upper <= lower for upper, lower in zip(grade_cuts, grade_cuts[1:])):
+            raise ValueError("Daraja chegaralari kamayish tartibida bo'lishi kerak")
+        self.scale_slope = scale_slope
+        self.scale_intercept = scale_intercept
+        self.grade_cuts = tuple(float(cut) for cut in grade_cuts)
+        # np.digitize uchun o'sish tartibidagi chegaralar
+        self._ascending_cuts = np.array(self.grade_cuts[::-1])
+
+    @classmethod
+    def for_test(cls, test) -> "RaschService":
+        """Testning shkala va daraja sozlamalari bilan (Test.scale_*, Test.grade_cuts)"""
+        return cls(
+            scale_slope=DEFAULT_SCALE_SLOPE if test.scale_slope is None else test.scale_slope,
+            scale_intercept=DEFAULT_SCALE_INTERCEPT if test.scale_intercept is None else test.scale_intercept,
+            grade_cuts=json.loads(test.grade_cuts) if test.grade_cuts else DEFAULT_GRADE_CUTS,
+        )
+
+    def analyze_matrix(self, data_matrix: Union["pd.DataFrame", ResponseMatrix]) -> Dict:
         """Matrix ma'lumotlarini Rasch modeli bilan tahlil qilish"""
         try:
-            # Ma'lumotlarni tayyorlash
-            # Birinchi ustun - talabgor ismi, qolganlari - javoblar
-            student_names = data_matrix.iloc[:, 0].tolist()
-            response_data = data_matrix.iloc[:, 1:].values
-            
-            # NaN qiymatlarni 0 ga almashtirish
-            response_data = np.nan_to_num(response_data, nan=0)
-            
-            # Faqat 0 va 1 qiymatlarini qoldirish
-            response_data = np.where((response_data == 0) | (response_data == 1), response_data, 0)
-            
-            # DataFrame yaratish
-            df = pd.DataFrame(response_data, columns=[f'q{i+1}' for i in range(response_data.shape[1])])
-            df['student_name'] = student_names
-            
+            # Birinchi ustun - talabgor ismi, qolganlari - javoblar.
+            # Javoblar bitlarga joylanadi: 1 - to'g'ri, 0 - noto'g'ri,
+            # qolgani (NaN, yetib kelinmagan savollar) - yo'q qiymat
+            if isinstance(data_matrix, ResponseMatrix):
+                matrix = data_matrix
+            else:
+                with stage_timer("parse"):
+                    matrix = ResponseMatrix.from_dataframe(data_matrix)
+
             # Rasch tahlilini bajarish
-            results = self.run_rasch_analysis(df)
-            
+            results = self.run_rasch_analysis(matrix)
+
             # Natijalarni formatlash
-            formatted_results = self.format_results(results, student_names, df)
-            
+            with stage_timer("format"):
+                formatted_results = self.format_results(results, matrix.student_names, matrix)
+
             return formatted_results
-            
+
         except Exception as e:
             logger.error(f"Matrix tahlili xatosi: {str(e)}")
             raise
-    
-    def run_rasch_analysis(self, data: pd.DataFrame) -> Dict:
-        """1-bosqich: faqat oddiy ball hisoblash (R ishlatmasdan)"""
-        return self.simple_analysis(data)
 
-    def simple_analysis(self, data: pd.DataFrame) -> Dict:
+    def analyze_dif(self, matrix: ResponseMatrix, group_labels: Sequence, reference: Optional[str] = None) -> Dict:
+        """Guruhlar (hudud, jins, til va h.k.) bo'yicha savollar DIF tahlili.
+
+        group_labels - matritsa qatorlari tartibida har bir talabgor guruhi.
+        Har bir fokal guruh tayanch guruhga Mantel-Haenszel (xom ball
+        qatlamlari) va umumiy theta bo'yicha alohida baholangan qiyinliklar
+        farqi bilan solishtiriladi.
+        """
+        groups = matrix.score_groups()
+        estimates = estimate_from_statistics(groups)
+        result = dif_analysis(matrix, group_labels, estimates, groups, reference)
+        question_ids = (matrix.question_ids.tolist() if matrix.question_ids is not None
+                        else list(range(1, matrix.n_items + 1)))
+        comparisons = []
+        for comparison in result['comparisons']:
+            items = [
+                {'question_id': question_id, **{key: value[index] for key, value in comparison.items()
+                                                 if key != 'focal'}}
+                for index, question_id in enumerate(question_ids)
+            ]
+            flagged = sum(1 for item in items if item['ets_class'] in ('B', 'C'))
+            comparisons.append({'focal': comparison['focal'], 'flagged_items': flagged, 'items': items})
+        return {
+            'reference': result['reference'],
+            'group_sizes': result['group_sizes'],
+            'excluded_students': result['excluded'],
+            'difficulties': estimates['b'],
+            'comparisons': comparisons,
+        }
+
+    def run_rasch_analysis(self, matrix: ResponseMatrix) -> Dict:
+        """1PL Rasch modelini JML usulida baholash (NumPy, R ishlatmasdan)"""
+        with stage_timer("estimate"):
+            groups = matrix.score_groups()
+            estimates = estimate_from_statistics(groups)
+            statistics = self.score_statistics(groups)
+        ESTIMATION_ITERATIONS.observe(estimates['iterations'])
+        ESTIMATIONS.inc(converged=str(bool(estimates['converged'])).lower())
+        ANALYZED_PERSONS.inc(matrix.n_persons)
+
+        if not estimates['converged']:
+            logger.warning(f"Rasch baholash {estimates['iterations']} iteratsiyada yaqinlashmadi")
+
+        # Ball guruhlari natijalarini talabgorlarga tarqatish
+        inverse = groups['inverse']
+        abilities = estimates['theta'][inverse]
+        with stage_timer("fit"):
+            fit = fit_statistics(matrix, abilities, estimates['b'])
+        return {
+            'student_abilities': abilities,
+            'ability_se': estimates['theta_se'][inverse],
+            'question_difficulties': estimates['b'],
+            'difficulty_se': estimates['b_se'],
+            'person_fit': fit['persons'],
+            'item_fit': fit['items'],
+            'model_fit': self.model_fit(groups, estimates),
+            'reliability': statistics['reliability'],
+            'iterations': estimates['iterations'],
+            'converged': estimates['converged'],
+            'total_students': statistics['total_students'],
+            'total_questions': statistics['total_questions'],
+            'person_patterns': pattern_keys(groups)[inverse],
+            'state': self.analysis_state(groups, estimates),
+            'score_table': self.build_score_table(estimates['b'])
+        }
+
+    def analysis_state(self, groups: Dict, estimates: Dict) -> Dict:
+        """Keyingi qo'shimcha baholash uchun yetarli statistikalar va parametrlar"""
+        state = {key: groups[key] for key in ('scores', 'counts', 'observed', 'item_scores', 'item_counts',
+                                              'n_persons', 'n_items')}
+        state.update(theta=estimates['theta'], theta_se=estimates['theta_se'],
+                     b=estimates['b'], b_se=estimates['b_se'])
+        return state
+
+    def update_analysis(self, state: Dict, matrix: ResponseMatrix, anchored: bool = False) -> Dict:
+        """Oldingi tahlilga faqat yangi talabgorlarni qo'shish.
+
+        Yangi qatorlar guruhlari saqlangan yetarli statistikalarga qo'shiladi
+        va savollar oldingi qiyinliklardan iliq start bilan qayta baholanadi.
+        anchored=True bo'lsa savollar qayta kalibrlanmaydi: yangi talabgorlar
+        saqlangan qiyinliklar bo'yicha baholanadi. Natijada yangi talabgorlar
+        baholari, birlashgan holat va guruhlar bo'yicha xulosa qaytadi.
+        """
+        with stage_timer("estimate"):
+            new_groups = matrix.score_groups()
+            merged = merge_groups(state, new_groups)
+            n_previous = state['scores'].size
+            if anchored:
+                theta, theta_se = solve_abilities(state['b'], merged['scores'], merged['observed'])
+                estimates = {'theta': theta, 'theta_se': theta_se, 'b': state['b'], 'b_se': state['b_se'],
+                             'iterations': 0, 'converged': True}
+            else:
+                initial_theta = np.full(merged['scores'].size, np.nan)
+                initial_theta[merged['merged_index'][:n_previous]] = state['theta']
+                estimates = estimate_from_statistics(merged, initial_b=state['b'], initial_theta=initial_theta)
+        if not anchored:
+            ESTIMATION_ITERATIONS.observe(estimates['iterations'])
+            ESTIMATIONS.inc(converged=str(bool(estimates['converged'])).lower())
+            if not estimates['converged']:
+                logger.warning(f"Qo'shimcha baholash {estimates['iterations']} iteratsiyada yaqinlashmadi")
+        ANALYZED_PERSONS.inc(matrix.n_persons)
+
+        new_index = merged['merged_index'][n_previous:][new_groups['inverse']]
+        keys = pattern_keys(merged)
+        # Moslik faqat yangi talabgorlar uchun; savollar va oldingi talabgorlar
+        # statistikasi to'liq tahlilda yangilanadi
+        with stage_timer("fit"):
+            person_fit = fit_statistics(matrix, estimates['theta'][new_index], estimates['b'])['persons']
+        scaled_scores = self.scale_scores(estimates['theta'])
+        grades = self.grade_labels(self.assign_grades(scaled_scores))
+        previous_index = merged['merged_index'][:n_previous]
+        return {
+            'student_abilities': estimates['theta'][new_index],
+            'ability_se': estimates['theta_se'][new_index],
+            'scaled_scores': scaled_scores[new_index],
+            'grades': grades[new_index],
+            'person_fit': person_fit,
+            'question_difficulties': estimates['b'],
+            'difficulty_se': estimates['b_se'],
+            'person_patterns': keys[new_index],
+            # Oldingi talabgorlar guruhlari: (maska kaliti, ball) -> yangi theta
+            'previous_groups': {
+                'patterns': keys[previous_index],
+                'scores': state['scores'],
+                'theta': estimates['theta'][previous_index],
+                'theta_se': estimates['theta_se'][previous_index],
+                'scaled_scores': scaled_scores[previous_index],
+                'grades': grades[previous_index],
+            },
+            'iterations': estimates['iterations'],
+            'converged': estimates['converged'],
+            'state': self.analysis_state(merged, estimates),
+            'score_table': self.build_score_table(estimates['b']),
+            **self.group_summary(merged, estimates),
+        }
+
+    def build_score_table(self, difficulties: np.ndarray) -> Dict:
+        """Xom ball -> theta jadvali (indeks - xom ball, 0..L).
+
+        Qiyinliklar qat'iy bo'lganda barcha savollarga javob bergan
+        talabgorning theta si faqat xom balliga bog'liq, shuning uchun
+        jadval bir marta (L+1 ta ball uchun) hisoblanadi va baholash massiv
+        indeksiga aylanadi. 0 va maksimal ballar EXTREME_ADJUSTMENT bilan.
+        """
+        difficulties = np.asarray(difficulties, dtype=np.float64)
+        theta, theta_se = solve_abilities(difficulties, np.arange(difficulties.size + 1))
+        return {'theta': theta, 'theta_se': theta_se}
+
+    def score_from_table(self, table: Dict, raw_scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Xom ballarni jadval orqali theta va SE ga aylantirish (iteratsiyasiz)"""
+        raw_scores = np.asarray(raw_scores, dtype=np.int64)
+        if raw_scores.size and (raw_scores.min() < 0 or raw_scores.max() >= table['theta'].size):
+            raise ValueError(f"Xom ball 0 va {table['theta'].size - 1} oralig'ida bo'lishi kerak")
+        return table['theta'][raw_scores], table['theta_se'][raw_scores]
+
+    def score_matrix(self, table: Dict, difficulties: np.ndarray,
+                     matrix: ResponseMatrix) -> Tuple[np.ndarray, np.ndarray]:
+        """Javoblar matritsasini qat'iy qiyinliklar bo'yicha baholash.
+
+        To'liq javob berganlar jadvaldan olinadi; javobsiz savollari
+        borlar uchun faqat noyob (maska, ball) guruhlari yechiladi.
+        """
+        if matrix.n_items != table['theta'].size - 1:
+            raise ValueError(f"Javoblar soni testdagi savollar soniga ({table['theta'].size - 1}) mos emas")
+        if matrix.missing is None:
+            return self.score_from_table(table, matrix.row_sums())
+        groups = matrix.score_groups()
+        theta, theta_se = solve_abilities(difficulties, groups['scores'], groups['observed'])
+        return theta[groups['inverse']], theta_se[groups['inverse']]
+
+    def model_fit(self, groups: Dict, estimates: Dict) -> Dict:
+        """Talabgorlar va savollar ajratish indeksi va ishonchliligi (ekstremallarsiz)"""
+        scores = groups['scores']
+        answered = groups['n_items'] if groups['observed'] is None else groups['observed'].sum(axis=1)
+        weights = groups['counts'] * ((scores > 0) & (scores < answered))
+        person_separation, person_reliability = separation_reliability(
+            estimates['theta'], estimates['theta_se'], weights
+        )
+        extreme_items = (groups['item_scores'] == 0) | (groups['item_scores'] == groups['item_counts'])
+        item_separation, item_reliability = separation_reliability(
+            estimates['b'], estimates['b_se'], (~extreme_items).astype(np.float64)
+        )
+        return {
+            'person_separation': person_separation,
+            'person_reliability': person_reliability,
+            'item_separation': item_separation,
+            'item_reliability': item_reliability,
+        }
+
+    def group_summary(self, groups: Dict, estimates: Dict) -> Dict:
+        """Talabgorlar bo'yicha xulosani guruhlar va ularning sonlaridan hisoblash"""
+        statistics = self.score_statistics(groups)
+        counts = groups['counts']
+        theta = estimates['theta']
+        answered = np.isfinite(theta)
+        return {
+            'total_students': statistics['total_students'],
+            'total_questions': statistics['total_questions'],
+            'avg_ability': np.average(theta[answered], weights=counts[answered]) if answered.any() else np.nan,
+            'max_ability': np.max(theta[answered]) if answered.any() else np.nan,
+            'min_ability': np.min(theta[answered]) if answered.any() else np.nan,
+            'avg_difficulty': np.mean(estimates['b']),
+            'reliability': statistics['reliability'],
+            'model_fit': self.model_fit(groups, estimates),
+            'grade_distribution': self.calculate_grades(self.assign_grades(self.scale_scores(theta)), counts),
+        }
+
+    def simple_analysis(self, matrix: ResponseMatrix) -> Dict:
         """Oddiy statistika hisoblash (R ishlamasa)"""
-        response_data = data.iloc[:, :-1].values  # student_name ustunini olib tashlash
-        
-        # Talabgorlar qobiliyati (to'g'ri javoblar foizi)
-        student_abilities = np.mean(response_data, axis=1) * 100
-        
+        return self.score_statistics(matrix.score_groups())
+
+    def score_statistics(self, groups: Dict) -> Dict:
+        """Ball guruhlari va savol marginallaridan oddiy statistika hisoblash"""
+        scores = groups['scores'].astype(np.float64)
+        counts = groups['counts']
+        n_persons = groups['n_persons']
+        n_questions = groups['n_items']
+        n_answered = n_questions if groups['observed'] is None else groups['observed'].sum(axis=1)
+
+        # Talabgorlar qobiliyati (kuzatilgan savollar bo'yicha to'g'ri javoblar foizi).
+        # Talabgorlarga moslik (inverse) bo'lmasa guruhlar bo'yicha qaytariladi
+        with np.errstate(invalid='ignore', divide='ignore'):
+            student_abilities = scores / n_answered * 100
+        if groups.get('inverse') is not None:
+            student_abilities = student_abilities[groups['inverse']]
+
         # Savollar qiyinligi (noto'g'ri javoblar foizi)
-        question_difficulties = (1 - np.mean(response_data, axis=0)) * 100
-        
-        # Ishonchlilik (Cronbach's Alpha)
-        n_questions = response_data.shape[1]
+        p_correct = groups['item_scores'] / np.maximum(groups['item_counts'], 1)
+        question_difficulties = (1 - p_correct) * 100
+
+        # Ishonchlilik (Cronbach's Alpha): 0/1 savol dispersiyasi p(1-p)
         if n_questions > 1:
-            variance_total = np.var(np.sum(response_data, axis=1))
-            variance_items = np.sum(np.var(response_data, axis=0))
+            mean_score = counts @ scores / n_persons
+            variance_total = counts @ (scores - mean_score) ** 2 / n_persons
+            variance_items = np.sum(p_correct * (1 - p_correct))
             reliability = (n_questions / (n_questions - 1)) * (1 - variance_items / variance_total)
         else:
             reliability = 0.0
-        
+
         return {
             'student_abilities': student_abilities,
             'question_difficulties': question_difficulties,
             'reliability': reliability,
-            'total_students': len(student_abilities),
+            'total_students': n_persons,
             'total_questions': n_questions
         }
-    
-    def _parse_r_output(self, output: str, data: pd.DataFrame) -> Dict:
-        """R natijalarini parse qilish"""
-        try:
-            # Bu yerda R natijalarini parse qilish logikasi
-            # Hozircha oddiy hisoblash qaytaraman
-            return self.simple_analysis(data)
-        except Exception as e:
-            logger.error(f"R natijalarini parse qilish xatosi: {str(e)}")
-            return self.simple_analysis(data)
-    
-    def format_results(self, results: Dict, student_names: List[str], data: pd.DataFrame) -> Dict:
+
+    def format_results(self, results: Dict, student_names: List[str], data: ResponseMatrix) -> Dict:
         """Natijalarni formatlash"""
         student_abilities = results.get('student_abilities', [])
         question_difficulties = results.get('question_difficulties', [])
         reliability = results.get('reliability', 0.0)
         
-        # Talabgorlar va ularning ballarini birlashtirish
-        student_scores = list(zip(student_names, student_abilities))
-        student_scores.sort(key=lambda x: x[1], reverse=True)
+        # Eng yaxshi talabgorlar (butun kogortani saralamasdan)
+        abilities = np.asarray(student_abilities)
+        top_count = min(5, abilities.size)
+        top_index = np.argpartition(-abilities, top_count - 1)[:top_count]
+        top_index = top_index[np.argsort(-abilities[top_index], kind='stable')]
+        student_scores = [(student_names[i], student_abilities[i]) for i in top_index]
         
-        # Sertifikat darajalarini hisoblash
-        grade_distribution = self.calculate_grades(student_abilities)
-        
-        # Model mosligi (oddiy korrelyatsiya)
-        model_fit = reliability  # Hozircha ishonchlilikni model mosligi sifatida ishlatamiz
+        # Shkala ballari va sertifikat darajalari
+        scaled_scores = self.scale_scores(abilities)
+        grade_index = self.assign_grades(scaled_scores)
+        grade_distribution = self.calculate_grades(grade_index)
         
         return {
             'total_students': len(student_abilities),
             'total_questions': len(question_difficulties),
-            'avg_ability': np.mean(student_abilities),
-            'max_ability': np.max(student_abilities),
-            'min_ability': np.min(student_abilities),
+            'avg_ability': np.nanmean(student_abilities),
+            'max_ability': np.nanmax(student_abilities),
+            'min_ability': np.nanmin(student_abilities),
             'avg_difficulty': np.mean(question_difficulties),
             'reliability': reliability,
-            'model_fit': model_fit,
+            'model_fit': results.get('model_fit'),
             'grade_distribution': grade_distribution,
             'top_students': student_scores[:5],  # Top 5 talabgor
             'student_abilities': student_abilities,
-            'question_difficulties': question_difficulties
+            'question_difficulties': question_difficulties,
+            'ability_se': results.get('ability_se'),
+            'difficulty_se': results.get('difficulty_se'),
+            'scaled_scores': scaled_scores,
+            'grades': self.grade_labels(grade_index),
+            'person_fit': results.get('person_fit'),
+            'item_fit': results.get('item_fit'),
+            'iterations': results.get('iterations', 0),
+            'converged': results.get('converged', True),
+            'person_patterns': results.get('person_patterns'),
+            'state': results.get('state'),
+            'score_table': results.get('score_table')
         }
     
-    def calculate_grades(self, ability_scores: List[float]) -> Dict[str, int]:
-        """Qobiliyat ballarini sertifikat darajalariga aylantirish"""
-        grades = {
-            'A+': 0, 'A': 0, 'B+': 0, 'B': 0, 'C+': 0, 'C': 0
-        }
-        
-        for score in ability_scores:
-            if score >= 80:
-                grades['A+'] += 1
-            elif score >= 70:
-                grades['A'] += 1
-            elif score >= 60:
-                grades['B+'] += 1
-            elif score >= 50:
-                grades['B'] += 1
-            elif score >= 40:
-                grades['C+'] += 1
-            else:
-                grades['C'] += 1
-        
-        return grades
+    def scale_scores(self, abilities: np.ndarray) -> np.ndarray:
+        """Theta ni test shkalasiga o'tkazish (chiziqli: intercept + slope * theta)"""
+        return self.scale_intercept + self.scale_slope * np.asarray(abilities, dtype=np.float64)
+
+    def assign_grades(self, scaled_scores: np.ndarray) -> np.ndarray:
+        """Shkala ballarini GRADE_LABELS indekslariga aylantirish (baholanmaganlar -1)"""
+        scaled_scores = np.asarray(scaled_scores, dtype=np.float64)
+        grade_index = len(self.grade_cuts) - np.digitize(scaled_scores, self._ascending_cuts)
+        grade_index[np.isnan(scaled_scores)] = -1
+        return grade_index
+
+    def grade_labels(self, grade_index: np.ndarray) -> np.ndarray:
+        """Daraja indekslaridan nomlar massivi (baholanmaganlar None)"""
+        labels = np.array(GRADE_LABELS + (None,), dtype=object)
+        return labels[grade_index]
+
+    def calculate_grades(self, grade_index: np.ndarray, weights: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """Darajalar taqsimoti (weights - guruhlar bo'yicha hisoblanganda talabgorlar soni)"""
+        grade_index = np.asarray(grade_index)
+        graded = grade_index >= 0
+        counts = np.bincount(grade_index[graded], weights=None if weights is None else weights[graded],
+                             minlength=len(GRADE_LABELS))
+        return {label: int(count) for label, count in zip(GRADE_LABELS, counts)}
     
-    def create_wright_map(self, difficulty_params: List[float], ability_params: List[float]) -> str:
-        """Rayt xaritasi yaratish"""
-        # Bu yerda Rayt xaritasi yaratish logikasi
-        # Hozircha oddiy matn qaytaraman
-        return "Rayt xaritasi yaratildi"
+    def create_wright_map(self, difficulty_params: np.ndarray, ability_params: np.ndarray,
+                          ability_weights: Optional[np.ndarray] = None, image_format: str = "png") -> bytes:
+        """Rayt xaritasini (talabgorlar va savollar logit shkalasida) PNG yoki SVG ga chizish.
+
+        Talabgorlar har biri alohida emas, np.histogram oraliqlari bo'yicha
+        chiziladi; ability_weights bilan guruhlar theta si ham berilishi mumkin.
+        """
+        bins = bin_measures(ability_params, difficulty_params, ability_weights)
+        return render_wright_map(bins, image_format)
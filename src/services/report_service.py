@@ -0,0 +1,189 @@
+import os
+import tempfile
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator, List, Optional
+
+from src.models.database import AnalysisRun, SessionLocal, Test
+from src.services.results_store import ResultsStore
+
+REPORT_FORMATS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+}
+
+# Tayyor fayl mijozga shu hajmdagi bo'laklarda uzatiladi
+STREAM_CHUNK = 1 << 16
+
+# PDF sahifasidagi jadval qatorlari va katakdagi matn uzunligi
+PDF_ROWS_PER_PAGE = 45
+PDF_CELL_CHARS = 60
+
+# Bitta PDF qismidagi talabgorlar soni: katta kogorta shu hajmdagi alohida hujjatlarga bo'linadi
+PDF_PART_ROWS = int(os.getenv("REPORT_PDF_PART_ROWS", "5000"))
+
+PERSON_COLUMNS = ("Talabgor", "Xom ball", "Theta", "SE", "Ball", "Daraja", "Infit MNSQ", "Outfit MNSQ")
+ITEM_COLUMNS = ("Savol ID", "Savol", "Qiyinlik (b)", "SE", "Infit MNSQ", "Infit ZSTD", "Outfit MNSQ", "Outfit ZSTD")
+SUMMARY_LABELS = (
+    ("total_students", "Jami talabgorlar"),
+    ("total_questions", "Jami savollar"),
+    ("avg_ability", "O'rtacha qobiliyat (logit)"),
+    ("max_ability", "Eng yuqori qobiliyat"),
+    ("min_ability", "Eng past qobiliyat"),
+    ("avg_difficulty", "O'rtacha qiyinlik (logit)"),
+    ("reliability", "Ishonchlilik (alpha)"),
+)
+
+
+def _format_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)[:PDF_CELL_CHARS]
+
+
+class ReportService:
+    """Saqlangan tahlil natijalaridan Excel va PDF hisobotlar.
+
+    Talabgorlar qatorlari bazadan bo'laklab o'qiladi va darhol yoziladi:
+    Excel openpyxl write-only rejimida, PDF reportlab da sahifama-sahifa.
+
+    reportlab Canvas barcha sahifalar mazmunini save() gacha saqlaydi,
+    shuning uchun PDF PDF_PART_ROWS talabgorlik qismlarga bo'linadi (part,
+    1 dan pdf_parts gacha): har bir qism alohida hujjat, xotira va birinchi
+    baytgacha vaqt kogorta hajmiga emas, qism hajmiga bog'liq. Birinchi
+    qismda xulosa va savollar statistikasi ham bo'ladi. Excel bitta faylda,
+    xotira kogorta hajmiga deyarli bog'liq emas, lekin fayl save() da
+    yakunlanadi: birinchi bayt hisobot to'liq yozilgandan keyin yuboriladi.
+    """
+
+    def __init__(self, results_store: Optional[ResultsStore] = None):
+        self.results_store = results_store or ResultsStore()
+
+    @staticmethod
+    def report_parts(run: AnalysisRun, report_format: str) -> int:
+        """Hisobot qismlari soni (Excel doim bitta fayl)"""
+        if report_format != "pdf":
+            return 1
+        return max(1, -(-(run.total_students or 0) // PDF_PART_ROWS))
+
+    def write_report(self, db, test: Test, run: AnalysisRun, report_format: str, file: BinaryIO,
+                     part: int = 1) -> None:
+        parts = self.report_parts(run, report_format)
+        if not 1 <= part <= parts:
+            raise ValueError(f"Hisobot {parts} qismdan iborat, qism raqami 1..{parts} bo'lishi kerak")
+        if report_format == "xlsx":
+            self._write_excel(db, test, run, file)
+        elif report_format == "pdf":
+            self._write_pdf(db, test, run, file, part, parts)
+        else:
+            raise ValueError(f"Noma'lum hisobot formati: {report_format}")
+
+    def stream_report(self, test_id: int, run_id: int, report_format: str, part: int = 1) -> Iterator[bytes]:
+        """StreamingResponse uchun: hisobot (qismi)ni vaqtinchalik faylga yozib bo'laklab qaytarish.
+
+        Fayl to'liq yozilgach (write_report) uzatiladi, tayyor faylni xotiraga
+        o'qimaslik uchun bo'laklanadi. So'rov sessiyasi javob uzatilishidan
+        oldin yopilishi mumkin, shuning uchun generator o'z sessiyasini ochadi.
+        """
+        with tempfile.TemporaryFile() as file:
+            db = SessionLocal()
+            try:
+                self.write_report(db, db.get(Test, test_id), db.get(AnalysisRun, run_id), report_format, file,
+                                  part)
+            finally:
+                db.close()
+            file.seek(0)
+            while True:
+                chunk = file.read(STREAM_CHUNK)
+                if not chunk:
+                    break
+                yield chunk
+
+    def _summary_rows(self, test: Test, run: AnalysisRun) -> List[tuple]:
+        summary = self.results_store.summary(run)
+        rows = [("Test", test.name), ("Fan", test.subject), ("Tahlil", f"#{run.id} ({summary['mode']})")]
+        rows += [(label, summary.get(field)) for field, label in SUMMARY_LABELS]
+        # Eski tahlillarda model_fit bitta son (alpha) sifatida saqlangan
+        model_fit = summary.get("model_fit") if isinstance(summary.get("model_fit"), dict) else {}
+        rows += [
+            ("Talabgorlar ajratilishi", model_fit.get("person_separation")),
+            ("Talabgorlar ishonchliligi", model_fit.get("person_reliability")),
+            ("Savollar ajratilishi", model_fit.get("item_separation")),
+            ("Savollar ishonchliligi", model_fit.get("item_reliability")),
+        ]
+        rows += [(f"Daraja {grade}", count) for grade, count in summary["grade_distribution"].items()]
+        return rows
+
+    def _write_excel(self, db, test: Test, run: AnalysisRun, file: BinaryIO) -> None:
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Xulosa")
+        for row in self._summary_rows(test, run):
+            sheet.append(row)
+
+        sheet = workbook.create_sheet("Talabgorlar")
+        sheet.append(PERSON_COLUMNS)
+        for row in self.results_store.iter_person_rows(db, run):
+            sheet.append(tuple(row))
+
+        sheet = workbook.create_sheet("Savollar")
+        sheet.append(ITEM_COLUMNS)
+        for row in self.results_store.item_report_rows(db, run):
+            sheet.append(row)
+
+        workbook.save(file)
+
+    def _write_pdf(self, db, test: Test, run: AnalysisRun, file: BinaryIO, part: int = 1, parts: int = 1) -> None:
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+        from reportlab.platypus import Table, TableStyle
+
+        page_width, page_height = A4
+        margin = 36
+        style = TableStyle([
+            ("FONTSIZE", (0, 0), (-1, -1), 8),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#DDE4F0")),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("TOPPADDING", (0, 0), (-1, -1), 1),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 1),
+        ])
+        pdf = canvas.Canvas(file, pagesize=A4, pageCompression=1)
+        suffix = f" ({part}/{parts}-qism)" if parts > 1 else ""
+        pdf.setTitle(f"{test.name} - Rasch natijalari{suffix}")
+        page = 0
+
+        def draw_page(title: str, rows: Iterable[tuple], header: Optional[tuple] = None) -> None:
+            # Har bir sahifa jadvali chizilgach tashlanadi
+            nonlocal page
+            page += 1
+            data = ([header] if header else []) + [[_format_cell(value) for value in row] for row in rows]
+            table = Table(data, style=style)
+            _, height = table.wrapOn(pdf, page_width - 2 * margin, page_height - 3 * margin)
+            pdf.setFont("Helvetica-Bold", 12)
+            pdf.drawString(margin, page_height - margin, title)
+            table.drawOn(pdf, margin, page_height - 1.5 * margin - height)
+            pdf.setFont("Helvetica", 8)
+            pdf.drawRightString(page_width - margin, margin / 2, str(page))
+            pdf.showPage()
+
+        if part == 1:
+            draw_page(f"{test.name} - Rasch tahlili natijalari{suffix}", self._summary_rows(test, run))
+
+        persons = self.results_store.iter_person_rows(db, run, offset=(part - 1) * PDF_PART_ROWS,
+                                                      limit=PDF_PART_ROWS)
+        while True:
+            rows = list(islice(persons, PDF_ROWS_PER_PAGE))
+            if not rows:
+                break
+            draw_page(f"Talabgorlar natijalari{suffix}", rows, PERSON_COLUMNS)
+
+        if part == 1:
+            items = self.results_store.item_report_rows(db, run)
+            for start in range(0, len(items), PDF_ROWS_PER_PAGE):
+                draw_page("Savollar statistikasi", items[start:start + PDF_ROWS_PER_PAGE], ITEM_COLUMNS)
+
+        pdf.save()
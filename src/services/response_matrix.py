@@ -0,0 +1,152 @@
+import io
+import numpy as np
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from src.services.estimation import group_scores
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Bir vaqtda yoyiladigan qatorlar soni (xotira chegarasi)
+CHUNK_ROWS = 65536
+
+# Har bir bayt uchun bitlar soni
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class ResponseMatrix:
+    """Javoblar matritsasining ixcham ko'rinishi.
+
+    Javoblar har bir qator uchun np.packbits bilan bitlarga joylanadi
+    (bir javobga 1 bit), yo'q qiymatlar esa alohida bit-maskada saqlanadi.
+    Yo'q qiymat bo'lmasa maska saqlanmaydi. 1M x 100 sessiya ~13 MB oladi.
+    """
+
+    def __init__(self, answers: np.ndarray, n_items: int, missing: Optional[np.ndarray] = None,
+                 student_names: Optional[List[str]] = None, student_ids: Optional[np.ndarray] = None,
+                 question_ids: Optional[np.ndarray] = None):
+        self.answers = answers
+        self.missing = missing
+        self.n_items = n_items
+        self.n_persons = answers.shape[0]
+        self.student_names = student_names if student_names is not None else list(range(self.n_persons))
+        # Bazadan yuklanganda qator/ustunlarga mos ID lar
+        self.student_ids = student_ids
+        self.question_ids = question_ids
+
+    @classmethod
+    def from_array(cls, values: np.ndarray, student_names: Optional[List[str]] = None) -> "ResponseMatrix":
+        """Zich massivdan yaratish: 1 - to'g'ri, 0 - noto'g'ri, qolgani (NaN va h.k.) - yo'q qiymat"""
+        values = np.asarray(values)
+        n_persons, n_items = values.shape
+        n_bytes = (n_items + 7) // 8
+        answers = np.empty((n_persons, n_bytes), dtype=np.uint8)
+        missing = np.empty((n_persons, n_bytes), dtype=np.uint8)
+        for start in range(0, n_persons, CHUNK_ROWS):
+            block = np.asarray(values[start:start + CHUNK_ROWS], dtype=np.float64)
+            answers[start:start + CHUNK_ROWS] = np.packbits(block == 1, axis=1)
+            missing[start:start + CHUNK_ROWS] = np.packbits((block != 0) & (block != 1), axis=1)
+        return cls(answers, n_items, missing if missing.any() else None, student_names)
+
+    @classmethod
+    def from_dataframe(cls, data_matrix: "pd.DataFrame") -> "ResponseMatrix":
+        """Birinchi ustun - talabgor ismi, qolganlari - javoblar"""
+        import pandas as pd
+
+        student_names = data_matrix.iloc[:, 0].tolist()
+        values = data_matrix.iloc[:, 1:].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+        return cls.from_array(values, student_names)
+
+    def to_bytes(self) -> bytes:
+        """Siqilgan npz ko'rinishida saqlash (bot sessiyalari uchun)"""
+        buffer = io.BytesIO()
+        arrays = {
+            'answers': self.answers,
+            'n_items': np.array(self.n_items),
+            'student_names': np.array([str(name) for name in self.student_names]),
+        }
+        if self.missing is not None:
+            arrays['missing'] = self.missing
+        np.savez_compressed(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ResponseMatrix":
+        with np.load(io.BytesIO(data)) as arrays:
+            missing = arrays['missing'] if 'missing' in arrays.files else None
+            return cls(arrays['answers'], int(arrays['n_items']), missing, arrays['student_names'].tolist())
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.n_persons, self.n_items
+
+    @property
+    def nbytes(self) -> int:
+        return self.answers.nbytes + (self.missing.nbytes if self.missing is not None else 0)
+
+    def iter_chunks(self, chunk_rows: int = CHUNK_ROWS) -> Iterator[Tuple[slice, np.ndarray, np.ndarray]]:
+        """Qatorlar bo'laklarini uint8 javoblar va kuzatilgan maskaga yoyish"""
+        for start in range(0, self.n_persons, chunk_rows):
+            rows = slice(start, min(start + chunk_rows, self.n_persons))
+            block = np.unpackbits(self.answers[rows], axis=1, count=self.n_items)
+            if self.missing is None:
+                observed = np.ones_like(block)
+            else:
+                observed = 1 - np.unpackbits(self.missing[rows], axis=1, count=self.n_items)
+            yield rows, block, observed
+
+    def to_dense(self) -> np.ndarray:
+        """uint8 0/1 matritsa (yo'q qiymatlar 0)"""
+        return np.unpackbits(self.answers, axis=1, count=self.n_items)
+
+    def row_sums(self) -> np.ndarray:
+        """Talabgorlar xom ballari (to'g'ri javoblar soni)"""
+        return self._packed_row_sums(self.answers)
+
+    def row_counts(self) -> np.ndarray:
+        """Har bir talabgor uchun kuzatilgan javoblar soni"""
+        if self.missing is None:
+            return np.full(self.n_persons, self.n_items, dtype=np.int64)
+        return self.n_items - self._packed_row_sums(self.missing)
+
+    def column_sums(self) -> np.ndarray:
+        """Savollar bo'yicha to'g'ri javoblar soni"""
+        totals = np.zeros(self.n_items, dtype=np.int64)
+        for start in range(0, self.n_persons, CHUNK_ROWS):
+            block = np.unpackbits(self.answers[start:start + CHUNK_ROWS], axis=1, count=self.n_items)
+            totals += block.sum(axis=0, dtype=np.int64)
+        return totals
+
+    def column_counts(self) -> np.ndarray:
+        """Savollar bo'yicha kuzatilgan javoblar soni"""
+        if self.missing is None:
+            return np.full(self.n_items, self.n_persons, dtype=np.int64)
+        totals = np.full(self.n_items, self.n_persons, dtype=np.int64)
+        for start in range(0, self.n_persons, CHUNK_ROWS):
+            block = np.unpackbits(self.missing[start:start + CHUNK_ROWS], axis=1, count=self.n_items)
+            totals -= block.sum(axis=0, dtype=np.int64)
+        return totals
+
+    def missing_patterns(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Noyob kuzatilgan savollar maskalari (K x L) va har bir talabgorning maska raqami"""
+        if self.missing is None:
+            return np.ones((1, self.n_items), dtype=bool), np.zeros(self.n_persons, dtype=np.int64)
+        n_bytes = self.missing.shape[1]
+        keys = np.ascontiguousarray(self.missing).view(np.dtype((np.void, n_bytes))).ravel()
+        unique_keys, index = np.unique(keys, return_inverse=True)
+        packed = np.frombuffer(unique_keys.tobytes(), dtype=np.uint8).reshape(-1, n_bytes)
+        return np.unpackbits(packed, axis=1, count=self.n_items) == 0, index
+
+    def score_groups(self) -> Dict:
+        """Baholash uchun yetarli statistikalar (estimation.group_scores)"""
+        if self.missing is None:
+            return group_scores(self.row_sums(), self.column_sums())
+        patterns, index = self.missing_patterns()
+        return group_scores(self.row_sums(), self.column_sums(), patterns, index, self.column_counts())
+
+    @staticmethod
+    def _packed_row_sums(packed: np.ndarray) -> np.ndarray:
+        totals = np.empty(packed.shape[0], dtype=np.int64)
+        for start in range(0, packed.shape[0], CHUNK_ROWS):
+            totals[start:start + CHUNK_ROWS] = _POPCOUNT[packed[start:start + CHUNK_ROWS]].sum(axis=1)
+        return totals
@@ -0,0 +1,350 @@
+import io
+import json
+import numpy as np
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from src.models.database import AnalysisRun, ItemEstimate, PersonEstimate, Question, ScoreConversion, Student, Test
+from src.services.response_matrix import ResponseMatrix
+from src.utils.serialization import to_builtin
+
+# AnalysisRun.summary ga yoziladigan umumiy ko'rsatkichlar
+SUMMARY_FIELDS = (
+    'total_students', 'total_questions', 'avg_ability', 'max_ability', 'min_ability',
+    'avg_difficulty', 'reliability', 'model_fit', 'grade_distribution', 'top_students',
+)
+
+# Talabgor natijalari shu hajmdagi paketlarda yoziladi
+INSERT_BATCH = 50000
+
+# Talabgor va savol baholari yonida saqlanadigan moslik statistikalari
+FIT_FIELDS = ('infit_mnsq', 'infit_zstd', 'outfit_mnsq', 'outfit_zstd')
+
+# AnalysisRun.state dagi massivlar (observed faqat yo'q qiymatlar bo'lsa saqlanadi)
+STATE_ARRAYS = ('scores', 'counts', 'observed', 'item_scores', 'item_counts',
+                'theta', 'theta_se', 'b', 'b_se', 'question_ids')
+
+
+def bump_data_version(db: Session, test_id: int) -> None:
+    """Test javoblari o'zgarganini belgilash (saqlangan natijalar eskiradi)"""
+    db.execute(update(Test).where(Test.id == test_id).values(data_version=Test.data_version + 1))
+
+
+class ResultsStore:
+    """Tahlil natijalarini Test.data_version bo'yicha saqlash va qayta berish.
+
+    Natija yangi javoblar kelguncha (data_version oshguncha) amal qiladi,
+    shuning uchun natijalarni o'qish hech qachon qayta baholashni
+    boshlamaydi.
+    """
+
+    def latest_run(self, db: Session, test_id: int) -> Optional[AnalysisRun]:
+        return db.execute(
+            select(AnalysisRun).where(AnalysisRun.test_id == test_id).order_by(AnalysisRun.id.desc()).limit(1)
+        ).scalar_one_or_none()
+
+    def get_current_run(self, db: Session, test: Test) -> Optional[AnalysisRun]:
+        """Testning joriy ma'lumotlar versiyasiga mos natija (bo'lmasa None)"""
+        run = self.latest_run(db, test.id)
+        if run is None or run.data_version != test.data_version:
+            return None
+        return run
+
+    def save_run(self, db: Session, test_id: int, data_version: int, matrix: ResponseMatrix,
+                 results: Dict, last_response_id: Optional[int] = None) -> AnalysisRun:
+        """Natijalarni saqlash: xulosa, talabgor va savol baholari, Question.difficulty_b"""
+        run = AnalysisRun(
+            test_id=test_id,
+            data_version=data_version,
+            mode='full',
+            last_response_id=last_response_id,
+            state=self._pack_state(results.get('state'), matrix.question_ids),
+            total_students=int(results['total_students']),
+            total_questions=int(results['total_questions']),
+            reliability=to_builtin(results['reliability']),
+            iterations=int(results.get('iterations', 0)),
+            converged=bool(results.get('converged', True)),
+            summary=json.dumps(to_builtin({field: results[field] for field in SUMMARY_FIELDS})),
+        )
+        db.add(run)
+        db.flush()
+
+        # Avvalgi tahlillarning batafsil natijalari kerak emas, faqat xulosasi qoladi
+        old_runs = select(AnalysisRun.id).where(AnalysisRun.test_id == test_id, AnalysisRun.id != run.id)
+        db.execute(delete(PersonEstimate).where(PersonEstimate.run_id.in_(old_runs)))
+        db.execute(delete(ItemEstimate).where(ItemEstimate.run_id.in_(old_runs)))
+        db.execute(delete(ScoreConversion).where(ScoreConversion.run_id.in_(old_runs)))
+        db.execute(update(AnalysisRun).where(AnalysisRun.id.in_(old_runs)).values(state=None))
+
+        self._insert_persons(db, run.id, matrix, results)
+
+        items = [
+            {'question_id': question_id, 'difficulty_b': b, 'difficulty_se': se}
+            for question_id, b, se in zip(matrix.question_ids.tolist(), to_builtin(results['question_difficulties']),
+                                          to_builtin(results['difficulty_se']))
+        ]
+        item_fit = self._fit_rows(results.get('item_fit'), len(items))
+        db.execute(insert(ItemEstimate), [{'run_id': run.id, **item, **fit} for item, fit in zip(items, item_fit)])
+        db.execute(update(Question), [{'id': item['question_id'], 'difficulty_b': item['difficulty_b']}
+                                      for item in items])
+        self._save_score_table(db, run.id, results.get('score_table'))
+
+        db.commit()
+        return run
+
+    def update_run(self, db: Session, run: AnalysisRun, data_version: int, last_response_id: int,
+                   matrix: ResponseMatrix, results: Dict, mode: str) -> AnalysisRun:
+        """Qo'shimcha baholash natijasini mavjud tahlilga yozish (RaschService.update_analysis).
+
+        Yangi talabgorlar qo'shiladi, oldingilarining theta si guruhlar
+        (maska kaliti, ball) bo'yicha bitta executemany bilan yangilanadi,
+        shuning uchun ish hajmi guruhlar va yangi qatorlar soniga bog'liq.
+        """
+        connection = db.connection()
+        if mode != 'anchored':
+            previous = results['previous_groups']
+            connection.execute(
+                update(PersonEstimate)
+                .where(PersonEstimate.run_id == run.id, PersonEstimate.pattern == bindparam('group_pattern'),
+                       PersonEstimate.raw_score == bindparam('group_score'))
+                .values(theta=bindparam('group_theta'), theta_se=bindparam('group_theta_se'),
+                        scaled_score=bindparam('group_scaled'), grade=bindparam('group_grade')),
+                [{'group_pattern': pattern, 'group_score': score, 'group_theta': theta, 'group_theta_se': se,
+                  'group_scaled': scaled, 'group_grade': grade}
+                 for pattern, score, theta, se, scaled, grade in zip(
+                     previous['patterns'].tolist(), previous['scores'].tolist(), to_builtin(previous['theta']),
+                     to_builtin(previous['theta_se']), to_builtin(previous['scaled_scores']),
+                     previous['grades'].tolist())]
+            )
+            items = list(zip(matrix.question_ids.tolist(), to_builtin(results['question_difficulties']),
+                             to_builtin(results['difficulty_se'])))
+            connection.execute(
+                update(ItemEstimate)
+                .where(ItemEstimate.run_id == run.id, ItemEstimate.question_id == bindparam('item_id'))
+                .values(difficulty_b=bindparam('item_b'), difficulty_se=bindparam('item_se')),
+                [{'item_id': question_id, 'item_b': b, 'item_se': se} for question_id, b, se in items]
+            )
+            db.execute(update(Question), [{'id': question_id, 'difficulty_b': b} for question_id, b, _ in items])
+            self._save_score_table(db, run.id, results.get('score_table'))
+
+        self._insert_persons(db, run.id, matrix, results)
+
+        summary = {field: results[field] for field in SUMMARY_FIELDS if field != 'top_students'}
+        summary['top_students'] = self._top_students(db, run.id)
+        run.data_version = data_version
+        run.mode = mode
+        run.updated_at = datetime.utcnow()
+        run.last_response_id = last_response_id
+        run.state = self._pack_state(results['state'], matrix.question_ids)
+        run.total_students = int(results['total_students'])
+        run.reliability = to_builtin(results['reliability'])
+        run.iterations = int(results['iterations'])
+        run.converged = bool(results['converged'])
+        run.summary = json.dumps(to_builtin(summary))
+        db.commit()
+        return run
+
+    def load_state(self, run: AnalysisRun) -> Optional[Dict]:
+        """AnalysisRun.state ni RaschService.update_analysis uchun o'qish"""
+        if run.state is None:
+            return None
+        with np.load(io.BytesIO(run.state)) as arrays:
+            state = {name: arrays[name] for name in arrays.files}
+        state.setdefault('observed', None)
+        state['n_persons'] = int(state['counts'].sum())
+        state['n_items'] = state['item_scores'].size
+        return state
+
+    def measures(self, db: Session, run: AnalysisRun) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Rayt xaritasi uchun (theta, talabgorlar soni, b): saqlangan guruhlar holatidan,
+        holat bo'lmasa talabgorlar baholaridan"""
+        state = self.load_state(run)
+        if state is not None:
+            return state['theta'], state['counts'], state['b']
+        abilities = np.array(db.execute(
+            select(PersonEstimate.theta).where(PersonEstimate.run_id == run.id)
+        ).scalars().all(), dtype=np.float64)
+        return abilities, np.ones_like(abilities), self.difficulties(db, run)
+
+    def has_persons(self, db: Session, run: AnalysisRun, student_ids: np.ndarray) -> bool:
+        """Talabgorlardan birortasi tahlilda allaqachon bormi"""
+        return db.execute(
+            select(PersonEstimate.id)
+            .where(PersonEstimate.run_id == run.id, PersonEstimate.student_id.in_(student_ids.tolist()))
+            .limit(1)
+        ).first() is not None
+
+    def score_table(self, db: Session, run: AnalysisRun) -> Optional[Dict]:
+        """Saqlangan xom ball -> theta jadvali (RaschService.build_score_table ko'rinishida)"""
+        rows = db.execute(
+            select(ScoreConversion.theta, ScoreConversion.theta_se)
+            .where(ScoreConversion.run_id == run.id).order_by(ScoreConversion.raw_score)
+        ).all()
+        if not rows:
+            return None
+        table = np.array(rows, dtype=np.float64)
+        return {'theta': table[:, 0], 'theta_se': table[:, 1]}
+
+    def difficulties(self, db: Session, run: AnalysisRun) -> np.ndarray:
+        """Savollar qiyinliklari (Question.id tartibida)"""
+        return np.array(db.execute(
+            select(ItemEstimate.difficulty_b).where(ItemEstimate.run_id == run.id).order_by(ItemEstimate.question_id)
+        ).scalars().all(), dtype=np.float64)
+
+    def _save_score_table(self, db: Session, run_id: int, table: Optional[Dict]) -> None:
+        if table is None:
+            return
+        db.execute(delete(ScoreConversion).where(ScoreConversion.run_id == run_id))
+        db.execute(insert(ScoreConversion), [
+            {'run_id': run_id, 'raw_score': raw_score, 'theta': theta, 'theta_se': theta_se}
+            for raw_score, (theta, theta_se) in enumerate(zip(to_builtin(table['theta']),
+                                                              to_builtin(table['theta_se'])))
+        ])
+
+    def _insert_persons(self, db: Session, run_id: int, matrix: ResponseMatrix, results: Dict) -> None:
+        patterns = results.get('person_patterns')
+        if patterns is None:
+            patterns = np.full(matrix.n_persons, b"", dtype=object)
+        persons = zip(matrix.student_ids.tolist(), matrix.row_sums().tolist(), patterns.tolist(),
+                      to_builtin(results['student_abilities']), to_builtin(results['ability_se']),
+                      to_builtin(results['scaled_scores']), results['grades'].tolist(),
+                      self._fit_rows(results.get('person_fit'), matrix.n_persons))
+        batch = []
+        for student_id, raw_score, pattern, theta, theta_se, scaled_score, grade, fit in persons:
+            batch.append({'run_id': run_id, 'student_id': student_id, 'raw_score': raw_score,
+                          'pattern': pattern, 'theta': theta, 'theta_se': theta_se,
+                          'scaled_score': scaled_score, 'grade': grade, **fit})
+            if len(batch) == INSERT_BATCH:
+                db.execute(insert(PersonEstimate), batch)
+                batch = []
+        if batch:
+            db.execute(insert(PersonEstimate), batch)
+
+    @staticmethod
+    def _fit_columns(model) -> List:
+        return [getattr(model, field) for field in FIT_FIELDS]
+
+    @staticmethod
+    def _fit_rows(fit: Optional[Dict], count: int):
+        """Moslik massivlarini qatorlar bo'yicha lug'atlarga aylantirish (bo'lmasa bo'sh)"""
+        if fit is None:
+            return [{}] * count
+        columns = [to_builtin(fit[field]) for field in FIT_FIELDS]
+        return [dict(zip(FIT_FIELDS, values)) for values in zip(*columns)]
+
+    def _top_students(self, db: Session, run_id: int, limit: int = 5) -> List[tuple]:
+        rows = db.execute(
+            select(Student.name, PersonEstimate.theta)
+            .join(Student, PersonEstimate.student_id == Student.id)
+            .where(PersonEstimate.run_id == run_id, PersonEstimate.theta.is_not(None))
+            .order_by(PersonEstimate.theta.desc(), PersonEstimate.id)
+            .limit(limit)
+        ).all()
+        return [tuple(row) for row in rows]
+
+    @staticmethod
+    def _pack_state(state: Optional[Dict], question_ids: Optional[np.ndarray]) -> Optional[bytes]:
+        if state is None or question_ids is None:
+            return None
+        buffer = io.BytesIO()
+        arrays = {**state, 'question_ids': question_ids}
+        np.savez(buffer, **{name: arrays[name] for name in STATE_ARRAYS if arrays.get(name) is not None})
+        return buffer.getvalue()
+
+    def summary(self, run: AnalysisRun) -> Dict:
+        return {
+            'run_id': run.id,
+            'data_version': run.data_version,
+            'mode': run.mode,
+            'created_at': run.created_at,
+            'updated_at': run.updated_at,
+            'iterations': run.iterations,
+            'converged': run.converged,
+            **json.loads(run.summary),
+        }
+
+    def _person_query(self, run: AnalysisRun):
+        return (
+            select(PersonEstimate.student_id, PersonEstimate.raw_score, PersonEstimate.theta, PersonEstimate.theta_se,
+                   PersonEstimate.scaled_score, PersonEstimate.grade, *self._fit_columns(PersonEstimate))
+            .where(PersonEstimate.run_id == run.id).order_by(PersonEstimate.student_id)
+        )
+
+    def person_results(self, db: Session, run: AnalysisRun, after: Optional[int] = None,
+                       limit: Optional[int] = None) -> List[Dict]:
+        """Talabgorlar natijalari student_id tartibida; after/limit - kalitli sahifalash
+        (keyingi sahifa uchun after = oxirgi student_id, OFFSET ishlatilmaydi)"""
+        query = self._person_query(run)
+        if after is not None:
+            query = query.where(PersonEstimate.student_id > after)
+        if limit is not None:
+            query = query.limit(limit)
+        return [row._asdict() for row in db.execute(query).all()]
+
+    def person_count(self, db: Session, run: AnalysisRun) -> int:
+        return db.execute(
+            select(func.count()).select_from(PersonEstimate).where(PersonEstimate.run_id == run.id)
+        ).scalar_one()
+
+    def person_columns(self, db: Session, run: AnalysisRun, batch_size: int = INSERT_BATCH) -> Dict[str, np.ndarray]:
+        """Talabgorlar natijalari ustunlar bo'yicha NumPy massivlarida (ikkilik yuklab olish uchun).
+
+        Qatorlar bazadan bo'laklab o'qiladi va oldindan ajratilgan massivlarga
+        yoziladi; NULL qiymatlar NaN (daraja uchun bo'sh satr) bo'ladi.
+        """
+        count = self.person_count(db, run)
+        fields = ('student_id', 'raw_score', 'theta', 'theta_se', 'scaled_score', 'grade') + FIT_FIELDS
+        dtypes = {'student_id': np.int64, 'raw_score': np.int32, 'grade': 'U2'}
+        columns = {field: np.empty(count, dtype=dtypes.get(field, np.float64)) for field in fields}
+        start = 0
+        query = self._person_query(run).execution_options(yield_per=batch_size)
+        for partition in db.connection().execute(query).partitions():
+            stop = start + len(partition)
+            for field, values in zip(fields, zip(*partition)):
+                if field == 'grade':
+                    values = ["" if value is None else value for value in values]
+                elif field == 'raw_score':
+                    values = [-1 if value is None else value for value in values]
+                columns[field][start:stop] = values
+            start = stop
+        return {field: values[:start] for field, values in columns.items()}
+
+    def item_results(self, db: Session, run: AnalysisRun) -> List[Dict]:
+        rows = db.execute(
+            select(ItemEstimate.question_id, ItemEstimate.difficulty_b, ItemEstimate.difficulty_se,
+                   *self._fit_columns(ItemEstimate))
+            .where(ItemEstimate.run_id == run.id).order_by(ItemEstimate.question_id)
+        ).all()
+        return [row._asdict() for row in rows]
+
+    def iter_person_rows(self, db: Session, run: AnalysisRun, batch_size: int = INSERT_BATCH,
+                         offset: int = 0, limit: Optional[int] = None) -> Iterator[tuple]:
+        """Hisobot uchun talabgorlar qatorlari (ism bilan), bazadan bo'laklab o'qiladi.
+
+        offset/limit - student_id tartibidagi oraliq (hisobot qismlari uchun).
+        """
+        query = (
+            select(Student.name, PersonEstimate.raw_score, PersonEstimate.theta, PersonEstimate.theta_se,
+                   PersonEstimate.scaled_score, PersonEstimate.grade, PersonEstimate.infit_mnsq,
+                   PersonEstimate.outfit_mnsq)
+            .join(Student, PersonEstimate.student_id == Student.id)
+            .where(PersonEstimate.run_id == run.id)
+            .order_by(PersonEstimate.student_id)
+            .offset(offset)
+            .limit(limit)
+            .execution_options(yield_per=batch_size)
+        )
+        for partition in db.connection().execute(query).partitions():
+            yield from partition
+
+    def item_report_rows(self, db: Session, run: AnalysisRun) -> List[tuple]:
+        """Hisobot uchun savollar qatorlari (savol matni bilan)"""
+        return [tuple(row) for row in db.execute(
+            select(Question.id, Question.question_text, ItemEstimate.difficulty_b, ItemEstimate.difficulty_se,
+                   *self._fit_columns(ItemEstimate))
+            .join(Question, ItemEstimate.question_id == Question.id)
+            .where(ItemEstimate.run_id == run.id)
+            .order_by(ItemEstimate.question_id)
+        ).all()]
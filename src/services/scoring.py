@@ -0,0 +1,41 @@
+import numpy as np
+from typing import Dict, Optional, Sequence
+from sqlalchemy.orm import Session
+
+from src.models.database import Test
+from src.services.rasch_service import RaschService
+from src.services.response_matrix import ResponseMatrix
+from src.services.results_store import ResultsStore
+
+
+def score_candidates(db: Session, test_id: int, raw_scores: Optional[Sequence[int]] = None,
+                     responses: Optional[np.ndarray] = None) -> Optional[Dict]:
+    """Talabgorlarni testning oxirgi kalibrovkasi bo'yicha baholash.
+
+    raw_scores - to'liq javob berganlar xom ballari, responses - 0/1
+    javoblar matritsasi (yo'q qiymatlar NaN). Baholash saqlangan xom ball
+    -> theta jadvalidan olinadi, shkala bali va daraja test sozlamalari
+    bo'yicha hisoblanadi. Test kalibrlanmagan bo'lsa None.
+    """
+    results_store = ResultsStore()
+    test = db.get(Test, test_id)
+    run = results_store.latest_run(db, test_id) if test is not None else None
+    table = results_store.score_table(db, run) if run is not None else None
+    if table is None:
+        return None
+
+    rasch_service = RaschService.for_test(test)
+    if responses is not None:
+        matrix = ResponseMatrix.from_array(responses)
+        # Qiyinliklar faqat javobsiz savollari bor qatorlar uchun kerak
+        difficulties = results_store.difficulties(db, run) if matrix.missing is not None else None
+        theta, theta_se = rasch_service.score_matrix(table, difficulties, matrix)
+        raw_scores = matrix.row_sums()
+    else:
+        raw_scores = np.asarray(raw_scores if raw_scores is not None else [], dtype=np.int64)
+        theta, theta_se = rasch_service.score_from_table(table, raw_scores)
+
+    scaled_scores = rasch_service.scale_scores(theta)
+    grades = rasch_service.grade_labels(rasch_service.assign_grades(scaled_scores))
+    return {'run_id': run.id, 'raw_scores': raw_scores, 'theta': theta, 'theta_se': theta_se,
+            'scaled_scores': scaled_scores, 'grades': grades}
@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Optional
+from loguru import logger
+from sqlalchemy import delete, select
+
+from src.models.database import BotSession, SessionLocal
+from src.services.response_matrix import ResponseMatrix
+
+# Sessiya saqlagichi: file - SESSION_DIR dagi npz fayllar, database - bot_sessions jadvali
+SESSION_STORE = os.getenv("SESSION_STORE", "file")
+SESSION_DIR = os.getenv("SESSION_DIR", "./data/sessions")
+
+# Oxirgi yuklashdan shuncha soat o'tgach matritsa o'chiriladi
+SESSION_TTL = float(os.getenv("SESSION_TTL_HOURS", "24")) * 3600
+
+# Eskirgan sessiyalar saqlashda shuncha soniyada bir marta tozalanadi
+EVICT_INTERVAL = 600
+
+
+class SessionStore(ABC):
+    """Bot foydalanuvchilari yuborgan matritsalarni jarayon xotirasidan tashqarida saqlash.
+
+    user_data da faqat kalit qoladi, matritsa esa diskda yoki bazada
+    siqilgan npz ko'rinishida turadi va bot qayta ishga tushganda ham
+    yo'qolmaydi. Muddati o'tgan sessiyalar saqlash paytida tozalanadi.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL):
+        self.ttl = ttl
+        self._last_eviction = 0.0
+        self._lock = threading.Lock()
+
+    def save(self, key: str, matrix: ResponseMatrix) -> None:
+        self._write(key, matrix.to_bytes())
+        self._maybe_evict()
+
+    def load(self, key: str) -> Optional[ResponseMatrix]:
+        data = self._read(key)
+        return ResponseMatrix.from_bytes(data) if data is not None else None
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def evict_expired(self) -> int:
+        """Muddati o'tgan sessiyalarni o'chirish, o'chirilganlar sonini qaytaradi"""
+
+    @abstractmethod
+    def _write(self, key: str, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def _read(self, key: str) -> Optional[bytes]:
+        ...
+
+    def _maybe_evict(self) -> None:
+        with self._lock:
+            if time.time() - self._last_eviction < EVICT_INTERVAL:
+                return
+            self._last_eviction = time.time()
+        removed = self.evict_expired()
+        if removed:
+            logger.info(f"{removed} ta eskirgan bot sessiyasi o'chirildi")
+
+
+class FileSessionStore(SessionStore):
+    """Har bir sessiya - SESSION_DIR dagi alohida .npz fayl"""
+
+    def __init__(self, directory: str = SESSION_DIR, ttl: float = SESSION_TTL):
+        super().__init__(ttl)
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        # Kalit fayl nomiga aylantiriladi, yo'l belgilari kiritilmaydi
+        return os.path.join(self.directory, f"{os.path.basename(str(key))}.npz")
+
+    def _write(self, key: str, data: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                self.delete(key)
+                return None
+            with open(path, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def exists(self, key: str) -> bool:
+        try:
+            return time.time() - os.path.getmtime(self._path(key)) <= self.ttl
+        except FileNotFoundError:
+            return False
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def evict_expired(self) -> int:
+        if not os.path.isdir(self.directory):
+            return 0
+        threshold = time.time() - self.ttl
+        removed = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".npz") and entry.stat().st_mtime < threshold:
+                    try:
+                        os.remove(entry.path)
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+        return removed
+
+
+class DatabaseSessionStore(SessionStore):
+    """Sessiyalar bot_sessions jadvalida (SQLite yoki PostgreSQL)"""
+
+    def _write(self, key: str, data: bytes) -> None:
+        db = SessionLocal()
+        try:
+            db.merge(BotSession(key=str(key), data=data, updated_at=datetime.utcnow()))
+            db.commit()
+        finally:
+            db.close()
+
+    def _read(self, key: str) -> Optional[bytes]:
+        db = SessionLocal()
+        try:
+            session = db.get(BotSession, str(key))
+            if session is None or session.updated_at < datetime.utcnow() - timedelta(seconds=self.ttl):
+                return None
+            return session.data
+        finally:
+            db.close()
+
+    def exists(self, key: str) -> bool:
+        db = SessionLocal()
+        try:
+            threshold = datetime.utcnow() - timedelta(seconds=self.ttl)
+            return db.execute(
+                select(BotSession.key).where(BotSession.key == str(key), BotSession.updated_at >= threshold)
+            ).first() is not None
+        finally:
+            db.close()
+
+    def delete(self, key: str) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(delete(BotSession).where(BotSession.key == str(key)))
+            db.commit()
+        finally:
+            db.close()
+
+    def evict_expired(self) -> int:
+        db = SessionLocal()
+        try:
+            threshold = datetime.utcnow() - timedelta(seconds=self.ttl)
+            removed = db.execute(delete(BotSession).where(BotSession.updated_at < threshold)).rowcount
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+
+_session_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    """SESSION_STORE sozlamasi bo'yicha jarayon uchun yagona saqlagich"""
+    global _session_store
+    if _session_store is None:
+        if SESSION_STORE == "database":
+            _session_store = DatabaseSessionStore()
+        elif SESSION_STORE == "file":
+            _session_store = FileSessionStore()
+        else:
+            raise ValueError(f"Noma'lum SESSION_STORE: {SESSION_STORE}")
+    return _session_store
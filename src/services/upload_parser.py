@@ -0,0 +1,307 @@
+import csv
+import io
+import os
+import zipfile
+from collections import defaultdict
+from itertools import islice
+import numpy as np
+import pandas as pd
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from src.services.response_matrix import ResponseMatrix
+from src.utils.metrics import stage_timer
+
+UPLOAD_FORMATS = ("csv", "txt", "xlsx", "zip")
+
+# Fayl shu hajmdagi qatorlar bo'laklarida tekshiriladi
+CHUNK_ROWS = 5000
+
+# Arxiv ichidagi fayl ochilgandagi eng katta hajmi (zip bomb dan himoya)
+MAX_UNPACKED_BYTES = int(os.getenv("MAX_UPLOAD_UNPACKED_MB", "200")) << 20
+
+# Ajratuvchi va sarlavha faylning boshidagi shuncha bayt / qator bo'yicha aniqlanadi
+SNIFF_BYTES = 65536
+SNIFF_LINES = 50
+
+# Xabarda ko'rsatiladigan noto'g'ri qatorlar soni
+MAX_REPORTED_ROWS = 10
+
+# Javob yo'q katak (ResponseMatrix.from_array 0/1 dan boshqasini yo'q qiymat deb oladi)
+MISSING = 255
+
+
+# Javob sifatida qabul qilinadigan katak qiymatlari (CSV da matn, XLSX da son)
+_ANSWER_CODES = {"0": 0, "1": 1, "0.0": 0, "1.0": 1, 0: 0, 1: 1, 0.0: 0, 1.0: 1, True: 1, False: 0}
+
+
+def _answer_cells(cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Javob kataklarini (2 o'lchamli object massivi) uint8 ga o'tkazish va noto'g'ri kataklarni topish.
+
+    Bo'sh katak - javob yo'q; 0/1 dan boshqa har qanday qiymat noto'g'ri
+    hisoblanadi va ham yo'q qiymat sifatida yoziladi. Kataklar bitta hash
+    jadval orqali kodlanadi, bo'sh joylar faqat mos kelmaganlarda olib tashlanadi.
+    """
+    shape = cells.shape
+    cells = pd.Series(cells.ravel())
+    codes = cells.map(_ANSWER_CODES)
+    unmatched = codes.isna() & cells.notna()
+    if unmatched.any():
+        stripped = cells[unmatched].astype(str).str.strip()
+        codes[unmatched] = stripped.map(_ANSWER_CODES)
+        cells[unmatched] = stripped.where(stripped != "")
+    bad_cells = codes.isna() & cells.notna()
+    values = codes.fillna(MISSING).to_numpy(dtype=np.uint8).reshape(shape)
+    return values, bad_cells.to_numpy().reshape(shape)
+
+
+class _Collector:
+    """Bo'laklardan ismlar, javoblar va noto'g'ri qatorlarni yig'ish"""
+
+    def __init__(self, first_line: int):
+        self.names: List[str] = []
+        self.blocks: List[np.ndarray] = []
+        self.malformed: List[Tuple[int, str]] = []
+        self.malformed_count = 0
+        self.line = first_line
+
+    def add(self, names: pd.Series, values: np.ndarray, bad_cells: np.ndarray,
+            extra_cells: Optional[np.ndarray] = None, lines: Optional[np.ndarray] = None) -> None:
+        """extra_cells - birinchi qatordan ortiqcha kataklar soni (ular tashlanadi),
+        lines - fayldagi qator raqamlari (berilmasa ketma-ket deb olinadi)"""
+        names = names.fillna("").astype(str).str.strip()
+        bad_rows = bad_cells.sum(axis=1)
+        unnamed = (names == "").to_numpy()
+        if extra_cells is None:
+            extra_cells = np.zeros(len(names), dtype=np.int64)
+        if lines is None:
+            lines = self.line + np.arange(len(names))
+        rows = np.flatnonzero((bad_rows > 0) | unnamed | (extra_cells > 0))
+        self.malformed_count += rows.size
+        for row in rows[:max(0, MAX_REPORTED_ROWS - len(self.malformed))]:
+            reasons = ["ism yo'q"] if unnamed[row] else []
+            if bad_rows[row]:
+                reasons.append(f"{int(bad_rows[row])} ta katak 0/1 emas")
+            if extra_cells[row]:
+                reasons.append(f"{int(extra_cells[row])} ta ortiqcha ustun")
+            self.malformed.append((int(lines[row]), ", ".join(reasons)))
+        self.names.extend(names.tolist())
+        self.blocks.append(values)
+        self.line = int(lines[-1]) + 1 if len(names) else self.line
+
+    def result(self) -> Dict:
+        if not self.blocks or not self.names:
+            raise ValueError("Faylda ma'lumot topilmadi")
+        n_items = max(block.shape[1] for block in self.blocks)
+        if n_items == 0:
+            raise ValueError("Faylda javob ustunlari yo'q")
+        values = np.full((len(self.names), n_items), MISSING, dtype=np.uint8)
+        start = 0
+        for block in self.blocks:
+            values[start:start + block.shape[0], :block.shape[1]] = block
+            start += block.shape[0]
+        return {
+            "matrix": ResponseMatrix.from_array(values, self.names),
+            "malformed_rows": self.malformed,
+            "malformed_count": self.malformed_count,
+        }
+
+
+def _is_answer(cell) -> bool:
+    return cell is not None and str(cell).strip() in ("0", "1", "0.0", "1.0")
+
+
+def _is_header(cells) -> bool:
+    """Sarlavha qatori: ism ustunidan keyingi kataklar bo'sh emas va birortasi ham 0/1 javob emas.
+
+    Bitta noto'g'ri katakli birinchi ma'lumot qatori sarlavha deb olinmaydi,
+    u malformed_rows da xabar qilinadi.
+    """
+    answers = [cell for cell in cells[1:] if cell is not None and str(cell).strip() != ""]
+    return bool(answers) and not any(_is_answer(cell) for cell in answers)
+
+
+def _line_delimiter(line: str) -> Optional[str]:
+    """Bitta qatorning ajratuvchisi (tab, ; yoki ,), ajratuvchisiz qatorda None"""
+    if "\t" in line:
+        return "\t"
+    if ";" in line and "," not in line:
+        return ";"
+    return "," if "," in line else None
+
+
+def _split_line(line: str) -> List[str]:
+    return next(csv.reader([line], delimiter=_line_delimiter(line) or ",", skipinitialspace=True), [])
+
+
+def _sniff_csv(head: str, complete: bool) -> Dict:
+    """Faylning birinchi SNIFF_LINES qatori bo'yicha ajratuvchi, birinchi qator va ustunlar soni.
+
+    Namunadagi barcha qatorlar bitta ajratuvchini ishlatsa u qaytariladi;
+    sarlavha va ma'lumot qatorlari turli ajratuvchili bo'lsa delimiter None
+    (fayl qatorma-qator bo'linadi). Ajratuvchisiz birinchi qator (bitta
+    ustunli sarlavha, masalan "ism") keyingi qatorlarda ajratuvchi bo'lsa
+    sarlavha hisoblanadi, ustunlar soni esa ma'lumot qatorlaridan olinadi.
+    complete - head faylning oxirigacha o'qilgan (aks holda oxirgi qator kesilgan bo'lishi mumkin).
+    """
+    lines = [line for line in head.splitlines() if line.strip()]
+    if not complete and len(lines) > 1:
+        lines.pop()
+    lines = lines[:SNIFF_LINES]
+    if not lines:
+        return {'delimiter': ",", 'first': [], 'width': 1, 'data_width': 0, 'name_only_header': False}
+    delimiters = [_line_delimiter(line) for line in lines]
+    found = {delimiter for delimiter in delimiters if delimiter}
+    first = _split_line(lines[0])
+    name_only_header = delimiters[0] is None and bool(found)
+    data_width = max((len(_split_line(line)) for line in lines[1:]), default=0)
+    width = data_width if name_only_header else len(first)
+    return {
+        'delimiter': (found.pop() if len(found) == 1 else None) if found else ",",
+        'first': first,
+        'width': max(width, 1),
+        'data_width': data_width,
+        'name_only_header': name_only_header,
+    }
+
+
+def _csv_rows(text: io.TextIOWrapper, delimiter: Optional[str]) -> Iterator[Tuple[List[str], int]]:
+    """(qator kataklari, fayldagi qator raqami); delimiter None bo'lsa har bir qator o'z ajratuvchisi bilan"""
+    if delimiter is None:
+        for number, line in enumerate(text, start=1):
+            yield _split_line(line.rstrip("\r\n")), number
+        return
+    reader = csv.reader(text, delimiter=delimiter, skipinitialspace=True)
+    for row in reader:
+        yield row, reader.line_num
+
+
+def _csv_chunks(file: BinaryIO, delimiter: Optional[str], has_header: bool) -> Iterator[Tuple[List[List[str]], List[int]]]:
+    """CSV qatorlari va ularning fayldagi raqamlari, CHUNK_ROWS lik bo'laklarda (bo'sh qatorlarsiz)"""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        rows: List[List[str]] = []
+        lines: List[int] = []
+        skip_header = has_header
+        for row, number in _csv_rows(text, delimiter):
+            if not any(cell.strip() for cell in row):
+                continue
+            if skip_header:
+                skip_header = False
+                continue
+            rows.append(row)
+            lines.append(number)
+            if len(rows) == CHUNK_ROWS:
+                yield rows, lines
+                rows, lines = [], []
+        if rows:
+            yield rows, lines
+    except csv.Error as exc:
+        raise ValueError(f"Fayl tuzilishi xato: {exc}")
+    finally:
+        text.detach()
+
+
+def _parse_csv(file: BinaryIO, has_header: Optional[bool] = None) -> Dict:
+    head = file.read(SNIFF_BYTES)
+    complete = len(head) < SNIFF_BYTES
+    file.seek(0)
+    sniffed = _sniff_csv(head.decode("utf-8-sig", errors="replace"), complete)
+    delimiter, first = sniffed['delimiter'], sniffed['first']
+    if has_header is None:
+        has_header = sniffed['name_only_header'] or _is_header(first)
+    first_line = 2 if has_header else 1
+
+    # Toza fayl: javob ustunlari to'g'ridan-to'g'ri uint8 ga o'qiladi. Faqat bitta ajratuvchi va
+    # birinchi qatordan keng bo'lmagan qatorlarda: aks holda pandas ortiqcha ustunlarni indeksga oladi
+    if delimiter is not None and not sniffed['name_only_header'] and sniffed['data_width'] <= len(first):
+        name_column = first[0].strip() if has_header and first else 0
+        options = dict(sep=delimiter, header=0 if has_header else None, encoding="utf-8-sig", skipinitialspace=True)
+        try:
+            frame = pd.read_csv(file, dtype=defaultdict(lambda: np.uint8, {name_column: str}), **options)
+            values = frame.iloc[:, 1:].to_numpy(dtype=np.uint8)
+            if not (values > 1).any():
+                collector = _Collector(first_line=first_line)
+                collector.add(frame.iloc[:, 0], values, np.zeros(values.shape, dtype=bool))
+                return collector.result()
+        except (ValueError, OverflowError):
+            # Bo'sh/noto'g'ri kataklar va tuzilish xatolari (ParserError) quyida qatorma-qator xabar qilinadi
+            pass
+        file.seek(0)
+
+    # Matn sifatida csv moduli bilan: ortiqcha ustunli qatorlar butun faylni rad etmaydi
+    width = sniffed['width']
+    collector = _Collector(first_line=first_line)
+    for rows, lines in _csv_chunks(file, delimiter, has_header):
+        cells = np.full((len(rows), width), None, dtype=object)
+        extra = np.zeros(len(rows), dtype=np.int64)
+        for index, row in enumerate(rows):
+            cells[index, :min(len(row), width)] = row[:width]
+            extra[index] = max(len(row) - width, 0)
+        values, bad_cells = _answer_cells(cells[:, 1:])
+        collector.add(pd.Series(cells[:, 0]), values, bad_cells, extra, np.asarray(lines))
+    return collector.result()
+
+
+def _parse_xlsx(file: BinaryIO, has_header: Optional[bool] = None) -> Dict:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        first = next(rows, None)
+        if first is None:
+            raise ValueError("Faylda ma'lumot topilmadi")
+        if has_header is None:
+            has_header = _is_header(first)
+        collector = _Collector(first_line=2 if has_header else 1)
+        batch: List[tuple] = [] if has_header else [first]
+        while True:
+            batch.extend(islice(rows, CHUNK_ROWS - len(batch)))
+            if not batch:
+                break
+            # read-only rejimda bo'sh qatorlar ham keladi
+            chunk = [row for row in batch if any(cell is not None for cell in row)]
+            batch = []
+            if chunk:
+                frame = pd.DataFrame(chunk)
+                values, bad_cells = _answer_cells(frame.iloc[:, 1:].to_numpy(dtype=object))
+                collector.add(frame.iloc[:, 0], values, bad_cells)
+    finally:
+        workbook.close()
+    return collector.result()
+
+
+def _parse_zip(file: BinaryIO, has_header: Optional[bool] = None) -> Dict:
+    with zipfile.ZipFile(file) as archive:
+        members = [info for info in archive.infolist()
+                   if not info.is_dir() and info.filename.rsplit(".", 1)[-1].lower() in ("csv", "txt", "xlsx")]
+        if not members:
+            raise ValueError("Arxivda CSV yoki XLSX fayl topilmadi")
+        member = members[0]
+        if member.file_size > MAX_UNPACKED_BYTES:
+            raise ValueError("Arxivdagi fayl juda katta")
+        data = io.BytesIO(archive.read(member))
+    return parse_upload(data, member.filename, has_header)
+
+
+def parse_upload(file: BinaryIO, filename: str, has_header: Optional[bool] = None) -> Dict:
+    """Yuklangan CSV/XLSX/ZIP faylni javoblar matritsasiga o'qish.
+
+    Format bot matn xabari bilan bir xil: birinchi ustun - ism, qolganlari
+    0/1 javoblar; sarlavha qatori bo'lishi ham mumkin (has_header=None -
+    birinchi qator bo'yicha aniqlanadi, _is_header). Bo'sh katak - javob
+    yo'q. 0/1 bo'lmagan kataklar, ismsiz qatorlar yoki birinchi qatordan
+    ko'p ustunli qatorlar tashlab yuborilmaydi: katak yo'q qiymat sifatida
+    olinadi (ortiqcha kataklar tashlanadi) va qator malformed_rows da
+    (fayldagi qator raqami, sabab) ko'rinishida qaytariladi.
+    Natija: {'matrix', 'malformed_rows', 'malformed_count'}.
+    """
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if extension not in UPLOAD_FORMATS:
+        raise ValueError(f"Qo'llab-quvvatlanmaydigan fayl turi: {extension or filename}")
+    if extension == "zip":
+        return _parse_zip(file, has_header)
+    with stage_timer("parse"):
+        if extension == "xlsx":
+            return _parse_xlsx(file, has_header)
+        return _parse_csv(file, has_header)
@@ -0,0 +1,192 @@
+import io
+import os
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+# Xarita bir xil kenglikdagi logit oraliqlariga bo'linadi
+BIN_WIDTH = 0.25
+
+# Chizilgan xaritalar shu papkada tahlil versiyasi bo'yicha saqlanadi
+WRIGHT_MAP_DIR = os.getenv("WRIGHT_MAP_DIR", "./data/wright_maps")
+
+IMAGE_FORMATS = ("png", "svg")
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Rasm o'lchamlari va ranglari
+WIDTH = 720
+MARGIN = 40
+HEADER = 40
+PANEL = 280
+PERSON_COLOR = "#4C72B0"
+ITEM_COLOR = "#DD8452"
+AXIS_COLOR = "#333333"
+
+
+def bin_measures(abilities: np.ndarray, difficulties: np.ndarray, ability_weights: Optional[np.ndarray] = None,
+                 bin_width: float = BIN_WIDTH) -> Dict:
+    """Theta va b larni umumiy logit oraliqlari bo'yicha gistogrammaga yig'ish.
+
+    ability_weights - guruhlar theta si berilganda har bir guruhdagi
+    talabgorlar soni. Baholanmagan (NaN) talabgorlar tashlab yuboriladi.
+    """
+    abilities = np.asarray(abilities, dtype=np.float64)
+    difficulties = np.asarray(difficulties, dtype=np.float64)
+    valid = np.isfinite(abilities)
+    if ability_weights is not None:
+        ability_weights = np.asarray(ability_weights, dtype=np.float64)[valid]
+    abilities = abilities[valid]
+    difficulties = difficulties[np.isfinite(difficulties)]
+
+    values = np.concatenate([abilities, difficulties])
+    if values.size == 0:
+        raise ValueError("Xarita uchun baholar yo'q")
+    low = np.floor(values.min() / bin_width) * bin_width
+    high = np.ceil(values.max() / bin_width) * bin_width
+    if high <= low:
+        high = low + bin_width
+    edges = np.linspace(low, high, int(round((high - low) / bin_width)) + 1)
+
+    persons, _ = np.histogram(abilities, bins=edges, weights=ability_weights)
+    items, _ = np.histogram(difficulties, bins=edges)
+    return {
+        'edges': edges,
+        'persons': persons,
+        'items': items,
+        'total_persons': int(round(persons.sum())),
+        'total_items': int(items.sum()),
+    }
+
+
+def _shapes(bins: Dict) -> Tuple[List[tuple], int]:
+    """PNG va SVG uchun umumiy chizma: to'rtburchaklar, chiziqlar va matnlar"""
+    edges, persons, items = bins['edges'], bins['persons'], bins['items']
+    n_bins = persons.size
+    row = max(6, min(18, 640 // n_bins))
+    height = HEADER + MARGIN + n_bins * row + MARGIN
+    axis_x = WIDTH // 2
+    top = HEADER + MARGIN
+
+    shapes: List[tuple] = [
+        ('text', axis_x - PANEL // 2, HEADER // 2, f"Talabgorlar ({bins['total_persons']})", 'middle'),
+        ('text', axis_x + PANEL // 2, HEADER // 2, f"Savollar ({bins['total_items']})", 'middle'),
+        ('line', axis_x, top, axis_x, top + n_bins * row, AXIS_COLOR),
+    ]
+    person_scale = PANEL / max(persons.max(), 1)
+    item_scale = PANEL / max(items.max(), 1)
+    # Yuqorida - yuqori logit (qobiliyatli talabgorlar va qiyin savollar)
+    for index in range(n_bins):
+        y = top + (n_bins - 1 - index) * row
+        if persons[index] > 0:
+            length = max(1, int(round(persons[index] * person_scale)))
+            shapes.append(('rect', axis_x - 2 - length, y + 1, length, row - 2, PERSON_COLOR))
+        if items[index] > 0:
+            length = max(1, int(round(items[index] * item_scale)))
+            shapes.append(('rect', axis_x + 2, y + 1, length, row - 2, ITEM_COLOR))
+            shapes.append(('text', axis_x + 6 + length, y + row // 2, str(int(items[index])), 'start'))
+
+    # Butun logitlar shkalasi
+    for logit in range(int(np.ceil(edges[0])), int(np.floor(edges[-1])) + 1):
+        y = top + int(round((edges[-1] - logit) / (edges[-1] - edges[0]) * n_bins * row))
+        shapes.append(('line', axis_x - 6, y, axis_x + 6, y, AXIS_COLOR))
+        shapes.append(('text', MARGIN // 2, y, f"{logit:+d}" if logit else "0", 'start'))
+    return shapes, height
+
+
+def _render_png(shapes: List[tuple], height: int) -> bytes:
+    from PIL import Image, ImageDraw, ImageFont
+
+    image = Image.new("RGB", (WIDTH, height), "white")
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    for shape in shapes:
+        kind = shape[0]
+        if kind == 'rect':
+            _, x, y, w, h, color = shape
+            draw.rectangle([x, y, x + w - 1, y + h - 1], fill=color)
+        elif kind == 'line':
+            _, x1, y1, x2, y2, color = shape
+            draw.line([x1, y1, x2, y2], fill=color, width=1)
+        else:
+            _, x, y, text, anchor = shape
+            # Bitmap shriftlar anchor ni qo'llamaydi, markazlash qo'lda
+            left, upper, right, lower = draw.textbbox((0, 0), text, font=font)
+            if anchor == 'middle':
+                x -= (right - left) / 2
+            draw.text((x, y - (lower + upper) / 2), text, fill=AXIS_COLOR, font=font)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def _render_svg(shapes: List[tuple], height: int) -> bytes:
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{height}" '
+        f'viewBox="0 0 {WIDTH} {height}" font-family="sans-serif" font-size="12">',
+        f'<rect width="{WIDTH}" height="{height}" fill="white"/>',
+    ]
+    for shape in shapes:
+        kind = shape[0]
+        if kind == 'rect':
+            _, x, y, w, h, color = shape
+            parts.append(f'<rect x="{x}" y="{y}" width="{w}" height="{h}" fill="{color}"/>')
+        elif kind == 'line':
+            _, x1, y1, x2, y2, color = shape
+            parts.append(f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{color}"/>')
+        else:
+            _, x, y, text, anchor = shape
+            parts.append(f'<text x="{x}" y="{y}" text-anchor="{anchor}" dominant-baseline="middle" '
+                         f'fill="{AXIS_COLOR}">{escape(text)}</text>')
+    parts.append('</svg>')
+    return "\n".join(parts).encode("utf-8")
+
+
+def render_wright_map(bins: Dict, image_format: str = "png") -> bytes:
+    """bin_measures natijasini PNG yoki SVG ga chizish"""
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Noma'lum rasm formati: {image_format}")
+    shapes, height = _shapes(bins)
+    if image_format == "png":
+        return _render_png(shapes, height)
+    return _render_svg(shapes, height)
+
+
+def _remove_superseded(prefix: str, key: str) -> None:
+    """prefix bilan boshlanuvchi boshqa versiyalar fayllarini o'chirish (yozilayotgan .tmp lar qoldiriladi)"""
+    current = f"{key}."
+    with os.scandir(WRIGHT_MAP_DIR) as entries:
+        for entry in entries:
+            if entry.name.startswith(prefix) and not entry.name.startswith(current) \
+                    and not entry.name.endswith(".tmp"):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+def cached_wright_map(key: str, image_format: str, build: Callable[[], bytes], prefix: Optional[str] = None) -> str:
+    """Xarita faylining yo'li: keshda bo'lmasa build() bilan chizib saqlanadi.
+
+    key tahlil versiyasini o'z ichiga olishi kerak (masalan run va
+    data_version), shunda takroriy so'rov faqat faylni o'qiydi. prefix
+    (masalan test bo'yicha) berilsa, yangi versiya yozilgach shu prefiksli
+    eski versiyalar o'chiriladi - kesh har bir test uchun faqat oxirgi
+    tahlil xaritalarini saqlaydi.
+    """
+    path = os.path.join(WRIGHT_MAP_DIR, f"{key}.{image_format}")
+    if not os.path.exists(path):
+        os.makedirs(WRIGHT_MAP_DIR, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                file.write(build())
+            os.replace(temporary, path)
+        except BaseException:
+            try:
+                os.remove(temporary)
+            except FileNotFoundError:
+                pass
+            raise
+        if prefix:
+            _remove_superseded(prefix, key)
+    return path
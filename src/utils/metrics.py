@@ -0,0 +1,240 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Prometheus matn formati (charset=utf-8 ni javob klassi qo'shadi)
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Soniyalar uchun standart gistogramma chegaralari
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name}: teglar {self.label_names} bo'lishi kerak")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines += self._render_sample(key, value)
+        return lines
+
+    def _render_sample(self, key: Tuple[str, ...], value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Faqat o'suvchi hisoblagich"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Joriy qiymat; function berilsa qiymat har bir o'qishda hisoblanadi"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labels)
+        self.function = function
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def render(self) -> List[str]:
+        if self.function is not None:
+            self.set(self.function())
+        return super().render()
+
+
+class Histogram(_Metric):
+    """Kuzatuvlar taqsimoti: chegaralar bo'yicha jamlanma sonlar, yig'indi va soni"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_sample(self, key: Tuple[str, ...], state) -> List[str]:
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, key, ("le", "+Inf"))
+        lines.append(f"{self.name}_bucket{labels} {count}")
+        labels = _format_labels(self.label_names, key)
+        lines += [f"{self.name}_sum{labels} {_format_value(total)}", f"{self.name}_count{labels} {count}"]
+        return lines
+
+
+class MetricsRegistry:
+    """Jarayon metrikalari va ularni Prometheus matn formatida chiqarish.
+
+    Navbat ishchilari (alohida jarayonlar) o'z hisoblagich va
+    gistogrammalarini drain() bilan yig'ib ota jarayonga yuboradi, u yerda
+    merge() bilan qo'shiladi. Gauge lar faqat shu jarayonniki.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metrika allaqachon ro'yxatda: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = (),
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._register(Gauge(name, documentation, labels, function))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+    def drain(self) -> Dict[str, Dict]:
+        """Hisoblagich va gistogramma qiymatlarini olib nolga qaytarish"""
+        snapshot = {}
+        with self._lock:
+            metrics = [metric for metric in self._metrics.values() if not isinstance(metric, Gauge)]
+        for metric in metrics:
+            with metric._lock:
+                if metric._values:
+                    snapshot[metric.name] = metric._values
+                    metric._values = {}
+        return snapshot
+
+    def merge(self, snapshot: Dict[str, Dict]) -> None:
+        """Boshqa jarayonning drain() natijasini qo'shish"""
+        for name, values in snapshot.items():
+            metric = self._metrics.get(name)
+            if metric is None:
+                continue
+            with metric._lock:
+                for key, value in values.items():
+                    current = metric._values.get(key)
+                    if isinstance(metric, Histogram):
+                        if current is None:
+                            metric._values[key] = value
+                        else:
+                            current[0] = [a + b for a, b in zip(current[0], value[0])]
+                            current[1] += value[1]
+                            current[2] += value[2]
+                    else:
+                        metric._values[key] = (current or 0.0) + value
+
+
+REGISTRY = MetricsRegistry()
+
+# API
+HTTP_REQUESTS = REGISTRY.counter("rasch_http_requests_total", "API so'rovlari soni",
+                                 ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram("rasch_http_request_duration_seconds", "API so'rovlari davomiyligi",
+                                  ("method", "route"))
+
+# Tahlil bosqichlari (parse, load, estimate, fit, format) va baholash iteratsiyalari
+STAGE_LATENCY = REGISTRY.histogram("rasch_stage_duration_seconds", "Tahlil bosqichlari davomiyligi", ("stage",))
+ESTIMATION_ITERATIONS = REGISTRY.histogram("rasch_estimation_iterations", "Baholash yaqinlashguncha iteratsiyalar",
+                                           buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100))
+ESTIMATIONS = REGISTRY.counter("rasch_estimations_total", "Baholashlar soni", ("converged",))
+ANALYZED_PERSONS = REGISTRY.counter("rasch_analyzed_persons_total", "Tahlil qilingan talabgorlar soni")
+
+# Navbat vazifalari
+JOBS = REGISTRY.counter("rasch_jobs_total", "Tugagan navbat vazifalari", ("kind", "status"))
+
+# Ma'lumotlar bazasi so'rovlari (SELECT, INSERT, ...)
+DB_QUERIES = REGISTRY.counter("rasch_db_queries_total", "Ma'lumotlar bazasi so'rovlari soni", ("operation",))
+
+# Bot
+BOT_LATENCY = REGISTRY.histogram("rasch_bot_handler_duration_seconds", "Bot handlerlari davomiyligi",
+                                 ("handler",))
+BOT_ERRORS = REGISTRY.counter("rasch_bot_handler_errors_total", "Bot handlerlaridagi xatolar", ("handler",))
+
+
+def stage_timer(stage: str):
+    """Tahlil bosqichi vaqtini o'lchash: with stage_timer("estimate"): ..."""
+    return STAGE_LATENCY.time(stage=stage)
+
+
+def count_query(statement: str) -> None:
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    DB_QUERIES.inc(operation=operation if operation.isalpha() else "OTHER")
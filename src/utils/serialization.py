@@ -0,0 +1,162 @@
+import io
+import numpy as np
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List
+
+# Ikkilik formatlar: .npy (yozuvli massiv) va Arrow IPC oqimi
+ARRAY_MEDIA_TYPES = {
+    "npy": "application/octet-stream",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# Oqim bo'laklari hajmi (bayt) va Arrow yozuvlar to'plami hajmi (qator)
+STREAM_CHUNK = 1 << 20
+ARROW_BATCH_ROWS = 65536
+
+# Bundan uzun massivlar vazifa natijasi JSON ida qaytarilmaydi
+MAX_INLINE_ITEMS = 1000
+
+
+def to_builtin(value: Any) -> Any:
+    """NumPy qiymatlarini JSON uchun oddiy Python turlariga aylantirish (NaN/inf -> None)"""
+    if isinstance(value, dict):
+        return {key: to_builtin(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_builtin(item) for item in value]
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == 'O':
+            return [to_builtin(item) for item in value.tolist()]
+        if value.dtype.kind != 'f':
+            return value.tolist()
+        finite = np.isfinite(value)
+        # Hammasi chekli bo'lsa tolist() to'g'ridan-to'g'ri C da ishlaydi
+        return value.tolist() if finite.all() else np.where(finite, value, None).tolist()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def json_response(payload: Any, status_code: int = 200):
+    """Javobni jsonable_encoder siz qaytarish: NumPy massivlari bir marta tolist() qilinadi.
+
+    Route Response qaytarsa FastAPI response_model bo'yicha har bir
+    elementni qayta aylantirmaydi.
+    """
+    from fastapi.responses import JSONResponse
+
+    return JSONResponse(content=to_builtin(payload), status_code=status_code)
+
+
+def compact_result(result: Any, max_items: int = MAX_INLINE_ITEMS) -> Any:
+    """Vazifa natijasidan talabgorlar bo'yicha uzun massivlarni olib tashlash.
+
+    Yuqori darajadagi max_items dan uzun massiv va ro'yxatlar (shu jumladan
+    ichki lug'atlardagi, masalan person_fit) 'omitted' ro'yxatiga yoziladi;
+    qolgan xulosa ko'rsatkichlari o'zgarishsiz qaytadi.
+    """
+    if not isinstance(result, dict):
+        return result
+    compact, omitted = {}, []
+    for key, value in result.items():
+        if isinstance(value, (np.ndarray, list, tuple)) and len(value) > max_items:
+            omitted.append(key)
+        elif isinstance(value, dict) and any(isinstance(item, (np.ndarray, list, tuple)) and len(item) > max_items
+                                             for item in value.values()):
+            omitted.append(key)
+        else:
+            compact[key] = value
+    if omitted:
+        compact['omitted'] = omitted
+    return compact
+
+
+def record_array(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Ustunlardan yozuvli (structured) massiv: np.load(...)['theta'] kabi o'qiladi"""
+    names = list(columns)
+    records = np.empty(len(columns[names[0]]) if names else 0,
+                       dtype=[(name, columns[name].dtype) for name in names])
+    for name in names:
+        records[name] = columns[name]
+    return records
+
+
+def npy_stream(columns: Dict[str, np.ndarray]) -> Iterator[bytes]:
+    """Ustunlarni bitta .npy fayl sifatida bo'laklab uzatish.
+
+    Sarlavhadan keyin massiv buferi memoryview orqali bo'laklanadi:
+    butun massivning tobytes() nusxasi yoki Python obyektlari yaratilmaydi,
+    bir vaqtda faqat STREAM_CHUNK bayt nusxalanadi (ASGI bytes talab qiladi).
+    """
+    records = np.ascontiguousarray(record_array(columns))
+    header = io.BytesIO()
+    np.lib.format.write_array_header_2_0(header, np.lib.format.header_data_from_array_1_0(records))
+    yield header.getvalue()
+    buffer = memoryview(records).cast("B") if records.size else memoryview(b"")
+    for start in range(0, len(buffer), STREAM_CHUNK):
+        yield bytes(buffer[start:start + STREAM_CHUNK])
+
+
+class _ChunkSink:
+    """pyarrow yozuvchisi uchun fayl: yozilgan baytlarni keyingi bo'lak uchun yig'adi"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def arrow_stream(columns: Dict[str, np.ndarray]) -> Iterator[bytes]:
+    """Ustunlarni Arrow IPC oqimi sifatida uzatish (pyarrow ixtiyoriy bog'liqlik).
+
+    Sonli ustunlar Arrow massivlariga nusxasiz o'raladi va
+    ARROW_BATCH_ROWS qatorlik yozuvlar to'plamlari bilan yuboriladi.
+    pyarrow yo'qligi oqim boshlanishidan oldin ValueError bilan bildiriladi.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ValueError("Arrow formati uchun pyarrow o'rnatilmagan")
+    return _arrow_chunks(pa, columns)
+
+
+def _arrow_chunks(pa, columns: Dict[str, np.ndarray]) -> Iterator[bytes]:
+    table = pa.table({
+        # float ustunlardagi NaN Arrow da null bo'ladi
+        name: pa.array(values, from_pandas=values.dtype.kind == 'f')
+        for name, values in columns.items()
+    })
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        yield sink.take()
+        for batch in table.to_batches(max_chunksize=ARROW_BATCH_ROWS):
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()
+
+
+def array_stream(columns: Dict[str, np.ndarray], array_format: str) -> Iterator[bytes]:
+    if array_format == "npy":
+        return npy_stream(columns)
+    if array_format == "arrow":
+        return arrow_stream(columns)
+    raise ValueError(f"Noma'lum format: {array_format}")
@@ -0,0 +1,30 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# src.models.database ulanishni import paytida yaratadi: testlar alohida vaqtinchalik SQLite bazada ishlaydi
+_DATABASE_DIR = tempfile.mkdtemp(prefix="rasch_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DATABASE_DIR, 'tests.db')}"
+
+
+@pytest.fixture(scope="session")
+def database():
+    from src.models.database import create_tables, engine
+
+    create_tables()
+    yield engine
+    engine.dispose()
+    shutil.rmtree(_DATABASE_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db(database):
+    from src.models.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,71 @@
+import numpy as np
+
+from src.models import database as models
+from src.models.database import Question, Response, Student
+from src.services.data_loader import load_response_matrix
+
+
+def _create_test(db, name: str, n_questions: int, students):
+    test = models.Test(name=name, subject="Matematika")
+    db.add(test)
+    db.flush()
+    questions = [Question(test_id=test.id, question_text=f"Savol {index}") for index in range(n_questions)]
+    people = [Student(test_id=test.id, name=student) for student in students]
+    db.add_all(questions + people)
+    db.flush()
+    return test, questions, people
+
+
+def test_loads_matrix_in_id_order_with_missing_answers(db):
+    test, questions, people = _create_test(db, "Yuklash", 3, ["Ali", "Vali"])
+    answers = {(0, 0): 1, (0, 1): 0, (0, 2): 1, (1, 0): 0, (1, 2): 1}
+    db.add_all(Response(test_id=test.id, student_id=people[person].id, question_id=questions[item].id,
+                        answer=answer) for (person, item), answer in answers.items())
+    db.commit()
+
+    matrix = load_response_matrix(db, test.id)
+
+    assert matrix.student_names == ["Ali", "Vali"]
+    assert matrix.student_ids.tolist() == [person.id for person in people]
+    assert matrix.question_ids.tolist() == [question.id for question in questions]
+    assert matrix.to_dense().tolist() == [[1, 0, 1], [0, 0, 1]]
+    assert matrix.row_counts().tolist() == [3, 2]
+
+
+def test_skips_responses_to_questions_of_another_test(db):
+    test, questions, people = _create_test(db, "Asosiy", 2, ["Ali", "Vali"])
+    _, other_questions, _ = _create_test(db, "Boshqa", 1, [])
+    db.add_all([
+        Response(test_id=test.id, student_id=people[0].id, question_id=questions[0].id, answer=1),
+        Response(test_id=test.id, student_id=people[1].id, question_id=questions[1].id, answer=1),
+        # Boshqa testning savoliga yozilgan javob qo'shni ustunga tushmasligi kerak
+        Response(test_id=test.id, student_id=people[1].id, question_id=other_questions[0].id, answer=1),
+    ])
+    db.commit()
+
+    matrix = load_response_matrix(db, test.id)
+
+    assert matrix.to_dense().tolist() == [[1, 0], [0, 1]]
+    assert matrix.row_counts().tolist() == [1, 1]
+    np.testing.assert_array_equal(matrix.column_counts(), [1, 1])
+
+
+def test_response_id_range_loads_only_new_students(db):
+    test, questions, people = _create_test(db, "Qo'shimcha", 2, ["Ali", "Vali"])
+    first = Response(test_id=test.id, student_id=people[0].id, question_id=questions[0].id, answer=1)
+    db.add(first)
+    db.commit()
+    db.add(Response(test_id=test.id, student_id=people[1].id, question_id=questions[1].id, answer=0))
+    db.commit()
+
+    matrix = load_response_matrix(db, test.id, after_response_id=first.id)
+
+    assert matrix.student_names == ["Vali"]
+    assert load_response_matrix(db, test.id, upto_response_id=first.id).n_persons == 2
+
+
+def test_test_without_responses_returns_none(db):
+    test, _, _ = _create_test(db, "Bo'sh", 2, ["Ali"])
+    db.commit()
+
+    assert load_response_matrix(db, test.id) is None
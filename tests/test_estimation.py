@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import MISSING, simulate_responses
+from src.services.estimation import estimate_rasch
+
+
+def _estimate(data):
+    responses = data['responses']
+    missing = responses == MISSING
+    return estimate_rasch(np.where(missing, 0, responses), missing if missing.any() else None)
+
+
+@pytest.mark.parametrize("missing_rate", [0.0, 0.1])
+def test_recovers_simulated_parameters(missing_rate):
+    data = simulate_responses(2000, 20, missing_rate, seed=0)
+    estimates = _estimate(data)
+
+    assert estimates['converged']
+    difficulties = estimates['b'] - estimates['b'].mean()
+    assert np.corrcoef(difficulties, data['b'])[0, 1] > 0.99
+    assert np.sqrt(np.mean((difficulties - data['b']) ** 2)) < 0.15
+    active = ~estimates['extreme_persons']
+    assert np.corrcoef(estimates['theta'][active], data['theta'][active])[0, 1] > 0.8
+
+
+def test_extreme_persons_get_finite_abilities():
+    responses = (np.random.default_rng(1).random((200, 10)) < 0.5).astype(np.uint8)
+    responses[0] = 1
+    responses[1] = 0
+    estimates = estimate_rasch(responses)
+
+    scores = responses.sum(axis=1)
+    np.testing.assert_array_equal(estimates['extreme_persons'], (scores == 0) | (scores == 10))
+    assert np.isfinite(estimates['theta']).all()
+    # Barcha javoblari to'g'ri talabgor eng yuqori, barchasi noto'g'ri - eng past
+    assert estimates['theta'][0] == estimates['theta'].max()
+    assert estimates['theta'][1] == estimates['theta'].min()
+    assert estimates['raw_scores'][:2].tolist() == [10, 0]
+
+
+def test_item_nobody_answered():
+    responses = (np.random.default_rng(2).random((200, 10)) < 0.5).astype(np.uint8)
+    missing = np.zeros(responses.shape, dtype=bool)
+    missing[:, 9] = True
+    estimates = estimate_rasch(responses, missing)
+
+    assert estimates['extreme_items'].tolist() == [False] * 9 + [True]
+    assert np.isfinite(estimates['b']).all()
+    assert np.isfinite(estimates['b_se'][:9]).all()
+    # Javobsiz savol haqida ma'lumot yo'q
+    assert not np.isfinite(estimates['b_se'][9])
+
+    # Qolgan savollar baholari savolsiz matritsadagi bilan bir xil
+    reduced = estimate_rasch(responses[:, :9])
+    np.testing.assert_allclose(estimates['theta'], reduced['theta'], atol=1e-3)
+
+
+def test_booklet_design_is_calibrated_on_one_scale():
+    data = simulate_responses(2000, 12, seed=3)
+    responses = data['responses']
+    missing = np.zeros(responses.shape, dtype=bool)
+    # Ikki buklet: 0-3 savollar umumiy (anchor), 4-7 faqat birinchi, 8-11 faqat ikkinchi bukletda
+    missing[:1000, 8:] = True
+    missing[1000:, 4:8] = True
+    estimates = estimate_rasch(np.where(missing, 0, responses), missing)
+
+    assert estimates['converged']
+    assert np.isfinite(estimates['b']).all() and np.isfinite(estimates['theta']).all()
+    difficulties = estimates['b'] - estimates['b'].mean()
+    assert np.corrcoef(difficulties, data['b'])[0, 1] > 0.98
+    assert np.abs(difficulties - data['b']).max() < 0.3
+
+
+def test_requires_two_persons_and_two_items():
+    with pytest.raises(ValueError):
+        estimate_rasch(np.array([[1, 0, 1]], dtype=np.uint8))
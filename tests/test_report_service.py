@@ -0,0 +1,64 @@
+import io
+import json
+import tracemalloc
+
+import pytest
+from sqlalchemy import insert, select
+
+from src.models import database as models
+from src.models.database import AnalysisRun, PersonEstimate, Student
+from src.services import report_service
+from src.services.report_service import ReportService
+
+pytest.importorskip("reportlab")
+
+
+def _create_cohort(db, n_students: int):
+    test = models.Test(name=f"Hisobot {n_students}", subject="Matematika")
+    db.add(test)
+    db.flush()
+    db.execute(insert(Student), [{'test_id': test.id, 'name': f"Talabgor {index}"} for index in range(n_students)])
+    student_ids = db.execute(select(Student.id).where(Student.test_id == test.id)).scalars().all()
+    run = AnalysisRun(test_id=test.id, data_version=1, total_students=n_students, total_questions=0,
+                      summary=json.dumps({'grade_distribution': {}}))
+    db.add(run)
+    db.flush()
+    db.execute(insert(PersonEstimate), [
+        {'run_id': run.id, 'student_id': student_id, 'raw_score': index % 40, 'theta': 0.1, 'theta_se': 0.3,
+         'scaled_score': 51.0, 'grade': "B", 'infit_mnsq': 1.0, 'outfit_mnsq': 1.0}
+        for index, student_id in enumerate(student_ids)
+    ])
+    db.commit()
+    return test, run
+
+
+def _peak_bytes(db, test, run, part: int) -> int:
+    tracemalloc.start()
+    try:
+        ReportService().write_report(db, test, run, "pdf", io.BytesIO(), part)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_pdf_memory_is_flat_at_100k_rows(db, monkeypatch):
+    monkeypatch.setattr(report_service, "PDF_PART_ROWS", 500)
+    small_test, small_run = _create_cohort(db, 500)
+    large_test, large_run = _create_cohort(db, 100_000)
+
+    assert ReportService.report_parts(small_run, "pdf") == 1
+    assert ReportService.report_parts(large_run, "pdf") == 200
+    assert ReportService.report_parts(large_run, "xlsx") == 1
+
+    # Birinchi chaqiruv reportlab shriftlari keshini to'ldiradi, o'lchovga kirmaydi
+    _peak_bytes(db, small_test, small_run, 1)
+    baseline = _peak_bytes(db, small_test, small_run, 1)
+    # Cho'qqi kogorta hajmiga emas, qism hajmiga bog'liq (oxirgi qism eng katta OFFSET bilan)
+    assert _peak_bytes(db, large_test, large_run, 1) < 1.5 * baseline
+    assert _peak_bytes(db, large_test, large_run, 200) < 1.5 * baseline
+
+
+def test_pdf_part_out_of_range(db):
+    test, run = _create_cohort(db, 10)
+    with pytest.raises(ValueError):
+        ReportService().write_report(db, test, run, "pdf", io.BytesIO(), 2)
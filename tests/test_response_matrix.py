@@ -0,0 +1,55 @@
+import numpy as np
+
+from src.services.response_matrix import ResponseMatrix
+
+
+def _values():
+    values = (np.random.default_rng(0).random((37, 13)) < 0.5).astype(np.float64)
+    values[3, 5] = np.nan
+    values[10, 0] = 255
+    values[36, 12] = np.nan
+    return values
+
+
+def test_packs_and_unpacks_answers_and_missing_mask():
+    values = _values()
+    matrix = ResponseMatrix.from_array(values)
+    missing = ~np.isin(values, (0, 1))
+
+    assert matrix.shape == (37, 13)
+    # 13 savol 2 baytga joylanadi
+    assert matrix.answers.shape == (37, 2)
+    np.testing.assert_array_equal(matrix.to_dense(), np.where(missing, 0, values))
+    np.testing.assert_array_equal(matrix.row_sums(), np.where(missing, 0, values).sum(axis=1))
+    np.testing.assert_array_equal(matrix.row_counts(), (~missing).sum(axis=1))
+    np.testing.assert_array_equal(matrix.column_counts(), (~missing).sum(axis=0))
+
+    chunks = list(matrix.iter_chunks(chunk_rows=10))
+    assert [rows.start for rows, _, _ in chunks] == [0, 10, 20, 30]
+    np.testing.assert_array_equal(np.vstack([observed for _, _, observed in chunks]), ~missing)
+
+
+def test_complete_matrix_has_no_missing_mask():
+    matrix = ResponseMatrix.from_array(np.ones((4, 9)))
+    assert matrix.missing is None
+    assert matrix.row_counts().tolist() == [9] * 4
+
+
+def test_bytes_round_trip():
+    values = _values()
+    names = [f"Talabgor {index}" for index in range(values.shape[0])]
+    matrix = ResponseMatrix.from_array(values, names)
+    restored = ResponseMatrix.from_bytes(matrix.to_bytes())
+
+    assert restored.shape == matrix.shape
+    assert restored.student_names == names
+    np.testing.assert_array_equal(restored.answers, matrix.answers)
+    np.testing.assert_array_equal(restored.missing, matrix.missing)
+
+
+def test_bytes_round_trip_without_missing():
+    matrix = ResponseMatrix.from_array(np.eye(3), ["a", "b", "c"])
+    restored = ResponseMatrix.from_bytes(matrix.to_bytes())
+
+    assert restored.missing is None
+    np.testing.assert_array_equal(restored.to_dense(), np.eye(3))
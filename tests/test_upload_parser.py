@@ -0,0 +1,98 @@
+import io
+
+import numpy as np
+import pytest
+
+from src.services.upload_parser import parse_upload
+
+
+def _parse(data: bytes, filename: str = "javoblar.csv", **kwargs):
+    return parse_upload(io.BytesIO(data), filename, **kwargs)
+
+
+def _dense(result):
+    matrix = result['matrix']
+    values = matrix.to_dense().astype(np.int64)
+    observed = np.vstack([mask for _, _, mask in matrix.iter_chunks()]).astype(bool)
+    return np.where(observed, values, -1).tolist()
+
+
+def test_clean_csv_with_header():
+    result = _parse(b"ism,q1,q2,q3\nAli,1,0,1\nVali,0,1,1\n")
+
+    assert result['matrix'].student_names == ["Ali", "Vali"]
+    assert _dense(result) == [[1, 0, 1], [0, 1, 1]]
+    assert result['malformed_count'] == 0
+
+
+def test_headerless_first_row_with_bad_cell_is_kept_and_reported():
+    result = _parse(b"Ali,1,0,x\nVali,0,1,1\n")
+
+    assert result['matrix'].student_names == ["Ali", "Vali"]
+    assert _dense(result) == [[1, 0, -1], [0, 1, 1]]
+    assert result['malformed_count'] == 1
+    assert result['malformed_rows'] == [(1, "1 ta katak 0/1 emas")]
+
+
+def test_explicit_header_flag_overrides_detection():
+    result = _parse(b"Ali,1,0\nVali,0,1\n", has_header=True)
+
+    assert result['matrix'].student_names == ["Vali"]
+
+
+def test_row_with_extra_columns_does_not_fail_upload():
+    result = _parse(b"Ali,1,0,1\nVali,0,1,1,1\n")
+
+    assert _dense(result) == [[1, 0, 1], [0, 1, 1]]
+    assert result['malformed_rows'] == [(2, "1 ta ortiqcha ustun")]
+
+
+def test_malformed_cells_and_names_keep_file_line_numbers():
+    data = b"ism;q1;q2\nAli;1;2\n\nVali;;1\n;1;1\n"
+    result = _parse(data)
+
+    assert _dense(result) == [[1, -1], [-1, 1], [1, 1]]
+    assert result['malformed_count'] == 2
+    assert result['malformed_rows'] == [(2, "1 ta katak 0/1 emas"), (5, "ism yo'q")]
+
+
+def test_xlsx_header_detection():
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    for row in (["Ali", 1, "x"], ["Vali", 0, 1]):
+        workbook.active.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    result = _parse(buffer.getvalue(), "javoblar.xlsx")
+
+    assert result['matrix'].student_names == ["Ali", "Vali"]
+    assert result['malformed_rows'] == [(1, "1 ta katak 0/1 emas")]
+
+
+def test_rejects_unknown_extension_and_empty_file():
+    with pytest.raises(ValueError):
+        _parse(b"Ali,1,0\n", "javoblar.pdf")
+    with pytest.raises(ValueError):
+        _parse(b"")
+
+
+@pytest.mark.parametrize("data", [
+    b"ism,q1,q2,q3\nAli\t1\t0\t1\nVali\t0\t1\t1\n",
+    b"ism\nAli,1,0,1\nVali,0,1,1\n",
+    b"ism\nAli\t1\t0\t1\nVali\t0\t1\t1\n",
+    b"Ali,1,0,1\nVali\t0\t1\t1\n",
+])
+def test_header_and_rows_with_different_delimiters(data):
+    result = _parse(data)
+
+    assert result['matrix'].student_names == ["Ali", "Vali"]
+    assert _dense(result) == [[1, 0, 1], [0, 1, 1]]
+    assert result['malformed_count'] == 0
+
+
+def test_rows_wider_than_header_are_reported_not_shifted():
+    result = _parse(b"ism,q1\nAli,1,0,1\nVali,0,1,1\n")
+
+    assert result['matrix'].student_names == ["Ali", "Vali"]
+    assert _dense(result) == [[1], [0]]
+    assert result['malformed_rows'] == [(2, "2 ta ortiqcha ustun"), (3, "2 ta ortiqcha ustun")]
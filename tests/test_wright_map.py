@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from src.services import wright_map
+from src.services.wright_map import cached_wright_map
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(wright_map, "WRIGHT_MAP_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_new_version_removes_superseded_files_of_the_same_test(cache_dir):
+    cached_wright_map("test_1_run_1_v1", "png", lambda: b"eski", prefix="test_1_")
+    cached_wright_map("test_1_run_1_v1", "svg", lambda: b"eski", prefix="test_1_")
+    cached_wright_map("test_12_run_2_v1", "png", lambda: b"boshqa", prefix="test_12_")
+
+    path = cached_wright_map("test_1_run_3_v2", "png", lambda: b"yangi", prefix="test_1_")
+
+    assert sorted(os.listdir(cache_dir)) == ["test_12_run_2_v1.png", "test_1_run_3_v2.png"]
+    with open(path, "rb") as file:
+        assert file.read() == b"yangi"
+
+
+def test_cached_file_is_not_rebuilt(cache_dir):
+    cached_wright_map("test_1_run_1_v1", "png", lambda: b"bir", prefix="test_1_")
+
+    def build():
+        raise AssertionError("keshdagi xarita qayta chizilmasligi kerak")
+
+    assert os.path.basename(cached_wright_map("test_1_run_1_v1", "png", build, prefix="test_1_")) == \
+        "test_1_run_1_v1.png"
+
+
+def test_failed_build_leaves_no_temporary_file(cache_dir):
+    def build():
+        raise ValueError("chizishda xato")
+
+    with pytest.raises(ValueError):
+        cached_wright_map("test_1_run_1_v1", "png", build, prefix="test_1_")
+    assert os.listdir(cache_dir) == []